@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:15
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_game'),
+        ('store', '0011_merge_userprofile'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='UserProfile',
+        ),
+    ]
@@ -1,14 +1,4 @@
 from django.db import models
-from django.contrib.auth.models import User
-
-class UserProfile(models.Model):
-    user = models.OneToOneField(User, on_delete=models.CASCADE)
-    steam_id = models.CharField(max_length=50, blank=True, null=True)
-    avatar_url = models.URLField(blank=True, null=True)
-
-    def __str__(self):
-        return self.user.username
-
 
 class Game(models.Model):
     title = models.CharField(max_length=200)
@@ -2,7 +2,8 @@ from django.shortcuts import render, redirect
 from django.http import HttpResponse
 from django.urls import reverse
 from urllib.parse import urlencode
-import requests, re
+
+from store.steam import get_verifier, extract_steam_id
 
 # Steam OpenID endpoint
 STEAM_OPENID_URL = "https://steamcommunity.com/openid/login"
@@ -38,13 +39,9 @@ def steam_verify(request):
     if "openid.claimed_id" not in data:
         return HttpResponse("❌ Invalid Steam response")
 
-    data["openid.mode"] = "check_authentication"
-    response = requests.post(STEAM_OPENID_URL, data=data)
-
-    if "is_valid:true" in response.text:
-        match = re.search(r"https://steamcommunity.com/openid/id/(\d+)", data["openid.claimed_id"])
-        if match:
-            steam_id = match.group(1)
+    if get_verifier().verify(data):
+        steam_id = extract_steam_id(data["openid.claimed_id"])
+        if steam_id:
             return render(request, "login_success.html", {"steam_id": steam_id})
 
     return HttpResponse("❌ Steam login verification failed.")
@@ -0,0 +1,59 @@
+"""
+Session profiles for backend.settings.
+
+SESSION_PROFILE picks where login sessions live:
+
+- ``db`` (default): the django_session table. Every authenticated request
+  reads it and every login or logout writes it.
+- ``cached_db``: the same table behind the ``sessions`` cache. Reads come
+  from the cache; writes still go to the database so nothing is lost when
+  the cache is cleared.
+- ``cache``: the ``sessions`` cache only, no database at all. Point
+  SESSION_CACHE_BACKEND at a backend every worker shares (e.g. a
+  FileBasedCache directory), or each process sees its own sessions.
+- ``file``: one file per session in SESSION_FILE_PATH (the system temp
+  directory by default).
+
+The ``sessions`` cache alias is configured by SESSION_CACHE_BACKEND and
+SESSION_CACHE_LOCATION. With ``db``, ``cached_db`` and ``file``, expired
+sessions pile up until ``manage.py expire_sessions`` removes them.
+"""
+
+from decouple import config
+
+
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'file': 'django.contrib.sessions.backends.file',
+}
+
+CULLING_BACKENDS = {
+    'django.core.cache.backends.locmem',
+    'django.core.cache.backends.filebased',
+    'django.core.cache.backends.db',
+}
+
+
+def session_engine():
+    profile = config('SESSION_PROFILE', default='db').lower()
+    if profile not in SESSION_ENGINES:
+        raise ValueError(f"Unsupported SESSION_PROFILE {profile!r}; use one of {', '.join(SESSION_ENGINES)}.")
+    return SESSION_ENGINES[profile]
+
+
+def session_cache():
+    cache = {
+        'BACKEND': config('SESSION_CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('SESSION_CACHE_LOCATION', default='isle-sessions'),
+    }
+    if cache['BACKEND'].rsplit('.', 1)[0] in CULLING_BACKENDS:
+        # These cull at 300 entries by default, which would silently log
+        # players out (cache) or send them back to the database (cached_db).
+        cache['OPTIONS'] = {'MAX_ENTRIES': config('SESSION_CACHE_MAX_ENTRIES', default=100000, cast=int)}
+    return cache
+
+
+def session_file_path():
+    return config('SESSION_FILE_PATH', default=None)
@@ -11,7 +11,10 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
-from decouple import config
+from decouple import config, Csv
+
+from .database import database_config
+from .sessions import session_engine, session_cache, session_file_path
 
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -25,11 +28,40 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 # Steam OpenID settings
 STEAM_OPENID_URL = "https://steamcommunity.com/openid/login"
+STEAM_OPENID_CONNECT_TIMEOUT = config('STEAM_OPENID_CONNECT_TIMEOUT', default=3.0, cast=float)
+STEAM_OPENID_READ_TIMEOUT = config('STEAM_OPENID_READ_TIMEOUT', default=5.0, cast=float)
+STEAM_OPENID_POOL_SIZE = config('STEAM_OPENID_POOL_SIZE', default=10, cast=int)
+
+# Steam Web API (GetPlayerSummaries) for filling in player names and avatars.
+# Logins never wait on it: enrich_steam_profiles fills in new players (run it
+# often with --missing --loop) and keeps everyone else's current (e.g. hourly
+# with --loop). Fetched profiles are cached for STEAM_PROFILE_CACHE_TTL
+# seconds in the STEAM_PROFILE_CACHE_ALIAS cache, so the job only asks Steam
+# about players it has not seen recently. That cache is file based by default: the job runs
+# as a separate process, and a per-process cache would start empty each run.
+STEAM_API_KEY = config('STEAM_API_KEY', default='')
+STEAM_API_URL = config('STEAM_API_URL', default='https://api.steampowered.com')
+STEAM_API_TIMEOUT = config('STEAM_API_TIMEOUT', default=10.0, cast=float)
+STEAM_PROFILE_CACHE_TTL = config('STEAM_PROFILE_CACHE_TTL', default=86400, cast=int)
 
 
 
 STRIPE_PUBLISHABLE_KEY = config('STRIPE_PUBLISHABLE_KEY')
 STRIPE_SECRET_KEY = config('STRIPE_SECRET_KEY')
+STRIPE_WEBHOOK_SECRET = config('STRIPE_WEBHOOK_SECRET', default='')
+# Point at a local stub or mock server for benchmarks and tests.
+STRIPE_API_BASE = config('STRIPE_API_BASE', default='https://api.stripe.com')
+STRIPE_TIMEOUT = config('STRIPE_TIMEOUT', default=10.0, cast=float)
+# Checkout sessions live this long (Stripe's minimum is 30 minutes). A player's
+# open session for a package is reused while it has CHECKOUT_REUSE_MIN_REMAINING
+# seconds left; expire_checkout_sessions retires the rest.
+CHECKOUT_SESSION_TTL = config('CHECKOUT_SESSION_TTL', default=1800, cast=int)
+CHECKOUT_REUSE_MIN_REMAINING = config('CHECKOUT_REUSE_MIN_REMAINING', default=300, cast=int)
+
+
+# Game server telemetry API (Authorization: Bearer <key>)
+GAME_SERVER_API_KEYS = config('GAME_SERVER_API_KEYS', default='', cast=Csv())
+SLOT_STATS_CHUNK_SIZE = config('SLOT_STATS_CHUNK_SIZE', default=500, cast=int)
 
 
 
@@ -77,6 +109,7 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    'store.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -88,6 +121,13 @@ MIDDLEWARE = [
 
 ]
 
+# Admin panel player list page size, and how long revenue totals are cached.
+ADMIN_DASHBOARD_PAGE_SIZE = 50
+ADMIN_STATS_CACHE_TTL = config('ADMIN_STATS_CACHE_TTL', default=60, cast=int)
+
+# Queries slower than this are logged to 'store.performance' with their SQL.
+SLOW_QUERY_THRESHOLD_MS = config('SLOW_QUERY_THRESHOLD_MS', default=100, cast=float)
+
 ROOT_URLCONF = 'backend.urls'
 
 TEMPLATES = [
@@ -111,13 +151,74 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Selected from the environment (DB_ENGINE=sqlite|postgres); see backend/database.py.
 DATABASES = {
+    'default': database_config(BASE_DIR),
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# The store catalog and player profiles live in their own aliases so they can
+# be pointed at a shared backend (e.g. FileBasedCache with a directory as
+# LOCATION, or Redis) that every worker sees, without moving everything else.
+
+# Catalog lists and the main page's catalog fragments. A catalog change bumps
+# the version in the catalog cache, which with the default per-process
+# LocMemCache only reaches the worker that made it; the others pick the
+# change up when their entries expire, so keep this short unless the alias
+# is shared.
+CATALOG_CACHE_ALIAS = 'catalog'
+CATALOG_CACHE_TIMEOUT = config('CATALOG_CACHE_TIMEOUT', default=60, cast=int)
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'isle-default',
+    },
+    'catalog': {
+        'BACKEND': config('CATALOG_CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CATALOG_CACHE_LOCATION', default='isle-catalog'),
+        'TIMEOUT': CATALOG_CACHE_TIMEOUT,
+    },
+    'players': {
+        'BACKEND': config('PLAYER_CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config('PLAYER_CACHE_LOCATION', default=str(BASE_DIR / '.cache' / 'players')),
+        # At the default 300 entries every set past ~300 active players would
+        # cull rows (listing and deleting files) instead of keeping them.
+        'OPTIONS': {'MAX_ENTRIES': config('PLAYER_CACHE_MAX_ENTRIES', default=100000, cast=int)},
+    },
+    'steam_profiles': {
+        'BACKEND': config(
+            'STEAM_PROFILE_CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'
+        ),
+        'LOCATION': config('STEAM_PROFILE_CACHE_LOCATION', default=str(BASE_DIR / '.cache' / 'steam_profiles')),
+        # Room for every player's profile; at the default 300 the cache would
+        # cull most of them and each run would ask Steam about nearly everyone.
+        'OPTIONS': {'MAX_ENTRIES': config('STEAM_PROFILE_CACHE_MAX_ENTRIES', default=100000, cast=int)},
+    },
+    'sessions': session_cache(),
 }
 
+# Logged-in players' PlayerProfile rows, cached briefly so most requests skip
+# the profile query. Writes invalidate the entry, and the TTL bounds anything
+# missed. The cache is file based by default so that an invalidation (a
+# balance change, say) reaches every worker, not just the one that made it.
+PLAYER_CACHE_ALIAS = 'players'
+PLAYER_CACHE_TIMEOUT = config('PLAYER_CACHE_TIMEOUT', default=30, cast=int)
+
+STEAM_PROFILE_CACHE_ALIAS = 'steam_profiles'
+
+
+# Sessions
+# https://docs.djangoproject.com/en/5.2/topics/http/sessions/
+
+# Selected from the environment (SESSION_PROFILE=db|cached_db|cache|file); see backend/sessions.py.
+SESSION_ENGINE = session_engine()
+SESSION_CACHE_ALIAS = 'sessions'
+SESSION_FILE_PATH = session_file_path()
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -185,4 +286,25 @@ SOCIALACCOUNT_PROVIDERS = {
             dict(id='steam', name='Steam', openid_url='https://steamcommunity.com/openid')
         ]
     }
-}
\ No newline at end of file
+}
+
+
+# Logging
+# https://docs.djangoproject.com/en/5.2/topics/logging/
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'store.performance': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
@@ -5,8 +5,12 @@ from .models import (
     Dino,
     Transaction,
     Purchase,
+    OwnedDino,
     PlayerGameData,
-    DinoSlot
+    DinoSlot,
+    CoinLedgerEntry,
+    StripeEvent,
+    PlayerSummary,
 )
 
 # ------------------------------
@@ -19,10 +23,69 @@ admin.site.index_title = "Welcome to the JURASSIC WORLD COINS Dashboard"
 # ------------------------------
 # Register models
 # ------------------------------
-admin.site.register(PlayerProfile)
+# __str__ on most of these walks player.user, so the changelists join those
+# tables up front, and player pickers use a raw id field instead of a
+# dropdown that renders every PlayerProfile.
 admin.site.register(CoinPackage)
 admin.site.register(Dino)
-admin.site.register(Transaction)
-admin.site.register(Purchase)
-admin.site.register(PlayerGameData)
-admin.site.register(DinoSlot)
+admin.site.register(StripeEvent)
+
+
+@admin.register(PlayerProfile)
+class PlayerProfileAdmin(admin.ModelAdmin):
+    list_select_related = ("user",)
+    raw_id_fields = ("user",)
+
+
+@admin.register(Transaction)
+class TransactionAdmin(admin.ModelAdmin):
+    list_select_related = ("player__user",)
+    raw_id_fields = ("player",)
+
+
+@admin.register(Purchase)
+class PurchaseAdmin(admin.ModelAdmin):
+    list_select_related = ("player__user", "dino")
+    raw_id_fields = ("player",)
+
+
+@admin.register(OwnedDino)
+class OwnedDinoAdmin(admin.ModelAdmin):
+    list_display = ("player", "dino", "acquired_at")
+    list_select_related = ("player__user", "dino")
+    raw_id_fields = ("player", "purchase")
+
+
+@admin.register(PlayerGameData)
+class PlayerGameDataAdmin(admin.ModelAdmin):
+    list_select_related = ("player__user",)
+    raw_id_fields = ("player",)
+
+
+@admin.register(DinoSlot)
+class DinoSlotAdmin(admin.ModelAdmin):
+    list_select_related = ("player__user",)
+    raw_id_fields = ("player",)
+
+
+@admin.register(CoinLedgerEntry)
+class CoinLedgerEntryAdmin(admin.ModelAdmin):
+    # The ledger is append-only: entries are written by store.ledger next to
+    # the balance change they record, and only ever viewed here.
+    list_display = ("player", "delta", "reason", "reference", "created_at")
+    list_select_related = ("player__user",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(PlayerSummary)
+class PlayerSummaryAdmin(admin.ModelAdmin):
+    list_display = ("player", "total_spent_usd", "dinos_owned", "last_purchase_at", "updated_at")
+    raw_id_fields = ("player",)
@@ -0,0 +1,142 @@
+import hashlib
+import hmac
+import os
+import tempfile
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from django.db import connections
+from django.test.utils import setup_databases, teardown_databases
+
+
+# ------------------------------------------------------------
+# BENCHMARK HELPERS
+# ------------------------------------------------------------
+# Shared by the benchmark suites and the stress/maintenance commands. Every
+# run happens in a throwaway test database so numbers are reproducible and
+# real data is never touched.
+@contextmanager
+def isolated_database(on_disk=True, verbosity=0):
+    """
+    Create a scratch copy of the default database for the duration of the block.
+
+    SQLite test databases are in-memory by default, which hides locking
+    behaviour and does not work across threads, so on_disk puts it in a
+    temporary file instead.
+    """
+    connection = connections["default"]
+    test_settings = connection.settings_dict.setdefault("TEST", {})
+    old_test_name = test_settings.get("NAME")
+    tmpdir = None
+
+    if on_disk and connection.vendor == "sqlite":
+        tmpdir = tempfile.mkdtemp(prefix="isle-bench-")
+        test_settings["NAME"] = os.path.join(tmpdir, "bench.sqlite3")
+
+    old_config = setup_databases(verbosity, interactive=False, aliases={"default"})
+    try:
+        yield connection
+    finally:
+        connections.close_all()
+        teardown_databases(old_config, verbosity)
+        test_settings["NAME"] = old_test_name
+        if tmpdir:
+            for name in os.listdir(tmpdir):
+                os.remove(os.path.join(tmpdir, name))
+            os.rmdir(tmpdir)
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Stopwatch:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+
+
+def sign_stripe_payload(payload, secret):
+    """Build a Stripe-Signature header for payload the same way Stripe does."""
+    timestamp = int(time.time())
+    signed = f"{timestamp}.{payload}".encode()
+    signature = hmac.new(secret.encode(), signed, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={signature}"
+
+
+def count_queries():
+    """
+    An execute wrapper that counts queries in .count; install it with
+    connection.execute_wrapper().
+    """
+    def wrapper(execute, sql, params, many, context):
+        wrapper.count += 1
+        return execute(sql, params, many, context)
+
+    wrapper.count = 0
+    return wrapper
+
+
+# ------------------------------------------------------------
+# BENCHMARK SUITES
+# ------------------------------------------------------------
+# Each suite lives in a module of this package and runs as
+# `manage.py benchmark <name>`. run() returns {row: {metric: value}}; the
+# command prints it as a table, and --save / --compare write or check a JSON
+# baseline (baselines/<name>.json by default). Only the metrics a suite lists
+# in `tolerances` are compared.
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+
+
+class Tolerance(namedtuple("Tolerance", "relative higher_is_better", defaults=(False,))):
+    """
+    How far a metric may move from its baseline before --compare fails:
+    up by `relative` (a fraction), or down by it if higher_is_better.
+    """
+
+    def regressed(self, previous, current):
+        if self.higher_is_better:
+            return current < previous * (1 - self.relative)
+        return current > previous * (1 + self.relative)
+
+
+class Suite:
+    name = None
+    help = ""
+    tolerances = {}  # metric -> Tolerance
+
+    def __init__(self, stdout):
+        self.stdout = stdout
+
+    def add_arguments(self, parser):
+        pass
+
+    def describe(self, options):
+        """A line printed above the results table, or ""."""
+        return ""
+
+    def run(self, options):
+        raise NotImplementedError
+
+
+def baseline_path(name):
+    return os.path.join(BASELINE_DIR, f"{name}.json")
+
+
+def find_regressions(tolerances, baseline, results):
+    """'row metric: before -> after' for every tolerated metric that got worse than allowed."""
+    regressions = []
+    for row, current in results.items():
+        previous = baseline.get(row, {})
+        for metric, tolerance in tolerances.items():
+            if metric in current and metric in previous and tolerance.regressed(previous[metric], current[metric]):
+                regressions.append(f"{row} {metric}: {previous[metric]} -> {current[metric]}")
+    return regressions
@@ -0,0 +1,150 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import CommandError
+from django.test import AsyncClient, Client, override_settings
+from django.urls import reverse
+
+from store.bench import isolated_database, percentile, Stopwatch, Suite, Tolerance
+from store.models import PlayerProfile, CoinPackage
+from store.players import SESSION_KEY, STEAM_ID_SESSION_KEY
+from store.stubs import StubOpenIDServer, StubStripeServer
+
+
+ENDPOINTS = ["steam_verify", "buy_coins"]
+
+
+class AsgiSuite(Suite):
+    name = "asgi"
+    help = (
+        "Compare WSGI (a thread per in-flight request) against ASGI (one event loop) for the "
+        "I/O-bound steam_verify and buy_coins views. Steam and Stripe are local stub servers with "
+        "a fixed delay; both handlers run in-process through Django's test clients. Password "
+        "hashing is switched to a fast hasher so the numbers reflect waiting on I/O. WSGI "
+        "latencies exclude time spent queued for a free thread."
+    )
+    tolerances = {
+        "rps": Tolerance(0.25, higher_is_better=True),
+        "p95_ms": Tolerance(0.25),
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=400, help="Requests per endpoint and mode.")
+        parser.add_argument("--concurrency", type=int, default=50, help="Requests in flight at once.")
+        parser.add_argument(
+            "--wsgi-threads", type=int, default=8,
+            help="WSGI worker threads, like gunicorn --threads (default 8).",
+        )
+        parser.add_argument(
+            "--delay", type=float, default=0.3,
+            help="Stub Steam/Stripe latency in seconds (default 0.3, about a real Checkout session create).",
+        )
+        parser.add_argument("--endpoint", action="append", choices=ENDPOINTS, help="Only these (repeatable).")
+
+    def run(self, options):
+        with StubOpenIDServer(delay=options["delay"]) as steam, \
+                StubStripeServer(delay=options["delay"]) as stripe_stub, \
+                isolated_database(), \
+                override_settings(
+                    STEAM_OPENID_URL=steam.url,
+                    STEAM_OPENID_POOL_SIZE=options["concurrency"],
+                    STRIPE_API_BASE=stripe_stub.url,
+                    CHECKOUT_REUSE_MIN_REMAINING=10**9,  # never reuse: every buy_coins goes to Stripe
+                    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+                    ALLOWED_HOSTS=["testserver"],
+                ):
+            self.seed(options)
+            return {
+                f"{endpoint} {mode}": self.run_mode(endpoint, mode, options)
+                for endpoint in options["endpoint"] or ENDPOINTS
+                for mode in ("wsgi", "asgi")
+            }
+
+    def seed(self, options):
+        count = options["concurrency"]
+        users = User.objects.bulk_create([User(username=f"steam_7656{i:013d}") for i in range(count)])
+        self.players = PlayerProfile.objects.bulk_create([
+            PlayerProfile(user=user, steam_id=f"7656{i:013d}") for i, user in enumerate(users)
+        ])
+        self.package = CoinPackage.objects.create(name="Bench Pack", coins_amount=100, price_usd=4.99)
+
+        store = import_module(settings.SESSION_ENGINE).SessionStore
+        self.session_keys = []
+        for player in self.players:
+            session = store()
+            session[STEAM_ID_SESSION_KEY] = player.steam_id
+            session[SESSION_KEY] = player.pk
+            session.save()
+            self.session_keys.append(session.session_key)
+
+    def request_path(self, endpoint, i):
+        if endpoint == "buy_coins":
+            return reverse("store:buy_coins", args=[self.package.pk])
+        steam_id = self.players[i % len(self.players)].steam_id
+        claimed = f"https://steamcommunity.com/openid/id/{steam_id}"
+        query = {
+            "openid.ns": "http://specs.openid.net/auth/2.0",
+            "openid.mode": "id_res",
+            "openid.claimed_id": claimed,
+            "openid.identity": claimed,
+        }
+        return f"{reverse('store:steam-verify')}?{urlencode(query)}"
+
+    def make_client(self, client_class, i):
+        client = client_class()
+        client.cookies[settings.SESSION_COOKIE_NAME] = self.session_keys[i % len(self.session_keys)]
+        return client
+
+    def run_mode(self, endpoint, mode, options):
+        runner = self.run_wsgi if mode == "wsgi" else self.run_asgi
+        runner(endpoint, options, min(options["concurrency"], 10))  # warm up clients and connections
+        with Stopwatch() as timer:
+            results = runner(endpoint, options, options["requests"])
+        failures = [status for status, _ in results if status != 303]
+        if failures:
+            raise CommandError(f"{endpoint} ({mode}): {len(failures)} requests failed, e.g. HTTP {failures[0]}")
+        latencies = [ms for _, ms in results]
+        return {
+            "rps": round(len(results) / timer.elapsed, 1),
+            "p50_ms": round(percentile(latencies, 50), 1),
+            "p95_ms": round(percentile(latencies, 95), 1),
+            "p99_ms": round(percentile(latencies, 99), 1),
+        }
+
+    def run_wsgi(self, endpoint, options, count):
+        local = threading.local()
+
+        def one(i):
+            if not hasattr(local, "client"):
+                local.client = self.make_client(Client, i)
+            with Stopwatch() as timer:
+                response = local.client.get(self.request_path(endpoint, i))
+            return response.status_code, timer.elapsed * 1000
+
+        with ThreadPoolExecutor(options["wsgi_threads"]) as pool:
+            return list(pool.map(one, range(count)))
+
+    def run_asgi(self, endpoint, options, count):
+        async def main():
+            clients = [self.make_client(AsyncClient, i) for i in range(options["concurrency"])]
+            queue = asyncio.Queue()
+            for i in range(count):
+                queue.put_nowait(i)
+            results = []
+
+            async def worker(client):
+                while not queue.empty():
+                    i = queue.get_nowait()
+                    with Stopwatch() as timer:
+                        response = await client.get(self.request_path(endpoint, i))
+                    results.append((response.status_code, timer.elapsed * 1000))
+
+            await asyncio.gather(*(worker(client) for client in clients))
+            return results
+
+        return asyncio.run(main())
@@ -0,0 +1,111 @@
+import random
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.db import connection, connections, DatabaseError
+
+from store import ledger
+from store.bench import isolated_database, percentile, Suite, Tolerance
+from store.models import PlayerProfile, DinoSlot
+from store.telemetry import apply_slot_updates
+from store.webhooks import enqueue_event
+
+
+class DbWritesSuite(Suite):
+    name = "db_writes"
+    help = (
+        "Load-test concurrent writes (ledger, slot stats, webhook inbox) against the configured "
+        "database. Use DB_ENGINE=sqlite for a SQLite file, or DB_ENGINE=postgres with a local "
+        "container, e.g. docker run -e POSTGRES_USER=isle -e POSTGRES_PASSWORD=isle "
+        "-p 5432:5432 postgres:16."
+    )
+    tolerances = {
+        "writes_per_s": Tolerance(0.25, higher_is_better=True),
+        "p99_ms": Tolerance(0.5),
+        "errors": Tolerance(0.0),
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run.")
+        parser.add_argument("--players", type=int, default=100)
+        parser.add_argument(
+            "--untuned", action="store_true",
+            help="Drop the engine OPTIONS (SQLite pragmas, IMMEDIATE transactions) for a before/after comparison.",
+        )
+
+    def describe(self, options):
+        return f"{options['threads']} threads for {options['duration']:.0f}s"
+
+    def run(self, options):
+        with isolated_database():
+            if options["untuned"]:
+                connection.close()
+                connection.settings_dict["OPTIONS"] = {}
+            label = connection.vendor + (" (untuned)" if options["untuned"] else "")
+            return {label: self.run_load(options)}
+
+    def run_load(self, options):
+        players = PlayerProfile.objects.bulk_create([
+            PlayerProfile(user=User.objects.create(username=f"load_{i}"), steam_id=f"load_{i}", coins=1000)
+            for i in range(options["players"])
+        ])
+        DinoSlot.objects.bulk_create(DinoSlot(player=p, server_name="Load") for p in players)
+        player_ids = [p.pk for p in players]
+        slot_ids = list(DinoSlot.objects.values_list("id", flat=True))
+        connections.close_all()
+
+        def credit(rng):
+            ledger.credit(rng.choice(player_ids), 1, "admin_adjustment")
+
+        def debit(rng):
+            try:
+                ledger.debit(rng.choice(player_ids), 1, "dino_purchase")
+            except ledger.InsufficientCoins:
+                pass
+
+        def slot_tick(rng):
+            apply_slot_updates([{"id": rng.choice(slot_ids), "growth": rng.randint(0, 100)} for _ in range(20)])
+
+        def webhook(rng):
+            event_id = f"evt_{rng.getrandbits(64):x}"
+            enqueue_event({"id": event_id, "type": "ping", "data": {"object": {}}})
+
+        operations = [credit, debit, slot_tick, webhook]
+        stop_at = time.monotonic() + options["duration"]
+        latencies, errors = [], []
+        lock = threading.Lock()
+
+        def worker(seed):
+            rng = random.Random(seed)
+            local_latencies, local_errors = [], 0
+            try:
+                while time.monotonic() < stop_at:
+                    operation = rng.choice(operations)
+                    start = time.perf_counter()
+                    try:
+                        operation(rng)
+                    except DatabaseError:
+                        local_errors += 1
+                        continue
+                    local_latencies.append((time.perf_counter() - start) * 1000)
+            finally:
+                connections.close_all()
+                with lock:
+                    latencies.extend(local_latencies)
+                    errors.append(local_errors)
+
+        threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(options["threads"])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        return {
+            "writes": len(latencies),
+            "writes_per_s": round(len(latencies) / options["duration"], 1),
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "errors": sum(errors),
+        }
@@ -0,0 +1,181 @@
+import json
+import random
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from store.bench import isolated_database, percentile, sign_stripe_payload, Stopwatch, Suite, Tolerance
+from store.models import PlayerProfile, PlayerGameData, Dino, DinoSlot, CoinPackage, Transaction
+from store.stubs import StubStripeServer
+
+
+WEBHOOK_SECRET = "whsec_benchmark"
+SCENARIOS = ["main_page", "player_dashboard", "buy_dino", "buy_coins", "stripe_webhook"]
+
+
+class EndpointSuite(Suite):
+    name = "endpoints"
+    help = (
+        "Seed a scratch database with realistic volumes and measure latency percentiles, queries "
+        "per request and throughput for the store's hot endpoints. Stripe is a local stub server."
+    )
+    tolerances = {
+        "p95_ms": Tolerance(0.25),
+        "queries_mean": Tolerance(0.0),
+        "queries_max": Tolerance(0.0),
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument("--players", type=int, default=2000)
+        parser.add_argument("--slots", type=int, default=4, help="Slots per player.")
+        parser.add_argument("--transactions", type=int, default=5, help="Historical transactions per player.")
+        parser.add_argument("--dinos", type=int, default=60)
+        parser.add_argument("--packages", type=int, default=5)
+        parser.add_argument("--requests", type=int, default=200, help="Requests per scenario.")
+        parser.add_argument("--scenario", action="append", choices=SCENARIOS, help="Run only these (repeatable).")
+        parser.add_argument("--seed", type=int, default=1)
+
+    def run(self, options):
+        self.rng = random.Random(options["seed"])
+
+        with StubStripeServer() as stripe_stub, isolated_database(), override_settings(
+            STRIPE_WEBHOOK_SECRET=WEBHOOK_SECRET, STRIPE_API_BASE=stripe_stub.url, ALLOWED_HOSTS=["localhost"],
+        ):
+            with Stopwatch() as timer:
+                self.seed(options)
+            self.stdout.write(f"Seeded in {timer.elapsed:.1f}s")
+
+            return {
+                name: self.run_scenario(name, options["requests"])
+                for name in options["scenario"] or SCENARIOS
+            }
+
+    # ------------------------------------------------------------
+    # SEED DATA
+    # ------------------------------------------------------------
+    def seed(self, options):
+        users = User.objects.bulk_create(
+            [User(username=f"steam_bench_{i}") for i in range(options["players"])], batch_size=1000
+        )
+        self.players = PlayerProfile.objects.bulk_create(
+            [
+                PlayerProfile(user=user, steam_id=f"7656{i:013d}", steam_name=f"Player {i}", coins=10_000)
+                for i, user in enumerate(users)
+            ],
+            batch_size=1000,
+        )
+        PlayerGameData.objects.bulk_create(
+            [PlayerGameData(player=p, total_slots=options["slots"], unlocked_slots=1) for p in self.players],
+            batch_size=1000,
+        )
+        self.dinos = [Dino(name=f"Dino {i}", gender=self.rng.choice(["Male", "Female"])) for i in range(options["dinos"])]
+        self.dinos = Dino.objects.bulk_create(self.dinos)
+        self.packages = CoinPackage.objects.bulk_create(
+            [CoinPackage(name=f"Pack {i}", coins_amount=i + 1, price_usd=2.0 * (i + 1)) for i in range(options["packages"])]
+        )
+        DinoSlot.objects.bulk_create(
+            (
+                DinoSlot(
+                    player=player,
+                    server_name=f"Server {s}",
+                    active_dino=self.rng.choice(self.dinos + [None]),
+                    growth=self.rng.randint(0, 100),
+                )
+                for player in self.players
+                for s in range(options["slots"])
+            ),
+            batch_size=1000,
+        )
+        Transaction.objects.bulk_create(
+            (
+                Transaction(
+                    player=player,
+                    amount_usd=Decimal("4.00"),
+                    coins_purchased=2,
+                    status="completed",
+                    stripe_session_id=f"cs_history_{player.pk}_{t}",
+                )
+                for player in self.players
+                for t in range(options["transactions"])
+            ),
+            batch_size=1000,
+        )
+        # Pending transactions for the webhook scenario to complete.
+        self.pending_sessions = [f"cs_pending_{i}" for i in range(options["requests"])]
+        Transaction.objects.bulk_create(
+            [
+                Transaction(
+                    player=self.rng.choice(self.players),
+                    amount_usd=Decimal("2.00"),
+                    coins_purchased=1,
+                    stripe_session_id=session_id,
+                )
+                for session_id in self.pending_sessions
+            ]
+        )
+
+        # A pool of logged-in clients, each bound to a different player.
+        self.clients = []
+        for player in self.rng.sample(self.players, min(50, len(self.players))):
+            client = Client(HTTP_HOST="localhost")
+            session = client.session
+            session["steam_id"] = player.steam_id
+            session.save()
+            self.clients.append((client, player))
+
+    # ------------------------------------------------------------
+    # SCENARIOS
+    # ------------------------------------------------------------
+    def make_request(self, name, i):
+        client, player = self.clients[i % len(self.clients)]
+        if name == "main_page":
+            return client.get(reverse("store:main_page")), 200
+        if name == "player_dashboard":
+            return client.get(reverse("store:player_dashboard", args=[player.steam_id])), 200
+        if name == "buy_dino":
+            dino = self.rng.choice(self.dinos)
+            return client.get(reverse("store:buy_dino", args=[dino.pk])), 302
+        if name == "buy_coins":
+            package = self.rng.choice(self.packages)
+            return client.get(reverse("store:buy_coins", args=[package.pk])), 303
+        if name == "stripe_webhook":
+            session_id = self.pending_sessions[i % len(self.pending_sessions)]
+            payload = json.dumps({
+                "id": f"evt_{session_id}",
+                "type": "checkout.session.completed",
+                "data": {"object": {"id": session_id, "amount_total": 200}},
+            })
+            response = client.post(
+                reverse("store:stripe_webhook"), payload, content_type="application/json",
+                HTTP_STRIPE_SIGNATURE=sign_stripe_payload(payload, WEBHOOK_SECRET),
+            )
+            return response, 200
+        raise CommandError(f"Unknown scenario {name}")
+
+    def run_scenario(self, name, count):
+        self.make_request(name, 0)  # warm up caches and lazy imports
+
+        latencies, queries = [], []
+        with Stopwatch() as total:
+            for i in range(count):
+                with CaptureQueriesContext(connection) as ctx, Stopwatch() as timer:
+                    response, expected = self.make_request(name, i)
+                if response.status_code != expected:
+                    raise CommandError(f"{name}: expected HTTP {expected}, got {response.status_code}")
+                latencies.append(timer.elapsed * 1000)
+                queries.append(len(ctx.captured_queries))
+
+        return {
+            "requests": count,
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p95_ms": round(percentile(latencies, 95), 3),
+            "p99_ms": round(percentile(latencies, 99), 3),
+            "queries_mean": round(sum(queries) / count, 2),
+            "queries_max": max(queries),
+            "throughput_rps": round(count / total.elapsed, 1),
+        }
@@ -0,0 +1,87 @@
+from allauth.socialaccount.models import SocialAccount
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection
+from django.utils.crypto import get_random_string
+
+from store.bench import isolated_database, percentile, Stopwatch, Suite, Tolerance
+from store.models import PlayerProfile, PlayerGameData
+from store.players import find_player, create_player, steam_username
+
+
+class FirstLoginSuite(Suite):
+    name = "first_login"
+    help = (
+        "Compare player provisioning in steam_verify before and after UserProfile was merged into "
+        "PlayerProfile, for first and returning logins. The old flow is replayed inline: a hashed "
+        "password on every login, get_or_create of User, PlayerProfile and PlayerGameData, and the "
+        "post_save signal's UserProfile insert and SocialAccount lookup."
+    )
+    tolerances = {
+        "p95_ms": Tolerance(0.25),
+        "queries": Tolerance(0.0),
+        "inserts": Tolerance(0.0),
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument("--logins", type=int, default=50, help="Logins per flow and kind.")
+
+    def describe(self, options):
+        return f"{options['logins']} logins per row"
+
+    def run(self, options):
+        count = options["logins"]
+        with isolated_database():
+            with connection.cursor() as cursor:
+                # authentication_userprofile as it was before it was dropped.
+                cursor.execute(
+                    "CREATE TABLE legacy_userprofile (id integer PRIMARY KEY AUTOINCREMENT, "
+                    "user_id integer NOT NULL UNIQUE, steam_id varchar(50) NULL, avatar_url varchar(200) NULL)"
+                )
+
+            def legacy(steam_id):
+                user, created = User.objects.get_or_create(
+                    username=steam_username(steam_id), defaults={"password": make_password(get_random_string(12))},
+                )
+                if created:
+                    with connection.cursor() as cursor:
+                        cursor.execute("INSERT INTO legacy_userprofile (user_id) VALUES (%s)", [user.pk])
+                    SocialAccount.objects.filter(user=user, provider="steam").first()
+                player, _ = PlayerProfile.objects.get_or_create(user=user, defaults={"steam_id": steam_id})
+                PlayerGameData.objects.get_or_create(player=player)
+                return player
+
+            def unified(steam_id):
+                player = find_player(steam_id)
+                if player is None:
+                    player = create_player(steam_id)
+                return player
+
+            results = {}
+            for name, flow, base in [("before", legacy, 76561198000000000), ("after", unified, 76561199000000000)]:
+                steam_ids = [str(base + i) for i in range(count)]
+                results[f"{name}: first login"] = self.time(flow, steam_ids)
+                results[f"{name}: returning login"] = self.time(flow, steam_ids)
+            return results
+
+    def time(self, flow, steam_ids):
+        latencies = []
+        queries = inserts = 0
+
+        def count_queries(execute, sql, params, many, context):
+            nonlocal queries, inserts
+            queries += 1
+            inserts += sql.startswith("INSERT")
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count_queries):
+            for steam_id in steam_ids:
+                with Stopwatch() as timer:
+                    flow(steam_id)
+                latencies.append(timer.elapsed * 1000)
+        return {
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p95_ms": round(percentile(latencies, 95), 3),
+            "queries": round(queries / len(steam_ids), 2),
+            "inserts": round(inserts / len(steam_ids), 2),
+        }
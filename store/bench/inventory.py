@@ -0,0 +1,94 @@
+import random
+
+from django.contrib.auth.models import User
+from django.db import connection
+
+from store import inventory
+from store.bench import count_queries, isolated_database, percentile, Stopwatch, Suite, Tolerance
+from store.models import PlayerProfile, Dino, Purchase, OwnedDino
+
+
+class InventorySuite(Suite):
+    name = "inventory"
+    help = (
+        "Compare ownership lookups against Purchase (how ownership was recorded before OwnedDino) "
+        "with the OwnedDino inventory, for players owning hundreds of dinos: a single 'does the "
+        "player own this dino' check, and owned flags for every dino in the catalog."
+    )
+    tolerances = {
+        "p95_ms": Tolerance(0.25),
+        "queries": Tolerance(0.0),
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument("--players", type=int, default=200)
+        parser.add_argument("--dinos", type=int, default=1000, help="Catalog size.")
+        parser.add_argument("--owned", type=int, default=300, help="Dinos owned per player.")
+        parser.add_argument("--samples", type=int, default=2000, help="Ownership checks to time.")
+        parser.add_argument("--catalogs", type=int, default=20, help="Catalog flag renders to time.")
+
+    def describe(self, options):
+        return f"{options['players']} players owning {options['owned']} of {options['dinos']} dinos each"
+
+    def run(self, options):
+        rng = random.Random(0)
+        with isolated_database():
+            players, dino_ids = self.seed(options, rng)
+
+            def legacy_owns(player, dino_id):
+                return Purchase.objects.filter(player=player, dino_id=dino_id).exists()
+
+            def legacy_flags(player):
+                return {dino_id: legacy_owns(player, dino_id) for dino_id in dino_ids}
+
+            def legacy_batched_flags(player):
+                owned = set(Purchase.objects.filter(player=player).values_list("dino_id", flat=True))
+                return {dino_id: dino_id in owned for dino_id in dino_ids}
+
+            def inventory_flags(player):
+                owned = inventory.owned_dino_ids(player)
+                return {dino_id: dino_id in owned for dino_id in dino_ids}
+
+            checks = [(rng.choice(players), rng.choice(dino_ids)) for _ in range(options["samples"])]
+            catalogs = [rng.choice(players) for _ in range(options["catalogs"])]
+            return {
+                "owns: Purchase": self.time(lambda c: legacy_owns(*c), checks),
+                "owns: OwnedDino": self.time(lambda c: inventory.owns(c[0], c[1]), checks),
+                "catalog: Purchase per dino": self.time(legacy_flags, catalogs),
+                "catalog: Purchase batched": self.time(legacy_batched_flags, catalogs),
+                "catalog: OwnedDino batched": self.time(inventory_flags, catalogs),
+            }
+
+    def seed(self, options, rng):
+        users = User.objects.bulk_create([User(username=f"inv_{i}") for i in range(options["players"])])
+        players = PlayerProfile.objects.bulk_create([
+            PlayerProfile(user=user, steam_id=f"inv_{i}") for i, user in enumerate(users)
+        ])
+        dinos = Dino.objects.bulk_create([Dino(name=f"Dino {i}") for i in range(options["dinos"])])
+        dino_ids = [dino.pk for dino in dinos]
+        for player in players:
+            owned = rng.sample(dino_ids, options["owned"])
+            purchases = Purchase.objects.bulk_create([
+                Purchase(player=player, dino_id=dino_id, used_coins=1) for dino_id in owned
+            ])
+            OwnedDino.objects.bulk_create([
+                OwnedDino(player=player, dino_id=p.dino_id, purchase=p) for p in purchases
+            ])
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        return players, dino_ids
+
+    def time(self, fn, samples):
+        fn(samples[0])  # warm up
+        latencies = []
+        counter = count_queries()
+        with connection.execute_wrapper(counter):
+            for sample in samples:
+                with Stopwatch() as timer:
+                    fn(sample)
+                latencies.append(timer.elapsed * 1000)
+        return {
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p95_ms": round(percentile(latencies, 95), 3),
+            "queries": round(counter.count / len(samples), 2),
+        }
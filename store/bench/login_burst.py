@@ -0,0 +1,89 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connections
+from django.utils.crypto import get_random_string
+
+from store.bench import isolated_database, Stopwatch, Suite, Tolerance
+from store.models import PlayerProfile, PlayerGameData
+from store.players import find_player, create_player, steam_username
+
+
+class LoginBurstSuite(Suite):
+    name = "login_burst"
+    help = (
+        "Replay a burst of Steam logins, mostly returning players, through three provisioning flows "
+        "and report the CPU each one burns: hashing a throwaway password on every login (the original "
+        "get_or_create flow), hashing only on first login, and giving new users an unusable password "
+        "(the current flow)."
+    )
+    tolerances = {
+        "cpu_ms_per_login": Tolerance(0.25),
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument("--logins", type=int, default=100)
+        parser.add_argument("--first", type=float, default=0.1, help="Fraction of logins that are first logins.")
+        parser.add_argument("--concurrency", type=int, default=8)
+
+    def describe(self, options):
+        first = round(options["logins"] * options["first"])
+        return f"{options['logins']} logins ({first} first), {options['concurrency']} concurrent"
+
+    def run(self, options):
+        def hash_every_login(steam_id):
+            user, _ = User.objects.get_or_create(
+                username=steam_username(steam_id), defaults={"password": make_password(get_random_string(12))},
+            )
+            player, _ = PlayerProfile.objects.get_or_create(user=user, defaults={"steam_id": steam_id})
+            PlayerGameData.objects.get_or_create(player=player)
+
+        def hash_first_login(steam_id):
+            if find_player(steam_id) is None:
+                make_password(get_random_string(12))
+                create_player(steam_id)
+
+        def unusable_password(steam_id):
+            if find_player(steam_id) is None:
+                create_player(steam_id)
+
+        flows = [
+            ("hash every login", hash_every_login),
+            ("hash first login", hash_first_login),
+            ("unusable password", unusable_password),
+        ]
+        with isolated_database():
+            return {
+                name: self.burst(flow, 76561198000000000 + index * 10**6, options)
+                for index, (name, flow) in enumerate(flows)
+            }
+
+    def burst(self, flow, base, options):
+        count = options["logins"]
+        returning = [str(base + i) for i in range(count - round(count * options["first"]))]
+        first = [str(base + count + i) for i in range(count - len(returning))]
+        for steam_id in returning:
+            create_player(steam_id)
+        steam_ids = returning + first
+        random.Random(base).shuffle(steam_ids)
+        connections.close_all()
+
+        def login(steam_id):
+            try:
+                flow(steam_id)
+            finally:
+                connections.close_all()
+
+        cpu = time.process_time()
+        with Stopwatch() as timer, ThreadPoolExecutor(options["concurrency"]) as pool:
+            list(pool.map(login, steam_ids))
+        cpu = time.process_time() - cpu
+        return {
+            "wall_s": round(timer.elapsed, 2),
+            "cpu_s": round(cpu, 2),
+            "cpu_ms_per_login": round(cpu * 1000 / count, 2),
+            "logins_per_s": round(count / timer.elapsed, 1),
+        }
@@ -0,0 +1,152 @@
+import random
+import shutil
+import tempfile
+import threading
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import connection, connections, DatabaseError
+from django.test import override_settings
+
+from backend.sessions import SESSION_ENGINES
+from store import ledger
+from store.bench import isolated_database, percentile, Suite, Tolerance
+from store.models import PlayerProfile
+
+
+class SessionsSuite(Suite):
+    name = "sessions"
+    help = (
+        "Compare the per-request session overhead of each SESSION_PROFILE under concurrent load. "
+        "Reader threads load a logged-in session at a fixed rate the way SessionMiddleware does "
+        "(and occasionally save it) while writer threads run ledger debits, so database-backed "
+        "sessions show the lock contention they add to purchase writes."
+    )
+    tolerances = {
+        "p95_us": Tolerance(0.5),
+        "queries": Tolerance(0.1),
+        "debits_per_s": Tolerance(0.25, higher_is_better=True),
+        "errors": Tolerance(0.0),
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument("--profile", action="append", choices=list(SESSION_ENGINES), help="Only these (repeatable).")
+        parser.add_argument("--threads", type=int, default=8, help="Session reader threads.")
+        parser.add_argument("--writers", type=int, default=2, help="Concurrent purchase writer threads.")
+        parser.add_argument("--duration", type=float, default=5.0, help="Seconds per profile.")
+        parser.add_argument("--sessions", type=int, default=2000)
+        parser.add_argument(
+            "--rate", type=float, default=50.0,
+            help="Requests per second per reader thread, so every profile faces the same offered load.",
+        )
+        parser.add_argument(
+            "--write-ratio", type=float, default=0.05,
+            help="Fraction of requests that modify and save the session (default 0.05).",
+        )
+
+    def run(self, options):
+        results = {}
+        with isolated_database():
+            players = PlayerProfile.objects.bulk_create([
+                PlayerProfile(user=User.objects.create(username=f"session_{i}"), steam_id=f"session_{i}", coins=10**9)
+                for i in range(50)
+            ])
+            self.player_ids = [p.pk for p in players]
+
+            for profile in options["profile"] or list(SESSION_ENGINES):
+                file_path = tempfile.mkdtemp(prefix="isle-sessions-")
+                try:
+                    with override_settings(SESSION_ENGINE=SESSION_ENGINES[profile], SESSION_FILE_PATH=file_path):
+                        caches["sessions"].clear()
+                        results[profile] = self.run_profile(options)
+                finally:
+                    shutil.rmtree(file_path, ignore_errors=True)
+        return results
+
+    def run_profile(self, options):
+        store = import_module(settings.SESSION_ENGINE).SessionStore
+        keys = []
+        for i in range(options["sessions"]):
+            session = store()
+            session["steam_id"] = f"session_{i % len(self.player_ids)}"
+            session["player_id"] = self.player_ids[i % len(self.player_ids)]
+            session.save()
+            keys.append(session.session_key)
+        for key in keys:  # warm cached_db the way steady-state traffic would
+            store(key).load()
+        connections.close_all()
+
+        stop_at = time.monotonic() + options["duration"]
+        lock = threading.Lock()
+        totals = {"latencies": [], "queries": 0, "debits": 0, "errors": 0}
+        local = threading.local()
+
+        def count_queries(execute, sql, params, many, context):
+            local.queries += 1
+            return execute(sql, params, many, context)
+
+        def reader(seed):
+            rng = random.Random(seed)
+            local.queries = 0
+            latencies, errors = [], 0
+            interval = 1 / options["rate"]
+            next_at = time.monotonic()
+            try:
+                with connection.execute_wrapper(count_queries):
+                    while time.monotonic() < stop_at:
+                        next_at += interval
+                        time.sleep(max(0.0, next_at - time.monotonic()))
+                        start = time.perf_counter()
+                        try:
+                            session = store(rng.choice(keys))
+                            session.get("player_id")
+                            if rng.random() < options["write_ratio"]:
+                                session["last_seen"] = time.time()
+                                session.save()
+                        except DatabaseError:
+                            errors += 1
+                            continue
+                        latencies.append((time.perf_counter() - start) * 1_000_000)
+            finally:
+                connections.close_all()
+                with lock:
+                    totals["latencies"].extend(latencies)
+                    totals["queries"] += local.queries
+                    totals["errors"] += errors
+
+        def writer(seed):
+            rng = random.Random(seed)
+            debits = errors = 0
+            try:
+                while time.monotonic() < stop_at:
+                    try:
+                        ledger.debit(rng.choice(self.player_ids), 1, "dino_purchase")
+                        debits += 1
+                    except DatabaseError:
+                        errors += 1
+            finally:
+                connections.close_all()
+                with lock:
+                    totals["debits"] += debits
+                    totals["errors"] += errors
+
+        threads = [threading.Thread(target=reader, args=(seed,)) for seed in range(options["threads"])]
+        threads += [threading.Thread(target=writer, args=(-seed,)) for seed in range(1, options["writers"] + 1)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        latencies = totals["latencies"]
+        return {
+            "p50_us": round(percentile(latencies, 50)),
+            "p95_us": round(percentile(latencies, 95)),
+            "p99_us": round(percentile(latencies, 99)),
+            "queries": round(totals["queries"] / max(len(latencies), 1), 2),
+            "req_per_s": round(len(latencies) / options["duration"]),
+            "debits_per_s": round(totals["debits"] / options["duration"]),
+            "errors": totals["errors"],
+        }
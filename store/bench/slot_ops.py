@@ -0,0 +1,96 @@
+import json
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from store.bench import count_queries, isolated_database, percentile, Stopwatch, Suite, Tolerance
+from store.models import PlayerProfile, Dino, DinoSlot, OwnedDino
+
+
+class SlotOpsSuite(Suite):
+    name = "slot_ops"
+    help = (
+        "Compare managing every slot of a player one POST at a time (switch_dino, then the redirect "
+        "back to the main page) with a single request to the batch slot endpoint. Reports requests, "
+        "queries and wall time per management session."
+    )
+    tolerances = {
+        "requests": Tolerance(0.0),
+        "queries": Tolerance(0.0),
+        "p95_ms": Tolerance(0.25),
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument("--slots", type=int, default=10, help="Slots changed per session.")
+        parser.add_argument("--dinos", type=int, default=200, help="Catalog size (all owned).")
+        parser.add_argument("--sessions", type=int, default=50, help="Sessions to time per mode.")
+
+    def describe(self, options):
+        return f"{options['slots']} slot changes per session"
+
+    def run(self, options):
+        with isolated_database(), override_settings(ALLOWED_HOSTS=["testserver"]):
+            self.seed(options)
+            return {
+                "per-slot POST + redirect": self.run_mode(self.per_slot, options),
+                "batch endpoint": self.run_mode(self.batch, options),
+            }
+
+    def seed(self, options):
+        user = User.objects.create(username="bench_slots")
+        self.player = PlayerProfile.objects.create(user=user, steam_id="76561198000000002")
+        dinos = Dino.objects.bulk_create(Dino(name=f"Dino {i}") for i in range(options["dinos"]))
+        OwnedDino.objects.bulk_create(OwnedDino(player=self.player, dino=dino) for dino in dinos)
+        self.dino_ids = [dino.pk for dino in dinos]
+        self.slots = [
+            slot.pk for slot in DinoSlot.objects.bulk_create(
+                DinoSlot(player=self.player, server_name=f"Server {i}") for i in range(options["slots"])
+            )
+        ]
+        self.client = Client()
+        session = self.client.session
+        session["steam_id"] = self.player.steam_id
+        session.save()
+
+    def changes(self, round_number):
+        return [
+            (slot_id, self.dino_ids[(round_number + i) % len(self.dino_ids)])
+            for i, slot_id in enumerate(self.slots)
+        ]
+
+    def per_slot(self, changes):
+        requests = 0
+        for slot_id, dino_id in changes:
+            response = self.client.post(
+                reverse("store:switch_dino", args=[slot_id]), {"dino_id": dino_id}, follow=True,
+            )
+            requests += 1 + len(response.redirect_chain)
+        return requests
+
+    def batch(self, changes):
+        self.client.post(
+            reverse("store:slot_operations"),
+            json.dumps({"operations": [
+                {"op": "assign", "slot": slot_id, "dino": dino_id} for slot_id, dino_id in changes
+            ]}),
+            content_type="application/json",
+        )
+        return 1
+
+    def run_mode(self, mode, options):
+        mode(self.changes(0))  # warm caches
+        latencies, requests = [], 0
+        counter = count_queries()
+        with connection.execute_wrapper(counter):
+            for round_number in range(1, options["sessions"] + 1):
+                with Stopwatch() as timer:
+                    requests += mode(self.changes(round_number))
+                latencies.append(timer.elapsed * 1000)
+        return {
+            "requests": requests // options["sessions"],
+            "queries": counter.count // options["sessions"],
+            "p50_ms": round(percentile(latencies, 50), 1),
+            "p95_ms": round(percentile(latencies, 95), 1),
+        }
@@ -0,0 +1,77 @@
+import json
+import random
+
+from django.contrib.auth.models import User
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from store.bench import isolated_database, Stopwatch, Suite, Tolerance
+from store.models import PlayerProfile, DinoSlot
+from store.telemetry import STAT_FIELDS
+
+
+API_KEY = "bench-game-server"
+
+
+class SlotStatsSuite(Suite):
+    name = "slot_stats"
+    help = (
+        "Measure slot stat ingestion throughput (updates/sec) through the batch API. "
+        "Runs against whichever database DATABASES['default'] points at."
+    )
+    tolerances = {
+        "updates_per_s": Tolerance(0.25, higher_is_better=True),
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument("--slots", type=int, default=5000)
+        parser.add_argument("--batch-size", type=int, default=1000, help="Updates per request.")
+        parser.add_argument("--rounds", type=int, default=5, help="Stat ticks per slot.")
+        parser.add_argument("--format", choices=["json", "ndjson"], default="json")
+
+    def describe(self, options):
+        return f"{options['batch_size']} updates per request, {options['format']}"
+
+    def run(self, options):
+        with isolated_database(), override_settings(GAME_SERVER_API_KEYS=[API_KEY]):
+            return {connection.vendor: self.ingest(options)}
+
+    def ingest(self, options):
+        players = PlayerProfile.objects.bulk_create([
+            PlayerProfile(user=User.objects.create(username=f"bench_{i}"), steam_id=f"bench_{i}")
+            for i in range(max(1, options["slots"] // 10))
+        ])
+        DinoSlot.objects.bulk_create([
+            DinoSlot(player=players[i % len(players)], server_name="Bench")
+            for i in range(options["slots"])
+        ], batch_size=1000)
+        slot_ids = list(DinoSlot.objects.values_list("id", flat=True))
+
+        client = Client(HTTP_HOST="localhost", HTTP_AUTHORIZATION=f"Bearer {API_KEY}")
+        url = reverse("store:slot_stats_ingest")
+        content_type = "application/x-ndjson" if options["format"] == "ndjson" else "application/json"
+
+        total = 0
+        with Stopwatch() as timer:
+            for _ in range(options["rounds"]):
+                for start in range(0, len(slot_ids), options["batch_size"]):
+                    items = [
+                        {"id": slot_id, **{field: random.randint(0, 100) for field in STAT_FIELDS}}
+                        for slot_id in slot_ids[start:start + options["batch_size"]]
+                    ]
+                    if options["format"] == "ndjson":
+                        body = "\n".join(json.dumps(item) for item in items)
+                    else:
+                        body = json.dumps(items)
+                    response = client.post(url, body, content_type=content_type)
+                    if response.status_code != 200 or response.json()["failed"]:
+                        raise CommandError(f"Ingest failed: {response.content[:200]!r}")
+                    total += len(items)
+
+        return {
+            "updates": total,
+            "seconds": round(timer.elapsed, 2),
+            "updates_per_s": round(total / timer.elapsed),
+        }
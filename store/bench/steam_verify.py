@@ -0,0 +1,75 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from django.core.management.base import CommandError
+
+from store.bench import Stopwatch, Suite, Tolerance
+from store.steam import SteamOpenIDVerifier
+from store.stubs import StubOpenIDServer
+
+
+ASSERTION = {
+    "openid.ns": "http://specs.openid.net/auth/2.0",
+    "openid.mode": "id_res",
+    "openid.claimed_id": "https://steamcommunity.com/openid/id/76561198000000000",
+    "openid.identity": "https://steamcommunity.com/openid/id/76561198000000000",
+}
+
+
+class SteamVerifySuite(Suite):
+    name = "steam_verify"
+    help = "Compare Steam OpenID verification strategies against a local stub server."
+    tolerances = {
+        "logins_per_s": Tolerance(0.25, higher_is_better=True),
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument("--logins", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=20)
+        parser.add_argument("--delay", type=float, default=0.02, help="Stub server latency in seconds.")
+
+    def run(self, options):
+        with StubOpenIDServer(delay=options["delay"]) as stub:
+            verifier = SteamOpenIDVerifier(stub.url, pool_size=options["concurrency"])
+
+            def unpooled(_):
+                data = dict(ASSERTION, **{"openid.mode": "check_authentication"})
+                return "is_valid:true" in requests.post(stub.url, data=data, timeout=5).text
+
+            try:
+                return {
+                    "fresh connection per login": self.report(self.threaded(unpooled, options)),
+                    "pooled verifier (threads)": self.report(
+                        self.threaded(lambda _: verifier.verify(ASSERTION), options)
+                    ),
+                    "pooled verifier (async)": self.report(self.concurrent_async(verifier, options)),
+                }
+            finally:
+                verifier.close()
+
+    def threaded(self, func, options):
+        with Stopwatch() as timer, ThreadPoolExecutor(options["concurrency"]) as pool:
+            results = list(pool.map(func, range(options["logins"])))
+        return results, timer.elapsed
+
+    def concurrent_async(self, verifier, options):
+        async def run():
+            limit = asyncio.Semaphore(options["concurrency"])
+
+            async def one():
+                async with limit:
+                    return await verifier.averify(ASSERTION)
+
+            return await asyncio.gather(*(one() for _ in range(options["logins"])))
+
+        with Stopwatch() as timer:
+            results = asyncio.run(run())
+        return results, timer.elapsed
+
+    def report(self, outcome):
+        results, elapsed = outcome
+        if not all(results):
+            raise CommandError(f"{results.count(False)} verifications failed.")
+        return {"logins_per_s": round(len(results) / elapsed), "seconds": round(elapsed, 2)}
@@ -0,0 +1,103 @@
+import json
+import random
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Sum
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from store.bench import isolated_database, percentile, sign_stripe_payload, Stopwatch, Suite, Tolerance
+from store.models import PlayerProfile, Transaction, StripeEvent
+
+
+WEBHOOK_SECRET = "whsec_benchmark"
+
+
+class StripeWebhookSuite(Suite):
+    name = "stripe_webhook"
+    help = (
+        "Measure stripe_webhook latency and inbox drain throughput with locally signed fake events, "
+        "and check that every event is credited exactly once."
+    )
+    tolerances = {
+        "p95_ms": Tolerance(0.25),
+        "events_per_s": Tolerance(0.25, higher_is_better=True),
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument("--events", type=int, default=2000)
+        parser.add_argument("--players", type=int, default=200)
+        parser.add_argument("--duplicate-rate", type=float, default=0.2, help="Fraction of deliveries that are retries.")
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--batch-size", type=int, default=100)
+
+    def run(self, options):
+        with isolated_database(), override_settings(STRIPE_WEBHOOK_SECRET=WEBHOOK_SECRET):
+            return self.deliver_and_drain(options)
+
+    def deliver_and_drain(self, options):
+        players = [
+            PlayerProfile(user=User.objects.create(username=f"bench_{i}"), steam_id=f"bench_{i}")
+            for i in range(options["players"])
+        ]
+        PlayerProfile.objects.bulk_create(players)
+        Transaction.objects.bulk_create([
+            Transaction(
+                player=players[i % len(players)],
+                amount_usd=Decimal("2.00"),
+                coins_purchased=1,
+                stripe_session_id=f"cs_bench_{i}",
+            )
+            for i in range(options["events"])
+        ])
+
+        rng = random.Random(0)
+        deliveries = list(range(options["events"]))
+        deliveries += rng.choices(deliveries, k=int(len(deliveries) * options["duplicate_rate"]))
+        rng.shuffle(deliveries)
+
+        client = Client(HTTP_HOST="localhost")
+        url = reverse("store:stripe_webhook")
+        latencies = []
+        for i in deliveries:
+            payload = json.dumps({
+                "id": f"evt_bench_{i}",
+                "type": "checkout.session.completed",
+                "data": {"object": {"id": f"cs_bench_{i}", "amount_total": 200}},
+            })
+            with Stopwatch() as timer:
+                response = client.post(
+                    url, payload, content_type="application/json", HTTP_STRIPE_SIGNATURE=sign_stripe_payload(payload, WEBHOOK_SECRET)
+                )
+            if response.status_code != 200:
+                raise CommandError(f"Webhook returned {response.status_code}")
+            latencies.append(timer.elapsed * 1000)
+
+        queued = StripeEvent.objects.count()
+        with Stopwatch() as timer:
+            call_command(
+                "process_stripe_events", workers=options["workers"], batch_size=options["batch_size"], stdout=StringIO(),
+            )
+
+        credited = PlayerProfile.objects.aggregate(total=Sum("coins"))["total"] or 0
+        if credited != options["events"]:
+            raise CommandError(f"Expected {options['events']} coins credited, found {credited}.")
+        self.stdout.write("Every event credited exactly once.")
+
+        return {
+            "webhook": {
+                "deliveries": len(deliveries),
+                "p50_ms": round(percentile(latencies, 50), 2),
+                "p95_ms": round(percentile(latencies, 95), 2),
+                "p99_ms": round(percentile(latencies, 99), 2),
+            },
+            "worker": {
+                "events": queued,
+                "seconds": round(timer.elapsed, 2),
+                "events_per_s": round(queued / timer.elapsed),
+            },
+        }
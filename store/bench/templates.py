@@ -0,0 +1,99 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.cache.utils import make_template_fragment_key
+from django.template.loader import render_to_string
+from django.test import RequestFactory, override_settings
+
+from store.bench import isolated_database, percentile, Stopwatch, Suite, Tolerance
+from store.catalog import get_catalog_dinos, get_catalog_packages, get_catalog_version, bump_catalog_version
+from store.models import PlayerProfile, Dino, DinoSlot, CoinPackage
+
+
+FRAGMENTS = ["catalog_packages", "catalog_dinos"]
+
+
+class TemplatesSuite(Suite):
+    name = "templates"
+    help = (
+        "Measure main_page.html render time with the catalog fragments re-rendered on every request "
+        "(as before fragment caching) and served from the fragment cache, for several catalog sizes. "
+        "Only template rendering is timed; the catalog lists themselves are cached in both modes."
+    )
+    tolerances = {
+        "p95_ms": Tolerance(0.25),
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dinos", type=int, action="append",
+            help="Catalog sizes to measure (repeatable, default 10, 100 and 1000).",
+        )
+        parser.add_argument("--renders", type=int, default=100, help="Renders per size and mode.")
+
+    def run(self, options):
+        media_root = tempfile.mkdtemp(prefix="isle-media-")
+        results = {}
+        try:
+            with isolated_database(), override_settings(MEDIA_ROOT=media_root):
+                player = self.seed_player()
+                for count in options["dinos"] or [10, 100, 1000]:
+                    self.seed_catalog(count)
+                    uncached = self.render(player, options["renders"], cached=False)
+                    cached = self.render(player, options["renders"], cached=True)
+                    cached["speedup"] = round(uncached["p50_ms"] / cached["p50_ms"], 1)
+                    results[f"{count} dinos uncached"] = uncached
+                    results[f"{count} dinos cached"] = cached
+        finally:
+            shutil.rmtree(media_root, ignore_errors=True)
+        return results
+
+    def seed_player(self):
+        user = User.objects.create(username="bench_player")
+        player = PlayerProfile.objects.create(user=user, steam_id="76561198000000001", coins=50)
+        DinoSlot.objects.bulk_create(DinoSlot(player=player, server_name=f"Server {i}") for i in range(3))
+        return player
+
+    def seed_catalog(self, count):
+        # bulk_create skips the post_save signals, so bump the catalog version by hand.
+        Dino.objects.all().delete()
+        CoinPackage.objects.all().delete()
+        Dino.objects.bulk_create(
+            Dino(name=f"Dino {i}", image=f"dinos/dino_{i}.png", coin_cost=1, gender="Male") for i in range(count)
+        )
+        CoinPackage.objects.bulk_create(
+            CoinPackage(name=f"Pack {i}", coins_amount=100 * (i + 1), price_usd=4.99 * (i + 1)) for i in range(3)
+        )
+        bump_catalog_version()
+        get_catalog_dinos()
+        get_catalog_packages()
+
+    def render(self, player, renders, cached):
+        request = RequestFactory().get("/main/")
+        request.session = {}
+        version = get_catalog_version()
+        fragment_cache = caches[settings.CATALOG_CACHE_ALIAS]
+        fragment_keys = [make_template_fragment_key(name, [version]) for name in FRAGMENTS]
+        slots = list(DinoSlot.objects.filter(player=player).select_related("active_dino"))
+        context = {
+            "player_profile": player,
+            "catalog_version": version,
+            "catalog_cache_timeout": settings.CATALOG_CACHE_TIMEOUT,
+            "dinos": get_catalog_dinos,
+            "packages": get_catalog_packages,
+            "coin_balance": player.coins,
+            "slots": slots,
+        }
+
+        render_to_string("main_page.html", context, request)  # warm the template loader and fragments
+        latencies = []
+        for _ in range(renders):
+            if not cached:
+                fragment_cache.delete_many(fragment_keys)
+            with Stopwatch() as timer:
+                render_to_string("main_page.html", context, request)
+            latencies.append(timer.elapsed * 1000)
+        return {"p50_ms": round(percentile(latencies, 50), 3), "p95_ms": round(percentile(latencies, 95), 3)}
@@ -0,0 +1,81 @@
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import Dino, CoinPackage
+
+
+# ------------------------------------------------------------
+# CATALOG CACHE
+# ------------------------------------------------------------
+# The Dino and CoinPackage lists are cached under a version number.
+# Bumping the version makes every previously cached list unreachable,
+# so invalidation never has to know which keys were written.
+VERSION_KEY = "catalog:version"
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def _cache():
+    return caches[getattr(settings, "CATALOG_CACHE_ALIAS", "default")]
+
+
+def _count(outcome):
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+def get_catalog_version():
+    cache = _cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, timeout=None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+def bump_catalog_version():
+    cache = _cache()
+    try:
+        return cache.incr(VERSION_KEY)
+    except ValueError:
+        # Key expired or was never written (e.g. fresh cache).
+        cache.add(VERSION_KEY, 2, timeout=None)
+        return cache.get(VERSION_KEY, 2)
+
+
+def _cached_list(name, loader):
+    cache = _cache()
+    key = f"catalog:{name}:v{get_catalog_version()}"
+    items = cache.get(key)
+    if items is not None:
+        _count("hits")
+        return items
+
+    _count("misses")
+    items = loader()
+    cache.set(key, items, timeout=getattr(settings, "CATALOG_CACHE_TIMEOUT", None))
+    return items
+
+
+def get_catalog_dinos():
+    return _cached_list("dinos", lambda: list(Dino.objects.order_by("id")))
+
+
+def get_catalog_packages():
+    return _cached_list("packages", lambda: list(CoinPackage.objects.order_by("id")))
+
+
+def catalog_cache_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["version"] = get_catalog_version()
+    return stats
+
+
+def reset_catalog_cache_stats():
+    with _stats_lock:
+        _stats["hits"] = 0
+        _stats["misses"] = 0
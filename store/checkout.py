@@ -0,0 +1,242 @@
+import asyncio
+import ssl
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import httpx
+import stripe
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db.models import Q
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .clients import LoopClients
+from .models import Transaction
+
+
+# ------------------------------------------------------------
+# STRIPE CHECKOUT (ASYNC)
+# ------------------------------------------------------------
+class _AsyncHTTPClient(stripe.HTTPClient):
+    """
+    Async-only Stripe HTTP client over an httpx.AsyncClient we own, passed to
+    StripeClient as its http_client. stripe.HTTPXClient loads Stripe's CA
+    bundle into a new SSL context every time it is built (~40 ms of CPU) and
+    gives no way to supply one, so this shares one context instead.
+    """
+
+    name = "httpx"
+
+    def __init__(self, client):
+        super().__init__()
+        self._client = client
+
+    async def request_async(self, method, url, headers, post_data=None):
+        try:
+            response = await self._client.request(method, url, headers=headers, content=post_data)
+        except httpx.HTTPError as exc:
+            raise stripe.APIConnectionError(f"Error communicating with Stripe: {exc!r}", should_retry=True) from exc
+        return response.content, response.status_code, response.headers
+
+    async def request_stream_async(self, method, url, headers, post_data=None):
+        try:
+            request = self._client.build_request(method, url, headers=headers, content=post_data)
+            response = await self._client.send(request, stream=True)
+        except httpx.HTTPError as exc:
+            raise stripe.APIConnectionError(f"Error communicating with Stripe: {exc!r}", should_retry=True) from exc
+        return response.aiter_bytes(), response.status_code, response.headers
+
+    async def sleep_async(self, secs):
+        await asyncio.sleep(secs)
+
+    async def close_async(self):
+        await self._client.aclose()
+
+
+class _LoopClient:
+    """A StripeClient and the httpx.AsyncClient under it, for one event loop."""
+
+    def __init__(self, api_key, api_base, ssl_context, timeout):
+        self.http = httpx.AsyncClient(verify=ssl_context, timeout=timeout)
+        self.stripe = stripe.StripeClient(
+            api_key,
+            base_addresses={"api": api_base},
+            http_client=_AsyncHTTPClient(self.http),
+            max_network_retries=0,
+        )
+
+    async def aclose(self):
+        await self.http.aclose()
+
+
+class StripeCheckout:
+    """
+    Creates Stripe Checkout sessions without blocking the event loop.
+
+    httpx clients are bound to the event loop they first ran on, so one
+    StripeClient is kept per loop (see store.clients): under ASGI that is a
+    single long-lived client reusing its connections; under WSGI each
+    request's loop gets its own, closed when the view returns.
+    """
+
+    def __init__(self, api_key, api_base, timeout=10.0):
+        self.api_key = api_key
+        self.api_base = api_base
+        self.timeout = timeout
+        self._ssl_context = ssl.create_default_context(cafile=stripe.ca_bundle_path)
+        self._clients = LoopClients(
+            lambda: _LoopClient(self.api_key, self.api_base, self._ssl_context, self.timeout)
+        )
+
+    def _client(self):
+        return self._clients.get().stripe
+
+    async def create_session(self, idempotency_key=None, **params):
+        options = {"idempotency_key": idempotency_key} if idempotency_key else None
+        return await self._client().v1.checkout.sessions.create_async(params=params, options=options)
+
+    async def list_sessions(self, **params):
+        """Every Checkout session matching params, following Stripe's pagination."""
+        sessions = self._client().v1.checkout.sessions
+        params.setdefault("limit", 100)
+        page = await sessions.list_async(params=params)
+        found = list(page.data)
+        while page.has_more:
+            page = await sessions.list_async(params={**params, "starting_after": found[-1].id})
+            found.extend(page.data)
+        return found
+
+
+_checkout = None
+
+
+def get_checkout():
+    global _checkout
+    if _checkout is None:
+        _checkout = StripeCheckout(
+            settings.STRIPE_SECRET_KEY,
+            settings.STRIPE_API_BASE,
+            timeout=settings.STRIPE_TIMEOUT,
+        )
+    return _checkout
+
+
+@receiver(setting_changed)
+def _reset_checkout(setting, **kwargs):
+    global _checkout
+    if setting.startswith("STRIPE_"):
+        _checkout = None
+
+
+# ------------------------------------------------------------
+# CHECKOUT SESSIONS
+# ------------------------------------------------------------
+# A player clicking "buy" for the same package again gets the session they
+# already have instead of a new Stripe round trip and another pending row.
+# Reuse is decided by the lookup below alone. Each new attempt first records
+# its pending row and sends that row's pk as the idempotency key, so a retried
+# request can't create a second session, but a later purchase of the same
+# package never gets an earlier, already paid or expired, session back.
+
+# Stripe wants expires_at at least 30 minutes after it creates the session;
+# the margin covers the time until the request reaches it.
+EXPIRY_MARGIN = timedelta(minutes=1)
+
+
+def _reusable_transaction(player, package, now):
+    min_expiry = now + timedelta(seconds=settings.CHECKOUT_REUSE_MIN_REMAINING)
+    return (
+        Transaction.objects.filter(
+            player=player,
+            package=package,
+            status="pending",
+            amount_usd=package.price_usd,
+            coins_purchased=package.coins_amount,
+            expires_at__gt=min_expiry,
+        )
+        .exclude(checkout_url="")
+        .order_by("-expires_at")
+        .first()
+    )
+
+
+def _start_transaction(player, package, now):
+    expires_at = now + timedelta(seconds=settings.CHECKOUT_SESSION_TTL) + EXPIRY_MARGIN
+    return Transaction.objects.create(
+        player=player,
+        package=package,
+        amount_usd=package.price_usd,
+        coins_purchased=package.coins_amount,
+        status="pending",
+        expires_at=expires_at.replace(microsecond=0),
+    )
+
+
+def _record_session(txn, session):
+    txn.stripe_session_id = session.id
+    txn.checkout_url = session.url
+    txn.expires_at = datetime.fromtimestamp(session.expires_at, tz=dt_timezone.utc)
+    txn.save(update_fields=["stripe_session_id", "checkout_url", "expires_at"])
+    return txn
+
+
+async def open_checkout(player, package, success_url, cancel_url):
+    """
+    The pending Transaction, with its Checkout URL, that player should pay
+    to buy package: an open session reused from an earlier click, or a new
+    one.
+    """
+    now = timezone.now()
+    reusable = await sync_to_async(_reusable_transaction)(player, package, now)
+    if reusable is not None:
+        return reusable
+
+    txn = await sync_to_async(_start_transaction)(player, package, now)
+    try:
+        session = await get_checkout().create_session(
+            idempotency_key=f"checkout:{txn.pk}",
+            payment_method_types=['card'],
+            line_items=[{
+                'price_data': {
+                    'currency': 'usd',
+                    'product_data': {'name': f"{package.name} — {package.coins_amount} Coins"},
+                    'unit_amount': int(round(package.price_usd * 100)),
+                },
+                'quantity': 1,
+            }],
+            mode='payment',
+            expires_at=int(txn.expires_at.timestamp()),
+            success_url=success_url,
+            cancel_url=cancel_url,
+            customer_email=player.user.email or None,
+        )
+    except BaseException:
+        await sync_to_async(txn.delete)()
+        raise
+    return await sync_to_async(_record_session)(txn, session)
+
+
+def expire_stale_sessions(batch_size=1000, legacy_after=timedelta(hours=24)):
+    """
+    Mark pending transactions whose Checkout session can no longer be paid
+    as expired, in batches. Rows from before expires_at was recorded are
+    retired once they are older than legacy_after, Stripe's longest session
+    lifetime. Returns the number of rows expired.
+    """
+    now = timezone.now()
+    stale = Transaction.objects.filter(status="pending").filter(
+        Q(expires_at__lt=now) | Q(expires_at__isnull=True, created_at__lt=now - legacy_after)
+    )
+    expired = 0
+    while True:
+        batch = list(stale.values_list("pk", flat=True)[:batch_size])
+        if not batch:
+            return expired
+        expired += Transaction.objects.filter(pk__in=batch, status="pending").update(status="expired")
+
+
+def expire_session(session_id):
+    """Mark the transaction for an expired Checkout session expired, if it is still pending."""
+    return Transaction.objects.filter(stripe_session_id=session_id, status="pending").update(status="expired")
@@ -0,0 +1,60 @@
+import asyncio
+import weakref
+from functools import wraps
+
+from django.core.handlers.asgi import ASGIRequest
+
+
+# ------------------------------------------------------------
+# OUTBOUND ASYNC HTTP CLIENTS
+# ------------------------------------------------------------
+# An httpx.AsyncClient is bound to the event loop it first ran on, so
+# LoopClients keeps one per loop. Under ASGI there is a single loop and the
+# client lives as long as the process, reusing its connections. Under WSGI
+# every async view runs on a fresh loop that is thrown away with the request;
+# views that call out are wrapped in closes_loop_clients, which closes the
+# clients made for that loop before it goes, so none are left open.
+_registries = weakref.WeakSet()
+
+
+class LoopClients:
+    """
+    One client per running event loop, made by factory() on first use.
+    Clients must have an async aclose().
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self._clients = weakref.WeakKeyDictionary()
+        _registries.add(self)
+
+    def get(self):
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = self._clients[loop] = self.factory()
+        return client
+
+    async def aclose(self):
+        """Close the current loop's client, if it has one."""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+
+async def aclose_loop_clients():
+    """Close every client made for the current event loop."""
+    for registry in list(_registries):
+        await registry.aclose()
+
+
+def closes_loop_clients(view):
+    """Close the request loop's clients after an async view, unless served over ASGI."""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            return await view(request, *args, **kwargs)
+        finally:
+            if not isinstance(request, ASGIRequest):
+                await aclose_loop_clients()
+    return wrapper
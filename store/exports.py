@@ -0,0 +1,123 @@
+import csv
+from datetime import datetime, time, timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .models import Transaction, Purchase
+
+
+# ------------------------------------------------------------
+# FINANCE EXPORTS
+# ------------------------------------------------------------
+# Transaction and Purchase history as CSV or NDJSON, for the staff export
+# endpoint and `manage.py export_records`. Rows are read with values_list()
+# and .iterator(), so no model instances are built and only chunk_size rows
+# are held at a time however large the export is; output is produced as a
+# stream of text blocks of a few hundred rows each.
+EXPORTS = {
+    "transactions": {
+        "queryset": Transaction.objects.all(),
+        "columns": {
+            "id": "id",
+            "created_at": "created_at",
+            "steam_id": "player__steam_id",
+            "username": "player__user__username",
+            "package": "package__name",
+            "amount_usd": "amount_usd",
+            "coins": "coins_purchased",
+            "status": "status",
+            "stripe_session_id": "stripe_session_id",
+        },
+        "statuses": [value for value, _ in Transaction.STATUS_CHOICES],
+    },
+    "purchases": {
+        "queryset": Purchase.objects.all(),
+        "columns": {
+            "id": "id",
+            "created_at": "created_at",
+            "steam_id": "player__steam_id",
+            "username": "player__user__username",
+            "dino": "dino__name",
+            "coins": "used_coins",
+        },
+        "statuses": [],
+    },
+}
+
+FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+ROWS_PER_BLOCK = 500
+
+
+class ExportError(ValueError):
+    pass
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def export_rows(kind, since=None, until=None, status=None, chunk_size=2000):
+    """
+    (column names, row iterator) for an export. since and until are dates,
+    both inclusive, in the current time zone.
+    """
+    if kind not in EXPORTS:
+        raise ExportError(f"Unknown export {kind!r}; use one of {', '.join(EXPORTS)}.")
+    spec = EXPORTS[kind]
+    rows = spec["queryset"]
+    if status:
+        if status not in spec["statuses"]:
+            raise ExportError(f"{kind} cannot be filtered by status {status!r}.")
+        rows = rows.filter(status=status)
+    # Compare against datetimes rather than created_at__date so the
+    # created_at indexes (txn_created_idx, purchase_created_idx) can be used.
+    if since:
+        rows = rows.filter(created_at__gte=_day_start(since))
+    if until:
+        rows = rows.filter(created_at__lt=_day_start(until + timedelta(days=1)))
+    columns = spec["columns"]
+    rows = rows.order_by("pk").values_list(*columns.values()).iterator(chunk_size=chunk_size)
+    return list(columns), rows
+
+
+class _Lines:
+    """File-like object that hands csv.writer's output straight back."""
+
+    def write(self, value):
+        return value
+
+
+def _blocks(lines):
+    block = []
+    for line in lines:
+        block.append(line)
+        if len(block) == ROWS_PER_BLOCK:
+            yield "".join(block)
+            block = []
+    if block:
+        yield "".join(block)
+
+
+def render_csv(columns, rows):
+    writer = csv.writer(_Lines())
+    yield writer.writerow(columns)
+    yield from _blocks(
+        writer.writerow([value.isoformat() if isinstance(value, datetime) else value for value in row])
+        for row in rows
+    )
+
+
+def render_ndjson(columns, rows):
+    encoder = DjangoJSONEncoder(separators=(",", ":"))
+    yield from _blocks(encoder.encode(dict(zip(columns, row))) + "\n" for row in rows)
+
+
+def render(fmt, columns, rows):
+    if fmt not in FORMATS:
+        raise ExportError(f"Unknown format {fmt!r}; use one of {', '.join(FORMATS)}.")
+    return render_csv(columns, rows) if fmt == "csv" else render_ndjson(columns, rows)
@@ -0,0 +1,150 @@
+import io
+import logging
+
+from PIL import Image, ImageOps
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+
+
+logger = logging.getLogger(__name__)
+
+
+# ------------------------------------------------------------
+# IMAGE DERIVATIVES
+# ------------------------------------------------------------
+# Uploaded images are served at whatever size they were uploaded. For each
+# original we also store pre-sized WebP and JPEG copies next to it
+# (dinos/rex.png -> dinos/rex.png__card.webp, dinos/rex.png__card.jpg) and
+# templates pick those via the {% picture %} tag.
+#
+# Derivatives are made once, when an image is uploaded, and the names written
+# are recorded on the model in a JSONField named after the image field
+# (Dino.image -> Dino.image_derivatives):
+#   {"source": "dinos/rex.png", "card": {"webp": "...", "jpg": "..."}}
+# Rendering reads that record and never asks the storage what exists. The
+# files of a replaced image, or of a deleted object, are removed once the
+# change commits.
+SIZES = {
+    # name: (width, height, crop)
+    "avatar": (80, 80, True),     # navbar avatars, shown at 40px (2x for HiDPI)
+    "card": (480, 480, False),    # catalog cards and slot images
+}
+
+FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+BACKGROUND = (20, 30, 45)
+
+MODEL_SIZES = {
+    "dino": ["card"],
+    "avatar": ["avatar"],
+}
+
+
+def derivative_name(name, size, ext):
+    # Keep the source extension: dinos/rex.png and dinos/rex.jpg are
+    # different images and must not share derivatives.
+    return f"{name}__{size}.{ext}"
+
+
+def record_field(field_name):
+    return f"{field_name}_derivatives"
+
+
+def _resize(image, size):
+    width, height, crop = SIZES[size]
+    if crop:
+        return ImageOps.fit(image, (width, height), Image.Resampling.LANCZOS)
+    resized = image.copy()
+    resized.thumbnail((width, height), Image.Resampling.LANCZOS)
+    return resized
+
+
+def generate_derivatives(field_file, sizes):
+    """
+    Write every size/format derivative of field_file and return the record
+    of what was written. Unreadable images are logged and recorded with no
+    sizes, so a bad upload never breaks the save that triggered it and the
+    original is shown instead.
+    """
+    record = {"source": field_file.name}
+    storage = field_file.storage
+    try:
+        with storage.open(field_file.name, "rb") as source:
+            original = Image.open(source)
+            original.load()
+    except (OSError, ValueError):
+        logger.warning("Cannot generate derivatives for %s", field_file.name, exc_info=True)
+        return record
+
+    original = ImageOps.exif_transpose(original)
+    if original.mode in ("RGBA", "LA", "P"):
+        # JPEG has no alpha; flatten onto the dark card background instead of black.
+        rgba = original.convert("RGBA")
+        original = Image.new("RGB", rgba.size, BACKGROUND)
+        original.paste(rgba, mask=rgba.getchannel("A"))
+    else:
+        original = original.convert("RGB")
+    for size in sizes:
+        resized = _resize(original, size)
+        record[size] = {}
+        for ext, (fmt, params) in FORMATS.items():
+            buffer = io.BytesIO()
+            resized.save(buffer, fmt, **params)
+            name = derivative_name(field_file.name, size, ext)
+            record[size][ext] = storage.save(name, ContentFile(buffer.getvalue()))
+    return record
+
+
+def _recorded_names(record):
+    return [name for size, names in record.items() if size != "source" for name in names.values()]
+
+
+def _delete_on_commit(storage, names):
+    def delete():
+        for name in names:
+            storage.delete(name)
+
+    if names:
+        transaction.on_commit(delete)
+
+
+def refresh_derivatives(instance, field_name, sizes, force=False):
+    """
+    Bring instance's recorded derivatives in line with its image field:
+    generate them for a new upload (or always, with force) and drop those of
+    the image it replaced. Without a new upload this is a dict comparison,
+    with no storage access. The record is saved with a queryset update, so
+    no signals fire. Returns the names written.
+    """
+    field_file = getattr(instance, field_name)
+    attr = record_field(field_name)
+    old = getattr(instance, attr) or {}
+    current = field_file.name if field_file else None
+    if old.get("source") == current and not force:
+        return []
+
+    new = generate_derivatives(field_file, sizes) if field_file else {}
+    type(instance)._default_manager.filter(pk=instance.pk).update(**{attr: new})
+    setattr(instance, attr, new)
+    _delete_on_commit(field_file.storage, _recorded_names(old))
+    return _recorded_names(new)
+
+
+def remove_derivatives(instance, field_name):
+    """Delete the recorded derivatives of a deleted object's image."""
+    record = getattr(instance, record_field(field_name)) or {}
+    _delete_on_commit(getattr(instance, field_name).storage, _recorded_names(record))
+
+
+def derivative_urls(field_file, size):
+    """Return {"webp": url, "jpg": url} for the recorded derivatives of field_file."""
+    if not field_file:
+        return {}
+    record = getattr(field_file.instance, record_field(field_file.field.name), None) or {}
+    if record.get("source") != field_file.name:
+        return {}  # not generated yet, or recorded for a previous upload
+    return {ext: field_file.storage.url(name) for ext, name in record.get(size, {}).items()}
@@ -0,0 +1,42 @@
+from django.db import IntegrityError, transaction
+
+from .models import OwnedDino, Purchase
+from . import ledger
+
+
+# ------------------------------------------------------------
+# DINO INVENTORY
+# ------------------------------------------------------------
+# OwnedDino has one row per (player, dino), enforced by a unique index that
+# also serves every lookup here: an ownership check is a single indexed
+# EXISTS, and a player's owned set for the whole catalog is one index range
+# scan returning dino ids only.
+class AlreadyOwned(Exception):
+    pass
+
+
+def owns(player, dino):
+    return OwnedDino.objects.filter(player=player, dino=dino).exists()
+
+
+def owned_dino_ids(player):
+    """The ids of every dino player owns, for flagging a whole catalog at once."""
+    return set(OwnedDino.objects.filter(player=player).values_list("dino_id", flat=True))
+
+
+def buy(player, dino):
+    """
+    Charge player dino.coin_cost and add dino to their inventory, atomically.
+    Raises AlreadyOwned or ledger.InsufficientCoins and changes nothing.
+    """
+    if owns(player, dino):
+        raise AlreadyOwned(f"Player {player.pk} already owns dino {dino.pk}.")
+    try:
+        with transaction.atomic():
+            purchase = Purchase.objects.create(player=player, dino=dino, used_coins=dino.coin_cost)
+            # The unique index settles two concurrent buys of the same dino.
+            OwnedDino.objects.create(player=player, dino=dino, purchase=purchase)
+            ledger.debit(player, dino.coin_cost, "dino_purchase", reference=f"purchase:{purchase.pk}")
+    except IntegrityError:
+        raise AlreadyOwned(f"Player {player.pk} already owns dino {dino.pk}.")
+    return purchase
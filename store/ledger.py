@@ -0,0 +1,120 @@
+from django.db import transaction
+from django.db.models import Case, F, When
+
+from .models import PlayerProfile, CoinLedgerEntry, Transaction
+from .players import invalidate_player_on_commit
+from .summaries import transaction_completed
+
+
+# ------------------------------------------------------------
+# COIN LEDGER
+# ------------------------------------------------------------
+# Every balance change is a single conditional UPDATE ... SET coins = coins +/- n
+# plus an append-only CoinLedgerEntry, both in one transaction. The balance is
+# never read into Python first, so concurrent requests cannot overwrite each
+# other and the ledger always sums to the current balance. The player's cached
+# profile row is dropped once the change commits.
+class InsufficientCoins(Exception):
+    pass
+
+
+def _player_id(player):
+    return player.pk if isinstance(player, PlayerProfile) else player
+
+
+def credit(player, amount, reason, reference=""):
+    if amount <= 0:
+        raise ValueError("Credit amount must be positive.")
+
+    player_id = _player_id(player)
+    with transaction.atomic():
+        updated = PlayerProfile.objects.filter(pk=player_id).update(coins=F("coins") + amount)
+        if not updated:
+            raise PlayerProfile.DoesNotExist(f"Player {player_id} does not exist.")
+        invalidate_player_on_commit(player_id)
+        return CoinLedgerEntry.objects.create(
+            player_id=player_id, delta=amount, reason=reason, reference=reference
+        )
+
+
+def debit(player, amount, reason, reference=""):
+    if amount <= 0:
+        raise ValueError("Debit amount must be positive.")
+
+    player_id = _player_id(player)
+    with transaction.atomic():
+        updated = PlayerProfile.objects.filter(pk=player_id, coins__gte=amount).update(
+            coins=F("coins") - amount
+        )
+        if not updated:
+            raise InsufficientCoins(f"Player {player_id} cannot afford {amount} coins.")
+        invalidate_player_on_commit(player_id)
+        return CoinLedgerEntry.objects.create(
+            player_id=player_id, delta=-amount, reason=reason, reference=reference
+        )
+
+
+def complete_checkout_session(session_id):
+    """
+    Mark the pending Transaction for a Stripe checkout session completed and
+    credit its coins.
+
+    The status flip is conditional on the row not being completed yet, so a
+    transaction is credited at most once no matter how often this is called.
+    It is also the first statement in the transaction, which lets SQLite wait
+    for the write lock instead of failing on a read-to-write upgrade.
+    Sends summaries.transaction_completed inside the same transaction.
+    Returns True if this call completed it.
+    """
+    with transaction.atomic():
+        # An 'expired' row can still be paid if the sweeper ran just before
+        # Stripe's own expiry; the payment wins.
+        claimed = Transaction.objects.filter(
+            stripe_session_id=session_id, status__in=["pending", "expired"]
+        ).update(status="completed")
+        if not claimed:
+            return False
+        txn_id, player_id, amount_usd, coins, created_at = Transaction.objects.filter(
+            stripe_session_id=session_id
+        ).values_list("pk", "player_id", "amount_usd", "coins_purchased", "created_at").get()
+        credit(player_id, coins, "coin_purchase", reference=f"txn:{txn_id}")
+        transaction_completed.send(
+            sender=Transaction, player_id=player_id, amount_usd=amount_usd, coins=coins, created_at=created_at,
+        )
+    return True
+
+
+def complete_checkout_sessions(session_ids):
+    """
+    Bulk complete_checkout_session for a batch of paid Checkout sessions:
+    one UPDATE for the transactions, one for the balances and one INSERT for
+    the ledger entries. Rows that are already completed are skipped, so each
+    transaction is still credited at most once. Returns the number completed.
+    """
+    with transaction.atomic():
+        rows = list(
+            Transaction.objects.select_for_update()
+            .filter(stripe_session_id__in=session_ids, status__in=["pending", "expired"])
+            .values_list("pk", "player_id", "amount_usd", "coins_purchased", "created_at")
+        )
+        if not rows:
+            return 0
+        Transaction.objects.filter(pk__in=[row[0] for row in rows]).update(status="completed")
+
+        coins_by_player = {}
+        for _, player_id, _, coins, _ in rows:
+            coins_by_player[player_id] = coins_by_player.get(player_id, 0) + coins
+        PlayerProfile.objects.filter(pk__in=coins_by_player).update(
+            coins=F("coins") + Case(*(When(pk=pk, then=coins) for pk, coins in coins_by_player.items()))
+        )
+        CoinLedgerEntry.objects.bulk_create([
+            CoinLedgerEntry(player_id=player_id, delta=coins, reason="coin_purchase", reference=f"txn:{txn_id}")
+            for txn_id, player_id, _, coins, _ in rows
+        ])
+        for player_id in coins_by_player:
+            invalidate_player_on_commit(player_id)
+        for _, player_id, amount_usd, coins, created_at in rows:
+            transaction_completed.send(
+                sender=Transaction, player_id=player_id, amount_usd=amount_usd, coins=coins, created_at=created_at,
+            )
+    return len(rows)
@@ -0,0 +1,136 @@
+import argparse
+import json
+import subprocess
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from store.bench import (
+    asgi, baseline_path, db_writes, endpoints, find_regressions, first_login, inventory, login_burst, sessions,
+    slot_ops, slot_stats, steam_verify, stripe_webhook, templates,
+)
+
+
+SUITES = {
+    suite.name: suite
+    for suite in [
+        endpoints.EndpointSuite,
+        asgi.AsgiSuite,
+        db_writes.DbWritesSuite,
+        first_login.FirstLoginSuite,
+        inventory.InventorySuite,
+        login_burst.LoginBurstSuite,
+        sessions.SessionsSuite,
+        slot_ops.SlotOpsSuite,
+        slot_stats.SlotStatsSuite,
+        steam_verify.SteamVerifySuite,
+        stripe_webhook.StripeWebhookSuite,
+        templates.TemplatesSuite,
+    ]
+}
+# Options that are not the suite's own, left out of the saved metadata.
+NOT_SUITE_OPTIONS = {
+    "suite", "save", "compare", "tolerance",
+    "verbosity", "settings", "pythonpath", "traceback", "no_color", "force_color", "skip_checks",
+}
+
+
+def tolerance_override(value):
+    metric, _, relative = value.partition("=")
+    try:
+        return metric, float(relative)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected METRIC=FRACTION, got {value!r}") from None
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a benchmark suite in a scratch database and print its results. Use --save to write a "
+        "JSON baseline and --compare to fail on regressions against one; without a path both use "
+        "the suite's committed baseline in store/bench/baselines/."
+    )
+
+    def add_arguments(self, parser):
+        subparsers = parser.add_subparsers(dest="suite", required=True, metavar="suite")
+        for name, suite in SUITES.items():
+            subparser = subparsers.add_parser(name, help=suite.help, description=suite.help)
+            suite(self.stdout).add_arguments(subparser)
+            subparser.add_argument(
+                "--save", nargs="?", const="", metavar="PATH", help="Write results to this JSON file.",
+            )
+            subparser.add_argument(
+                "--compare", nargs="?", const="", metavar="PATH", help="Compare results against this JSON baseline.",
+            )
+            subparser.add_argument(
+                "--tolerance", action="append", type=tolerance_override, default=[], metavar="METRIC=FRACTION",
+                help="Override how far a compared metric may regress, e.g. p95_ms=0.5 (repeatable). Compared: "
+                + ", ".join(f"{metric}={t.relative:g}" for metric, t in suite.tolerances.items()),
+            )
+
+    def handle(self, *args, **options):
+        suite = SUITES[options["suite"]](self.stdout)
+        tolerances = dict(suite.tolerances)
+        for metric, relative in options["tolerance"]:
+            if metric not in tolerances:
+                raise CommandError(f"--tolerance: {suite.name} compares {', '.join(tolerances)}, not {metric}.")
+            tolerances[metric] = tolerances[metric]._replace(relative=relative)
+
+        results = suite.run(options)
+        description = suite.describe(options)
+        if description:
+            self.stdout.write(description)
+        self.print_results(results)
+        report = {"meta": self.metadata(suite, options), "results": results}
+
+        if options["save"] is not None:
+            path = options["save"] or baseline_path(suite.name)
+            with open(path, "w") as handle:
+                json.dump(report, handle, indent=2, sort_keys=True)
+                handle.write("\n")
+            self.stdout.write(f"Saved results to {path}")
+
+        if options["compare"] is not None:
+            with open(options["compare"] or baseline_path(suite.name)) as handle:
+                baseline = json.load(handle)
+            self.compare(baseline, report, tolerances)
+
+    def metadata(self, suite, options):
+        try:
+            commit = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=settings.BASE_DIR,
+            ).stdout.strip()
+        except OSError:
+            commit = ""
+        return {
+            "commit": commit,
+            "created": timezone.now().isoformat(),
+            "database": connection.vendor,
+            "suite": suite.name,
+            "options": {key: value for key, value in sorted(options.items()) if key not in NOT_SUITE_OPTIONS},
+        }
+
+    def print_results(self, results):
+        width = max(len(row) for row in results) + 2
+        metrics = list(dict.fromkeys(metric for values in results.values() for metric in values))
+        widths = {metric: max(len(metric) + 2, 10) for metric in metrics}
+        self.stdout.write(f"{'':<{width}}" + "".join(f"{metric:>{widths[metric]}}" for metric in metrics))
+        for row, values in results.items():
+            cells = []
+            for metric in metrics:
+                value = values.get(metric, "")
+                cells.append(f"{value:>{widths[metric]}.2f}" if isinstance(value, float) else f"{value:>{widths[metric]}}")
+            self.stdout.write(f"{row:<{width}}" + "".join(cells))
+
+    def compare(self, baseline, report, tolerances):
+        meta = baseline["meta"]
+        self.stdout.write(f"Compared against baseline from commit {meta.get('commit') or '?'}")
+        if meta.get("options") != report["meta"]["options"] or meta.get("database") != report["meta"]["database"]:
+            self.stderr.write("  The baseline was taken with other options or another database; expect noise.")
+        regressions = find_regressions(tolerances, baseline["results"], report["results"])
+        if regressions:
+            for line in regressions:
+                self.stderr.write(f"  REGRESSION {line}")
+            raise CommandError(f"{len(regressions)} regressions against baseline.")
+        self.stdout.write(self.style.SUCCESS("No regressions."))
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from store.steam import enrich_profiles, SteamAPIError
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill in players' Steam names and avatars from the Steam Web API (GetPlayerSummaries, up to "
+        "100 SteamIDs per call). Profiles fetched within STEAM_PROFILE_CACHE_TTL are served from the "
+        "cache, so rerunning it only asks Steam about players it has not seen recently."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--missing", action="store_true", help="Only players without a Steam name yet.")
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Players read per query (default 1000).")
+        parser.add_argument("--loop", action="store_true", help="Keep running, every --interval seconds.")
+        parser.add_argument("--interval", type=float, default=3600.0, help="Seconds between runs with --loop.")
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                checked, updated = enrich_profiles(only_missing=options["missing"], chunk_size=options["chunk_size"])
+            except SteamAPIError as exc:
+                if not options["loop"]:
+                    raise CommandError(exc)
+                self.stderr.write(str(exc))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"Checked {checked} players, updated {updated}."))
+            if not options["loop"]:
+                break
+            connections.close_all()
+            time.sleep(options["interval"])
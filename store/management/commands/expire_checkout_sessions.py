@@ -0,0 +1,34 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from store.checkout import expire_stale_sessions
+
+
+class Command(BaseCommand):
+    help = (
+        "Mark pending transactions whose Stripe Checkout session has expired as 'expired', so the "
+        "pending set only holds sessions a player can still pay."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows per UPDATE (default 1000).")
+        parser.add_argument(
+            "--legacy-after", type=float, default=24.0,
+            help="Hours after which pending rows without a recorded expiry are expired (default 24).",
+        )
+        parser.add_argument("--loop", action="store_true", help="Keep running, sweeping every --interval seconds.")
+        parser.add_argument("--interval", type=float, default=300.0, help="Seconds between sweeps with --loop.")
+
+    def handle(self, *args, **options):
+        while True:
+            expired = expire_stale_sessions(
+                batch_size=options["batch_size"], legacy_after=timedelta(hours=options["legacy_after"]),
+            )
+            self.stdout.write(self.style.SUCCESS(f"Expired {expired} stale checkout transactions."))
+            if not options["loop"]:
+                break
+            connections.close_all()
+            time.sleep(options["interval"])
@@ -0,0 +1,51 @@
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.sessions.backends.cache import SessionStore as CacheSessionStore
+from django.contrib.sessions.backends.db import SessionStore as DBSessionStore
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        "Remove expired sessions for the configured SESSION_ENGINE. Database sessions are deleted in "
+        "small batches so the write lock is never held for long; cache sessions expire on their own."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows per DELETE (default 1000).")
+        parser.add_argument("--pause", type=float, default=0.05, help="Seconds to wait between batches.")
+        parser.add_argument("--loop", action="store_true", help="Keep running, sweeping every --interval seconds.")
+        parser.add_argument("--interval", type=float, default=3600.0, help="Seconds between sweeps with --loop.")
+
+    def handle(self, *args, **options):
+        store = import_module(settings.SESSION_ENGINE).SessionStore
+        while True:
+            self.sweep(store, options)
+            if not options["loop"]:
+                break
+            connections.close_all()
+            time.sleep(options["interval"])
+
+    def sweep(self, store, options):
+        if issubclass(store, DBSessionStore):
+            removed = self.delete_in_batches(store.get_model_class(), options)
+            self.stdout.write(self.style.SUCCESS(f"Removed {removed} expired sessions."))
+        elif issubclass(store, CacheSessionStore):
+            self.stdout.write(f"{settings.SESSION_ENGINE} expires sessions itself; nothing to do.")
+        else:
+            store.clear_expired()
+            self.stdout.write(self.style.SUCCESS(f"Cleared expired sessions for {settings.SESSION_ENGINE}."))
+
+    def delete_in_batches(self, model, options):
+        expired = model.objects.filter(expire_date__lt=timezone.now())
+        removed = 0
+        while True:
+            keys = list(expired.values_list("pk", flat=True)[: options["batch_size"]])
+            if not keys:
+                return removed
+            removed += model.objects.filter(pk__in=keys).delete()[0]
+            time.sleep(options["pause"])
@@ -0,0 +1,39 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from store.exports import EXPORTS, FORMATS, ExportError, export_rows, render
+
+
+class Command(BaseCommand):
+    help = (
+        "Write transaction or purchase history as CSV or NDJSON for finance. Rows are streamed from "
+        "the database in chunks, so memory use stays flat however many rows are exported."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=list(EXPORTS))
+        parser.add_argument("--format", choices=list(FORMATS), default="csv")
+        parser.add_argument("--since", type=date.fromisoformat, help="First day to include (YYYY-MM-DD).")
+        parser.add_argument("--until", type=date.fromisoformat, help="Last day to include (YYYY-MM-DD).")
+        parser.add_argument("--status", help="Only transactions with this status.")
+        parser.add_argument("--chunk-size", type=int, default=2000, help="Rows fetched per round trip.")
+        parser.add_argument("--output", "-o", help="File to write (default stdout).")
+
+    def handle(self, *args, **options):
+        try:
+            columns, rows = export_rows(
+                options["kind"], since=options["since"], until=options["until"],
+                status=options["status"], chunk_size=options["chunk_size"],
+            )
+            blocks = render(options["format"], columns, rows)
+        except ExportError as exc:
+            raise CommandError(exc)
+
+        if options["output"]:
+            with open(options["output"], "w", newline="", encoding="utf-8") as out:
+                for block in blocks:
+                    out.write(block)
+        else:
+            for block in blocks:
+                self.stdout.write(block, ending="")
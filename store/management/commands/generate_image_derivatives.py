@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from store.catalog import bump_catalog_version
+from store.images import record_field, refresh_derivatives, MODEL_SIZES
+from store.models import Dino, PlayerProfile
+
+
+class Command(BaseCommand):
+    help = (
+        "Create WebP/JPEG derivatives for dino images and player avatars that have none recorded, "
+        "e.g. images uploaded before derivatives were generated."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Regenerate derivatives that already exist.")
+
+    def handle(self, *args, **options):
+        sources = [
+            (Dino.objects.exclude(image="").exclude(image=None), "image", MODEL_SIZES["dino"]),
+            (
+                PlayerProfile.objects.exclude(avatar_image="").exclude(avatar_image=None),
+                "avatar_image",
+                MODEL_SIZES["avatar"],
+            ),
+        ]
+
+        written = 0
+        for queryset, field, sizes in sources:
+            queryset = queryset.only("id", field, record_field(field))
+            for obj in queryset.iterator(chunk_size=500):
+                names = refresh_derivatives(obj, field, sizes, force=options["force"])
+                for name in names:
+                    self.stdout.write(f"  {name}")
+                written += len(names)
+
+        if written:
+            bump_catalog_version()  # cached catalog fragments still point at the originals
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} derivative files."))
@@ -0,0 +1,89 @@
+import random
+import threading
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, OperationalError
+from django.db.models import Sum
+
+from store import ledger
+from store.bench import isolated_database, Stopwatch
+from store.models import PlayerProfile, CoinLedgerEntry
+
+
+class Command(BaseCommand):
+    help = "Hammer the coin ledger from many threads and check that no balance drifts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--players", type=int, default=5)
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--operations", type=int, default=200, help="Operations per thread.")
+        parser.add_argument("--starting-coins", type=int, default=50)
+
+    def handle(self, *args, **options):
+        with isolated_database():
+            self.run(options)
+
+    def run(self, options):
+        players = []
+        for i in range(options["players"]):
+            user = User.objects.create(username=f"stress_{i}")
+            players.append(PlayerProfile.objects.create(
+                user=user, steam_id=f"stress_{i}", coins=options["starting_coins"]
+            ))
+        player_ids = [p.pk for p in players]
+
+        counters = {"debits": 0, "credits": 0, "rejected": 0, "locked": 0}
+        lock = threading.Lock()
+
+        def worker(seed):
+            rng = random.Random(seed)
+            local = dict.fromkeys(counters, 0)
+            try:
+                for _ in range(options["operations"]):
+                    player_id = rng.choice(player_ids)
+                    try:
+                        if rng.random() < 0.75:
+                            ledger.debit(player_id, rng.randint(1, 2), "dino_purchase")
+                            local["debits"] += 1
+                        else:
+                            ledger.credit(player_id, rng.randint(1, 5), "coin_purchase")
+                            local["credits"] += 1
+                    except ledger.InsufficientCoins:
+                        local["rejected"] += 1
+                    except OperationalError:
+                        # SQLite gave up waiting for the write lock; the
+                        # transaction rolled back so balances stay consistent.
+                        local["locked"] += 1
+            finally:
+                connections.close_all()
+                with lock:
+                    for key, value in local.items():
+                        counters[key] += value
+
+        threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(options["threads"])]
+        with Stopwatch() as timer:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        drifted = []
+        for player in PlayerProfile.objects.filter(pk__in=player_ids):
+            ledger_total = CoinLedgerEntry.objects.filter(player=player).aggregate(total=Sum("delta"))["total"] or 0
+            expected = options["starting_coins"] + ledger_total
+            if player.coins != expected:
+                drifted.append((player.steam_id, player.coins, expected))
+
+        applied = counters["debits"] + counters["credits"]
+        self.stdout.write(
+            f"{applied} operations applied in {timer.elapsed:.2f}s "
+            f"({applied / timer.elapsed:.0f} ops/s), "
+            f"{counters['rejected']} rejected for insufficient coins, "
+            f"{counters['locked']} lock timeouts"
+        )
+        if drifted:
+            for steam_id, actual, expected in drifted:
+                self.stderr.write(f"{steam_id}: balance {actual}, ledger says {expected}")
+            raise CommandError(f"{len(drifted)} balances drifted from the ledger.")
+        self.stdout.write(self.style.SUCCESS("All balances match the ledger."))
@@ -0,0 +1,66 @@
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections, OperationalError
+
+from store.webhooks import claim_batch, process_event, release_stale_claims
+
+
+class Command(BaseCommand):
+    help = "Drain the Stripe webhook inbox with a pool of worker threads."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--max-attempts", type=int, default=5)
+        parser.add_argument(
+            "--loop", action="store_true",
+            help="Keep polling for new events instead of exiting when the inbox is empty.",
+        )
+        parser.add_argument("--idle-sleep", type=float, default=1.0, help="Seconds to wait when the inbox is empty.")
+        parser.add_argument(
+            "--reclaim-after", type=int, default=300,
+            help="Requeue events left in 'processing' for this many seconds.",
+        )
+
+    def handle(self, *args, **options):
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            results = list(pool.map(lambda _: self.work(options), range(options["workers"])))
+
+        processed = sum(ok for ok, _ in results)
+        failed = sum(bad for _, bad in results)
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} events, {failed} failed."))
+
+    def work(self, options):
+        worker_id = uuid.uuid4().hex
+        ok = failed = 0
+        try:
+            while True:
+                try:
+                    # Every pass, so a --loop run also picks up the claims of
+                    # a worker that crashed after it started.
+                    requeued = release_stale_claims(options["reclaim_after"])
+                    batch = claim_batch(options["batch_size"], worker_id)
+                except OperationalError:
+                    # Another worker holds the write lock (SQLite); try again shortly.
+                    time.sleep(0.05)
+                    continue
+                if requeued:
+                    self.stdout.write(f"Requeued {requeued} stale events.")
+
+                if not batch:
+                    if not options["loop"]:
+                        break
+                    time.sleep(options["idle_sleep"])
+                    continue
+
+                for event in batch:
+                    if process_event(event, options["max_attempts"]):
+                        ok += 1
+                    else:
+                        failed += 1
+        finally:
+            connections.close_all()
+        return ok, failed
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from store.bench import Stopwatch
+from store.summaries import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute every PlayerSummary from Transaction and Purchase in bulk. With --check, only "
+        "report summaries that drifted from the recomputed values and exit non-zero if any did."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Players per batch (default 500).")
+        parser.add_argument("--player", type=int, action="append", help="Only this PlayerProfile id (repeatable).")
+        parser.add_argument("--check", action="store_true", help="Report drift without writing.")
+
+    def handle(self, *args, **options):
+        with Stopwatch() as timer:
+            checked, drifted = rebuild(
+                batch_size=options["batch_size"], player_ids=options["player"], dry_run=options["check"],
+            )
+
+        self.stdout.write(f"Checked {checked} players in {timer.elapsed:.2f}s; {len(drifted)} summaries drifted.")
+        if drifted:
+            shown = ", ".join(str(pk) for pk in drifted[:20])
+            self.stdout.write(f"  players: {shown}{' ...' if len(drifted) > 20 else ''}")
+
+        if options["check"]:
+            if drifted:
+                raise CommandError(f"{len(drifted)} player summaries are out of date.")
+            self.stdout.write(self.style.SUCCESS("All summaries are consistent."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {checked} summaries."))
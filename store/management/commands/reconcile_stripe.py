@@ -0,0 +1,74 @@
+import json
+import os
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand
+
+from store.bench import Stopwatch
+from store.clients import aclose_loop_clients
+from store.reconcile import reconcile_transactions
+
+
+class Command(BaseCommand):
+    help = (
+        "Complete pending transactions that Stripe reports as paid but whose checkout webhook never "
+        "arrived. Rows are checked in chunks with one paginated Stripe list call each, several chunks "
+        "at a time. With --checkpoint, progress is saved after each chunk and an interrupted run "
+        "resumes where it stopped; the file is removed once a run finishes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=500, help="Transactions per chunk (default 500).")
+        parser.add_argument("--workers", type=int, default=4, help="Chunks reconciled at once (default 4).")
+        parser.add_argument(
+            "--min-age", type=float, default=15.0,
+            help="Minutes to leave a transaction to its webhook before reconciling it (default 15).",
+        )
+        parser.add_argument("--days", type=float, default=7.0, help="Only transactions from the last N days.")
+        parser.add_argument("--checkpoint", help="JSON file to save progress to and resume from.")
+
+    def handle(self, *args, **options):
+        checkpoint = options["checkpoint"]
+        after_pk = self.load_checkpoint(checkpoint)
+        if after_pk:
+            self.stdout.write(f"Resuming after transaction {after_pk}.")
+
+        def on_progress(last_pk, checked, completed):
+            if checkpoint:
+                self.save_checkpoint(checkpoint, last_pk)
+            if options["verbosity"] > 1:
+                self.stdout.write(f"  up to transaction {last_pk}: {checked} checked, {completed} completed")
+
+        async def reconcile(**kwargs):
+            try:
+                return await reconcile_transactions(**kwargs)
+            finally:
+                await aclose_loop_clients()  # the loop goes away with async_to_sync
+
+        with Stopwatch() as timer:
+            checked, completed = async_to_sync(reconcile)(
+                after_pk=after_pk,
+                chunk_size=options["chunk_size"],
+                workers=options["workers"],
+                min_age=timedelta(minutes=options["min_age"]),
+                max_age=timedelta(days=options["days"]),
+                on_progress=on_progress,
+            )
+        if checkpoint and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {checked} unfinished transactions, completed {completed} in {timer.elapsed:.1f}s."
+        ))
+
+    def load_checkpoint(self, path):
+        if not path or not os.path.exists(path):
+            return 0
+        with open(path) as f:
+            return json.load(f)["after_pk"]
+
+    def save_checkpoint(self, path, after_pk):
+        # Write then rename, so a crash never leaves a half-written file.
+        with open(f"{path}.tmp", "w") as f:
+            json.dump({"after_pk": after_pk}, f)
+        os.replace(f"{path}.tmp", path)
@@ -0,0 +1,72 @@
+import threading
+from bisect import bisect_left
+
+
+# ------------------------------------------------------------
+# REQUEST METRICS
+# ------------------------------------------------------------
+# Per-process histograms keyed by URL name, filled by PerformanceMiddleware
+# and rendered in Prometheus text format by the metrics view. Each worker
+# process keeps its own numbers; Prometheus sums them across scrape targets.
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+METRICS = [
+    # (name, help, buckets, observation key)
+    ("isle_request_duration_seconds", "Wall time per request.", DURATION_BUCKETS, "duration"),
+    ("isle_request_db_seconds", "Time spent in database queries per request.", DURATION_BUCKETS, "db_time"),
+    ("isle_request_queries", "Database queries per request.", QUERY_BUCKETS, "queries"),
+]
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def observe(self, route, **values):
+        with self._lock:
+            histograms = self._routes.get(route)
+            if histograms is None:
+                histograms = {key: Histogram(buckets) for _, _, buckets, key in METRICS}
+                self._routes[route] = histograms
+            for key, value in values.items():
+                histograms[key].observe(value)
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+    def render(self):
+        with self._lock:
+            lines = []
+            for name, help_text, buckets, key in METRICS:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for route in sorted(self._routes):
+                    histogram = self._routes[route][key]
+                    label = route.replace("\\", "\\\\").replace('"', '\\"')
+                    cumulative = 0
+                    for bound, count in zip(buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{view="{label}",le="{bound}"}} {cumulative}')
+                    lines.append(f'{name}_bucket{{view="{label}",le="+Inf"}} {histogram.count}')
+                    lines.append(f'{name}_sum{{view="{label}"}} {histogram.sum:.6f}')
+                    lines.append(f'{name}_count{{view="{label}"}} {histogram.count}')
+            return "\n".join(lines) + "\n"
+
+
+registry = Registry()
@@ -0,0 +1,163 @@
+import logging
+import os
+import time
+import traceback
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from .metrics import registry
+
+
+logger = logging.getLogger("store.performance")
+
+
+class QueryRecorder:
+    """Execute wrapper that counts and times every query."""
+
+    def __init__(self, slow_threshold):
+        self.slow_threshold = slow_threshold
+        self.count = 0
+        self.time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.time += elapsed
+            if elapsed >= self.slow_threshold:
+                logger.warning(
+                    "Slow query (%.1f ms) at %s: %s", elapsed * 1000, call_site(), sql,
+                )
+
+
+# The recorder for the current request travels in a context variable, which
+# asgiref copies into the threads that run async ORM calls, so one wrapper
+# installed on every connection attributes each query to the right request
+# whether the view is sync or async.
+_current_recorder = ContextVar("query_recorder", default=None)
+
+
+def _record_query(execute, sql, params, many, context):
+    recorder = _current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+@receiver(connection_created)
+def _install_query_recorder(sender, connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def _install_on_open_connections():
+    # Connections opened before this module was imported never saw connection_created.
+    for connection in connections.all(initialized_only=True):
+        _install_query_recorder(None, connection)
+
+
+def call_site():
+    """The innermost frame of project code that led to the current query."""
+    base_dir = str(settings.BASE_DIR)
+    this_file = os.path.abspath(__file__)
+    for frame in reversed(traceback.extract_stack()):
+        filename = os.path.abspath(frame.filename)
+        if filename.startswith(base_dir) and filename != this_file and "site-packages" not in filename:
+            return f"{os.path.relpath(filename, base_dir)}:{frame.lineno} in {frame.name}"
+    return "unknown"
+
+
+class PerformanceMiddleware:
+    """
+    Records wall time, query count and query time for every request under its
+    URL name (e.g. store:main_page) and logs queries slower than
+    SLOW_QUERY_THRESHOLD_MS with their SQL and call site. A streaming
+    response is recorded once its body has been sent, so the time and queries
+    spent producing the body are counted too.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_threshold = settings.SLOW_QUERY_THRESHOLD_MS / 1000
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        _install_on_open_connections()
+        recorder = QueryRecorder(self.slow_threshold)
+        token = _current_recorder.set(recorder)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_recorder.reset(token)
+        return self.finish(request, response, start, recorder)
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder(self.slow_threshold)
+        token = _current_recorder.set(recorder)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_recorder.reset(token)
+        return self.finish(request, response, start, recorder)
+
+    def finish(self, request, response, start, recorder):
+        if not response.streaming:
+            self.observe(request, time.perf_counter() - start, recorder)
+        elif response.is_async:
+            response.streaming_content = self.astream(response.streaming_content, request, start, recorder)
+        else:
+            response.streaming_content = self.stream(response.streaming_content, request, start, recorder)
+        return response
+
+    # The recorder is set only while the wrapped iterator produces a chunk, so
+    # it never leaks into whatever the server does between chunks.
+    def stream(self, content, request, start, recorder):
+        iterator = iter(content)
+        try:
+            while True:
+                token = _current_recorder.set(recorder)
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    _current_recorder.reset(token)
+                yield chunk
+        finally:
+            self.observe(request, time.perf_counter() - start, recorder)
+
+    async def astream(self, content, request, start, recorder):
+        iterator = aiter(content)
+        try:
+            while True:
+                token = _current_recorder.set(recorder)
+                try:
+                    chunk = await anext(iterator)
+                except StopAsyncIteration:
+                    return
+                finally:
+                    _current_recorder.reset(token)
+                yield chunk
+        finally:
+            self.observe(request, time.perf_counter() - start, recorder)
+
+    def observe(self, request, duration, recorder):
+        match = request.resolver_match
+        route = match.view_name if match else "unresolved"
+        registry.observe(route, duration=duration, db_time=recorder.time, queries=recorder.count)
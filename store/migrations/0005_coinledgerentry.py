@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0004_remove_dino_is_adult_dino_gender_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CoinLedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('delta', models.IntegerField()),
+                ('reason', models.CharField(choices=[('dino_purchase', 'Dino purchase'), ('coin_purchase', 'Coin purchase'), ('admin_adjustment', 'Admin adjustment')], max_length=30)),
+                ('reference', models.CharField(blank=True, default='', max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='store.playerprofile')),
+            ],
+        ),
+    ]
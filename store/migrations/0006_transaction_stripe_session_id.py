@@ -0,0 +1,22 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0005_coinledgerentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='stripe_session_id',
+            field=models.CharField(blank=True, max_length=255, null=True, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['status', 'created_at'], name='txn_status_created_idx'),
+        ),
+    ]
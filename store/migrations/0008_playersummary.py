@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0007_stripeevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayerSummary',
+            fields=[
+                ('player', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='store.playerprofile')),
+                ('total_spent_usd', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('coins_purchased', models.PositiveIntegerField(default=0)),
+                ('completed_transactions', models.PositiveIntegerField(default=0)),
+                ('last_transaction_at', models.DateTimeField(blank=True, null=True)),
+                ('coins_spent', models.PositiveIntegerField(default=0)),
+                ('purchase_count', models.PositiveIntegerField(default=0)),
+                ('dinos_owned', models.PositiveIntegerField(default=0)),
+                ('last_purchase_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0008_playersummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='checkout_url',
+            field=models.URLField(blank=True, default='', max_length=2048),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='package',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='store.coinpackage'),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('completed', 'Completed'), ('expired', 'Expired')], default='pending', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['player', 'package', 'status'], name='txn_open_session_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:09
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def backfill_owned_dinos(apps, schema_editor):
+    """One OwnedDino per distinct (player, dino) in Purchase, from its first purchase."""
+    Purchase = apps.get_model('store', 'Purchase')
+    OwnedDino = apps.get_model('store', 'OwnedDino')
+    firsts = (
+        Purchase.objects.filter(dino__isnull=False)
+        .values('player_id', 'dino_id')
+        .annotate(purchase_id=Min('pk'), acquired_at=Min('created_at'))
+        .order_by()
+    )
+    batch = []
+    for row in firsts.iterator(chunk_size=2000):
+        batch.append(OwnedDino(**row))
+        if len(batch) == 2000:
+            OwnedDino.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    OwnedDino.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0009_transaction_checkout_session'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OwnedDino',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('acquired_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('dino', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='owners', to='store.dino')),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='owned_dinos', to='store.playerprofile')),
+                ('purchase', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='store.purchase')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('player', 'dino'), name='owned_dino_player_dino_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_owned_dinos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+from django.db import migrations
+
+
+def merge_user_profiles(apps, schema_editor):
+    """
+    Fold authentication.UserProfile into PlayerProfile before it is dropped:
+    copy avatar_url onto players that lack one, and create the player (with
+    its PlayerGameData) for profiles that have a SteamID but no player yet.
+    """
+    UserProfile = apps.get_model('authentication', 'UserProfile')
+    PlayerProfile = apps.get_model('store', 'PlayerProfile')
+    PlayerGameData = apps.get_model('store', 'PlayerGameData')
+
+    profiles = UserProfile.objects.order_by('pk')
+    last_pk = 0
+    while True:
+        chunk = list(profiles.filter(pk__gt=last_pk)[:1000])
+        if not chunk:
+            return
+        last_pk = chunk[-1].pk
+
+        players = PlayerProfile.objects.in_bulk([p.user_id for p in chunk], field_name='user_id')
+        taken = set(
+            PlayerProfile.objects.filter(steam_id__in=[p.steam_id for p in chunk if p.steam_id])
+            .values_list('steam_id', flat=True)
+        )
+        updated, created = [], []
+        for profile in chunk:
+            player = players.get(profile.user_id)
+            if player is not None:
+                if profile.avatar_url and not player.avatar_url:
+                    player.avatar_url = profile.avatar_url
+                    updated.append(player)
+            elif profile.steam_id and profile.steam_id not in taken:
+                taken.add(profile.steam_id)
+                created.append(PlayerProfile(
+                    user_id=profile.user_id, steam_id=profile.steam_id, avatar_url=profile.avatar_url,
+                ))
+        PlayerProfile.objects.bulk_update(updated, ['avatar_url'])
+        created = PlayerProfile.objects.bulk_create(created)
+        PlayerGameData.objects.bulk_create(
+            [PlayerGameData(player_id=player.pk) for player in created], ignore_conflicts=True,
+        )
+
+
+def cannot_split_profiles(apps, schema_editor):
+    raise migrations.exceptions.IrreversibleError(
+        "authentication.UserProfile was merged into store.PlayerProfile and its rows are dropped by "
+        "authentication.0003; rolling back would recreate the table empty. Restore it from a backup instead."
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0010_owneddino'),
+        ('authentication', '0002_game'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_user_profiles, cannot_split_profiles),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0011_merge_userprofile'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='purchase',
+            index=models.Index(fields=['created_at'], name='purchase_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['created_at'], name='txn_created_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0012_created_at_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dino',
+            name='image_derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='playerprofile',
+            name='avatar_image_derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
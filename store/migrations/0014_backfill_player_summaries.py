@@ -0,0 +1,57 @@
+from django.db import migrations
+from django.db.models import Count, Max, Sum
+
+
+def backfill_player_summaries(apps, schema_editor):
+    """
+    Recompute every PlayerSummary from history. 0008 created the table empty,
+    and rows first created by a later change counted only that change.
+    """
+    PlayerProfile = apps.get_model('store', 'PlayerProfile')
+    PlayerSummary = apps.get_model('store', 'PlayerSummary')
+    Transaction = apps.get_model('store', 'Transaction')
+    Purchase = apps.get_model('store', 'Purchase')
+    OwnedDino = apps.get_model('store', 'OwnedDino')
+    fields = [
+        'total_spent_usd', 'coins_purchased', 'completed_transactions', 'last_transaction_at',
+        'coins_spent', 'purchase_count', 'dinos_owned', 'last_purchase_at',
+    ]
+
+    player_ids = list(PlayerProfile.objects.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(player_ids), 500):
+        batch = player_ids[start:start + 500]
+        summaries = {pk: PlayerSummary(player_id=pk) for pk in batch}
+        rows = [
+            *Transaction.objects.filter(player_id__in=batch, status='completed').values('player_id').annotate(
+                total_spent_usd=Sum('amount_usd'),
+                coins_purchased=Sum('coins_purchased'),
+                completed_transactions=Count('id'),
+                last_transaction_at=Max('created_at'),
+            ).order_by(),
+            *Purchase.objects.filter(player_id__in=batch).values('player_id').annotate(
+                coins_spent=Sum('used_coins'),
+                purchase_count=Count('id'),
+                last_purchase_at=Max('created_at'),
+            ).order_by(),
+            *OwnedDino.objects.filter(player_id__in=batch).values('player_id').annotate(
+                dinos_owned=Count('id'),
+            ).order_by(),
+        ]
+        for row in rows:
+            summary = summaries[row.pop('player_id')]
+            for field, value in row.items():
+                setattr(summary, field, value)
+        PlayerSummary.objects.bulk_create(
+            summaries.values(), update_conflicts=True, unique_fields=['player'], update_fields=fields,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0013_image_derivative_records'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_player_summaries, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import User
 
 # ------------------------------
@@ -12,6 +13,7 @@ class PlayerProfile(models.Model):
     avatar_image = models.ImageField(
         upload_to="player_avatars/", blank=True, null=True
     )  # Custom uploaded avatar
+    avatar_image_derivatives = models.JSONField(default=dict, blank=True, editable=False)  # see store.images
     coins = models.PositiveIntegerField(default=0)  # Player coin balance
 
     def __str__(self):
@@ -36,6 +38,7 @@ class CoinPackage(models.Model):
 class Dino(models.Model):
     name = models.CharField(max_length=100)
     image = models.ImageField(upload_to="dinos/", null=True, blank=True)
+    image_derivatives = models.JSONField(default=dict, blank=True, editable=False)  # see store.images
     coin_cost = models.PositiveIntegerField(default=1)  # Default 1 coin
     gender = models.CharField(max_length=20, null=True, blank=True)
 
@@ -68,18 +71,81 @@ class Transaction(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
         ('completed', 'Completed'),
+        ('expired', 'Expired'),
     ]
 
     player = models.ForeignKey(PlayerProfile, on_delete=models.CASCADE)
+    package = models.ForeignKey('CoinPackage', on_delete=models.SET_NULL, null=True, blank=True)
     amount_usd = models.DecimalField(max_digits=10, decimal_places=2)
     coins_purchased = models.PositiveIntegerField()
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    stripe_session_id = models.CharField(max_length=255, unique=True, null=True, blank=True)
+    checkout_url = models.URLField(max_length=2048, blank=True, default="")
+    expires_at = models.DateTimeField(blank=True, null=True)  # when the Stripe session stops accepting payment
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='txn_status_created_idx'),
+            models.Index(fields=['created_at'], name='txn_created_idx'),
+            models.Index(fields=['player', 'package', 'status'], name='txn_open_session_idx'),
+        ]
+
     def __str__(self):
         return f"Txn #{self.id} - {self.player.user.username}"
 
 
+# ------------------------------
+# Coin Ledger (append-only record of every balance change)
+# ------------------------------
+class CoinLedgerEntry(models.Model):
+    REASON_CHOICES = [
+        ('dino_purchase', 'Dino purchase'),
+        ('coin_purchase', 'Coin purchase'),
+        ('admin_adjustment', 'Admin adjustment'),
+    ]
+
+    player = models.ForeignKey(PlayerProfile, on_delete=models.CASCADE, related_name="ledger_entries")
+    delta = models.IntegerField()  # positive = credit, negative = debit
+    reason = models.CharField(max_length=30, choices=REASON_CHOICES)
+    reference = models.CharField(max_length=100, blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.player_id}: {self.delta:+d} ({self.reason})"
+
+
+# ------------------------------
+# Stripe Webhook Inbox (verified events waiting to be processed)
+# ------------------------------
+class StripeEvent(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('processed', 'Processed'),
+        ('failed', 'Failed'),
+    ]
+
+    event_id = models.CharField(max_length=255, unique=True)
+    event_type = models.CharField(max_length=100)
+    payload = models.JSONField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+    claimed_by = models.CharField(max_length=64, blank=True, default="")
+    claimed_at = models.DateTimeField(blank=True, null=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id'], name='stripe_event_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} ({self.event_id}) - {self.status}"
+
+
 # ------------------------------
 # Purchased Dinos
 # ------------------------------
@@ -89,11 +155,35 @@ class Purchase(models.Model):
     used_coins = models.PositiveIntegerField(default=0)  # coins spent to grow/buy dino
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at'], name='purchase_created_idx'),
+        ]
+
     def __str__(self):
         dino_name = self.dino.name if self.dino else "Unknown"
         return f"{self.player.user.username} bought/grew {dino_name}"
 
 
+# ------------------------------
+# Owned Dinos (inventory: one row per player and dino)
+# ------------------------------
+class OwnedDino(models.Model):
+    player = models.ForeignKey(PlayerProfile, on_delete=models.CASCADE, related_name="owned_dinos")
+    dino = models.ForeignKey(Dino, on_delete=models.CASCADE, related_name="owners")
+    purchase = models.OneToOneField(Purchase, on_delete=models.SET_NULL, null=True, blank=True)
+    acquired_at = models.DateTimeField(default=timezone.now)  # not auto_now_add: backfilled rows keep their purchase date
+
+    class Meta:
+        constraints = [
+            # Also the index behind ownership checks and per-player listings.
+            models.UniqueConstraint(fields=['player', 'dino'], name='owned_dino_player_dino_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.player.user.username} owns {self.dino.name}"
+
+
 # ------------------------------
 # Player Game Data (dashboard info)
 # ------------------------------
@@ -108,6 +198,27 @@ class PlayerGameData(models.Model):
     def __str__(self):
         return f"{self.player.user.username} - {self.status}"
 
+# ------------------------------
+# Player Summary (denormalized dashboard figures)
+# ------------------------------
+# Maintained incrementally by store.summaries; rebuild_player_summaries
+# recomputes it from Transaction and Purchase.
+class PlayerSummary(models.Model):
+    player = models.OneToOneField(PlayerProfile, on_delete=models.CASCADE, primary_key=True, related_name="summary")
+    total_spent_usd = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    coins_purchased = models.PositiveIntegerField(default=0)
+    completed_transactions = models.PositiveIntegerField(default=0)
+    last_transaction_at = models.DateTimeField(blank=True, null=True)
+    coins_spent = models.PositiveIntegerField(default=0)
+    purchase_count = models.PositiveIntegerField(default=0)
+    dinos_owned = models.PositiveIntegerField(default=0)
+    last_purchase_at = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Summary for player {self.player_id}"
+
+
 class DinoSlot(models.Model):
     player = models.ForeignKey(PlayerProfile, on_delete=models.CASCADE, related_name="slots")
     server_name = models.CharField(max_length=100)
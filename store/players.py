@@ -0,0 +1,184 @@
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.shortcuts import redirect
+from django.utils.crypto import get_random_string
+
+from .models import PlayerProfile, PlayerGameData
+
+
+# ------------------------------------------------------------
+# SESSION PLAYER
+# ------------------------------------------------------------
+# The logged-in player is resolved once per request and memoized on it. The
+# session stores the profile's primary key next to the legacy steam_id, and
+# the profile row is cached for PLAYER_CACHE_TIMEOUT seconds in the
+# PLAYER_CACHE_ALIAS cache, so most requests make no profile query. Only the
+# values the store pages use are cached: the profile's columns and the user's
+# username and email, never the password hash. They come back as a
+# PlayerProfile whose user has every other field deferred. Anything that
+# changes a profile calls invalidate_player after commit.
+SESSION_KEY = "player_id"
+STEAM_ID_SESSION_KEY = "steam_id"
+
+# In model field order, as Model.from_db expects.
+PROFILE_FIELDS = [
+    "id", "user_id", "steam_id", "steam_name", "avatar_url", "avatar_image", "avatar_image_derivatives", "coins",
+]
+USER_FIELDS = ["username", "email"]
+
+_UNSET = object()
+
+
+def _cache():
+    return caches[getattr(settings, "PLAYER_CACHE_ALIAS", "default")]
+
+
+def _cache_key(player_id):
+    return f"player:{player_id}"
+
+
+def _load_row(**filters):
+    return (
+        PlayerProfile.objects.filter(**filters)
+        .values_list(*PROFILE_FIELDS, *(f"user__{name}" for name in USER_FIELDS))
+        .first()
+    )
+
+
+def _from_row(row):
+    db = PlayerProfile.objects.db
+    player = PlayerProfile.from_db(db, PROFILE_FIELDS, row[:len(PROFILE_FIELDS)])
+    player.user = User.from_db(db, ["id", *USER_FIELDS], (player.user_id, *row[len(PROFILE_FIELDS):]))
+    return player
+
+
+async def alogin_player(request, player):
+    await request.session.aset(STEAM_ID_SESSION_KEY, player.steam_id)
+    await request.session.aset(SESSION_KEY, player.pk)
+    request._player = player
+
+
+# ------------------------------------------------------------
+# LOGIN PROVISIONING
+# ------------------------------------------------------------
+# A player is a User, a PlayerProfile and a PlayerGameData row. Returning
+# players are found with one indexed query on steam_id; a first login creates
+# all three rows in one transaction, three INSERTs and nothing else. Players
+# only ever sign in through Steam, so the User gets an unusable password:
+# make_password(None) is a random marker string, with no hashing involved.
+def steam_username(steam_id):
+    return f"steam_{steam_id}"
+
+
+def find_player(steam_id):
+    """The PlayerProfile (user joined in) for a SteamID, or None."""
+    return PlayerProfile.objects.select_related("user").filter(steam_id=steam_id).first()
+
+
+async def afind_player(steam_id):
+    return await PlayerProfile.objects.select_related("user").filter(steam_id=steam_id).afirst()
+
+
+def create_player(steam_id):
+    """
+    Create the player aggregate for a first login. If a concurrent login
+    created the player first, or a User for this SteamID exists without a
+    profile, the missing rows are filled in instead. If that User already
+    belongs to a player with another SteamID, the new player gets a User of
+    its own. Returns the PlayerProfile.
+    """
+    try:
+        with transaction.atomic():
+            user = User.objects.create(username=steam_username(steam_id), password=make_password(None))
+            player = PlayerProfile.objects.create(user=user, steam_id=steam_id)
+            PlayerGameData.objects.create(player=player)
+            return player
+    except IntegrityError:
+        pass
+    with transaction.atomic():
+        user, _ = User.objects.get_or_create(
+            username=steam_username(steam_id), defaults={"password": make_password(None)},
+        )
+        if PlayerProfile.objects.filter(user=user).exclude(steam_id=steam_id).exists():
+            user = User.objects.create(
+                username=f"{steam_username(steam_id)}_{get_random_string(8)}", password=make_password(None),
+            )
+        player, _ = PlayerProfile.objects.select_related("user").get_or_create(
+            steam_id=steam_id, defaults={"user": user},
+        )
+        PlayerGameData.objects.get_or_create(player=player)
+        return player
+
+
+def get_player(player_id):
+    """The PlayerProfile (user username and email joined in) for a primary key, or None."""
+    cache = _cache()
+    key = _cache_key(player_id)
+    row = cache.get(key)
+    if row is None:
+        row = _load_row(pk=player_id)
+        if row is None:
+            return None
+        cache.set(key, row, settings.PLAYER_CACHE_TIMEOUT)
+    return _from_row(row)
+
+
+def invalidate_player(player_id):
+    _cache().delete(_cache_key(player_id))
+
+
+def invalidate_player_on_commit(player_id):
+    transaction.on_commit(lambda: invalidate_player(player_id))
+
+
+def get_session_player(request):
+    """The logged-in PlayerProfile, or None. Memoized on the request."""
+    player = getattr(request, "_player", _UNSET)
+    if player is not _UNSET:
+        return player
+
+    player = None
+    player_id = request.session.get(SESSION_KEY)
+    if player_id is not None:
+        player = get_player(player_id)
+    else:
+        # Sessions from before the pk was stored: resolve by steam_id once.
+        steam_id = request.session.get(STEAM_ID_SESSION_KEY)
+        if steam_id:
+            row = _load_row(steam_id=steam_id)
+            if row is not None:
+                player = _from_row(row)
+                request.session[SESSION_KEY] = player.pk
+                _cache().set(_cache_key(player.pk), row, settings.PLAYER_CACHE_TIMEOUT)
+
+    request._player = player
+    return player
+
+
+def player_required(view):
+    """
+    Redirect to the login page unless a player is logged in, and expose the
+    player as request.player. Works on sync and async views.
+    """
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            request.player = await sync_to_async(get_session_player)(request)
+            if request.player is None:
+                return redirect("store:login-page")
+            return await view(request, *args, **kwargs)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        request.player = get_session_player(request)
+        if request.player is None:
+            return redirect("store:login-page")
+        return view(request, *args, **kwargs)
+    return wrapper
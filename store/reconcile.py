@@ -0,0 +1,109 @@
+import asyncio
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+
+from . import ledger
+from .checkout import get_checkout
+from .models import Transaction
+
+
+# ------------------------------------------------------------
+# STRIPE RECONCILIATION
+# ------------------------------------------------------------
+# Finds transactions that were paid on Stripe but never completed here,
+# because the checkout.session.completed webhook was lost. Unfinished rows
+# are read in pk order, a chunk at a time; each chunk costs one paginated
+# list of the completed Checkout sessions created in its time range rather
+# than a Stripe call per row, and the paid ones are completed in bulk.
+# Chunks are reconciled concurrently, at most `workers` at a time. Database
+# work runs on one thread, so only the Stripe calls overlap.
+
+# A session is created just after its transaction row, and Stripe's clock is
+# not ours, so the Stripe range for a chunk is padded on both sides of its
+# rows' created_at.
+CLOCK_SLACK = timedelta(minutes=5)
+
+
+def _unfinished_chunk(after_pk, created_range, size):
+    return list(
+        Transaction.objects.filter(
+            pk__gt=after_pk,
+            status__in=["pending", "expired"],
+            stripe_session_id__isnull=False,
+            created_at__range=created_range,
+        )
+        .order_by("pk")
+        .values_list("pk", "stripe_session_id", "created_at")[:size]
+    )
+
+
+async def _reconcile_chunk(rows):
+    created = [created_at for _, _, created_at in rows]
+    sessions = await get_checkout().list_sessions(
+        status="complete",
+        created={
+            "gte": int((min(created) - CLOCK_SLACK).timestamp()),
+            "lte": int((max(created) + CLOCK_SLACK).timestamp()),
+        },
+    )
+    paid = {session.id for session in sessions if session.payment_status == "paid"}
+    matched = [session_id for _, session_id, _ in rows if session_id in paid]
+    if not matched:
+        return 0
+    return await sync_to_async(ledger.complete_checkout_sessions)(matched)
+
+
+async def reconcile_transactions(
+    after_pk=0, chunk_size=500, workers=4, min_age=timedelta(minutes=15), max_age=timedelta(days=7),
+    on_progress=None,
+):
+    """
+    Complete every pending or expired transaction with a pk above after_pk,
+    created between max_age and min_age ago, whose Checkout session Stripe
+    reports as paid. Rows younger than min_age are left to their webhook.
+
+    on_progress(checkpoint_pk, checked, completed) is called whenever every
+    row up to checkpoint_pk has been reconciled; a later run can resume with
+    after_pk=checkpoint_pk. Returns (checked, completed).
+    """
+    now = timezone.now()
+    created_range = (now - max_age, now - min_age)
+    slots = asyncio.Semaphore(workers)
+    in_flight = []  # (last_pk, row count, task) per chunk, in pk order
+    checked = completed = 0
+
+    async def run(rows):
+        try:
+            return await _reconcile_chunk(rows)
+        finally:
+            slots.release()
+
+    def advance():
+        # Move the checkpoint past every finished chunk at the front.
+        nonlocal checked, completed
+        checkpoint = None
+        while in_flight and in_flight[0][2].done():
+            checkpoint, count, task = in_flight.pop(0)
+            checked += count
+            completed += task.result()
+        if checkpoint is not None and on_progress:
+            on_progress(checkpoint, checked, completed)
+
+    try:
+        while True:
+            await slots.acquire()
+            rows = await sync_to_async(_unfinished_chunk)(after_pk, created_range, chunk_size)
+            if not rows:
+                slots.release()
+                break
+            after_pk = rows[-1][0]
+            in_flight.append((after_pk, len(rows), asyncio.create_task(run(rows))))
+            advance()
+        await asyncio.gather(*(task for _, _, task in in_flight))
+        advance()
+    finally:
+        for _, _, task in in_flight:
+            task.cancel()
+    return checked, completed
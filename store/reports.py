@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum, Value
+
+from .models import PlayerProfile, Dino, CoinPackage, Transaction
+
+
+# ------------------------------------------------------------
+# ADMIN DASHBOARD FIGURES
+# ------------------------------------------------------------
+def _row_count(model, key):
+    return (
+        model.objects.order_by()
+        .annotate(key=Value(key))
+        .values("key")
+        .annotate(count=Count("pk"))
+        .values_list("key", "count")
+    )
+
+
+def headline_counts():
+    """Player, dino and package counts in a single round trip (a UNION ALL of three COUNTs)."""
+    counts = _row_count(PlayerProfile, "player_count").union(
+        _row_count(Dino, "dino_count"), _row_count(CoinPackage, "package_count"), all=True,
+    )
+    return dict(counts)
+
+
+def revenue_totals():
+    """
+    Revenue and coin totals over all transactions, cached for
+    ADMIN_STATS_CACHE_TTL seconds since it scans the whole table.
+    """
+    key = "reports:revenue_totals"
+    totals = cache.get(key)
+    if totals is None:
+        completed = Q(status="completed")
+        totals = Transaction.objects.aggregate(
+            revenue_usd=Sum("amount_usd", filter=completed, default=0),
+            coins_sold=Sum("coins_purchased", filter=completed, default=0),
+            completed_count=Count("id", filter=completed),
+            pending_count=Count("id", filter=Q(status="pending")),
+        )
+        cache.set(key, totals, settings.ADMIN_STATS_CACHE_TTL)
+    return totals
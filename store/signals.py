@@ -0,0 +1,70 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .catalog import bump_catalog_version
+from .images import refresh_derivatives, remove_derivatives, MODEL_SIZES
+from .models import Dino, CoinPackage, PlayerProfile, Purchase, OwnedDino
+from .players import invalidate_player_on_commit
+from .summaries import (
+    transaction_completed, record_transaction, record_purchase, record_dino_owned, record_dino_removed,
+)
+
+
+# Connected before invalidate_catalog so the derivatives exist by the time
+# the new catalog version's fragments are rendered and cached.
+@receiver(post_save, sender=Dino)
+def dino_image_derivatives(sender, instance, **kwargs):
+    refresh_derivatives(instance, "image", MODEL_SIZES["dino"])
+
+
+@receiver(post_delete, sender=Dino)
+def dino_image_derivatives_deleted(sender, instance, **kwargs):
+    remove_derivatives(instance, "image")
+
+
+# The one place model changes bump the catalog version, whether they come
+# from the admin panel, Django admin or a shell.
+@receiver(post_save, sender=Dino)
+@receiver(post_delete, sender=Dino)
+@receiver(post_save, sender=CoinPackage)
+@receiver(post_delete, sender=CoinPackage)
+def invalidate_catalog(sender, **kwargs):
+    bump_catalog_version()
+
+
+@receiver(post_save, sender=PlayerProfile)
+@receiver(post_delete, sender=PlayerProfile)
+def invalidate_player_cache(sender, instance, **kwargs):
+    invalidate_player_on_commit(instance.pk)
+
+
+@receiver(post_save, sender=PlayerProfile)
+def avatar_image_derivatives(sender, instance, **kwargs):
+    refresh_derivatives(instance, "avatar_image", MODEL_SIZES["avatar"])
+
+
+@receiver(post_delete, sender=PlayerProfile)
+def avatar_image_derivatives_deleted(sender, instance, **kwargs):
+    remove_derivatives(instance, "avatar_image")
+
+
+@receiver(transaction_completed)
+def summary_transaction_completed(sender, player_id, amount_usd, coins, created_at, **kwargs):
+    record_transaction(player_id, amount_usd, coins, created_at)
+
+
+@receiver(post_save, sender=Purchase)
+def summary_purchase_made(sender, instance, created, **kwargs):
+    if created:
+        record_purchase(instance)
+
+
+@receiver(post_save, sender=OwnedDino)
+def summary_dino_owned(sender, instance, created, **kwargs):
+    if created:
+        record_dino_owned(instance.player_id)
+
+
+@receiver(post_delete, sender=OwnedDino)
+def summary_dino_removed(sender, instance, **kwargs):
+    record_dino_removed(instance.player_id)
@@ -0,0 +1,102 @@
+import json
+
+from django.db import transaction
+
+from .models import DinoSlot, OwnedDino
+
+
+# ------------------------------------------------------------
+# BATCH SLOT MANAGEMENT
+# ------------------------------------------------------------
+# A player's slot changes arrive as one list of operations:
+#   {"op": "assign", "slot": <slot id>, "dino": <dino id>}   add or switch
+#   {"op": "release", "slot": <slot id>}
+# The batch is validated in full before anything is written: one query loads
+# the player's slots (locking them), one checks every dino against the
+# player's inventory, and one bulk_update writes the result. Either every
+# operation applies or none does.
+OPERATIONS = ("assign", "release")
+
+
+class SlotOperationError(ValueError):
+    def __init__(self, errors):
+        super().__init__("Invalid slot operations.")
+        self.errors = errors  # [{"index": i, "error": message}]
+
+
+def _is_id(value):
+    return isinstance(value, int) and not isinstance(value, bool) and value > 0
+
+
+def parse_operations(body):
+    """Decode {"operations": [...]} (or a bare list) and check each item's shape."""
+    try:
+        payload = json.loads(body.decode("utf-8"))
+    except (UnicodeDecodeError, ValueError) as exc:
+        raise SlotOperationError([{"index": None, "error": f"Malformed body: {exc}"}])
+    operations = payload.get("operations") if isinstance(payload, dict) else payload
+    if not isinstance(operations, list) or not operations:
+        raise SlotOperationError([{"index": None, "error": "Expected a non-empty list of operations."}])
+
+    errors = []
+    for index, op in enumerate(operations):
+        if not isinstance(op, dict) or op.get("op") not in OPERATIONS:
+            errors.append({"index": index, "error": f"op must be one of {', '.join(OPERATIONS)}."})
+        elif not _is_id(op.get("slot")):
+            errors.append({"index": index, "error": "Missing or invalid slot id."})
+        elif op["op"] == "assign" and not _is_id(op.get("dino")):
+            errors.append({"index": index, "error": "Missing or invalid dino id."})
+    if errors:
+        raise SlotOperationError(errors)
+    return operations
+
+
+def apply_operations(player, operations):
+    """
+    Apply parsed operations to player's slots in order, atomically. Raises
+    SlotOperationError, with nothing written, if any slot is not the
+    player's or any dino is not in their inventory.
+    """
+    with transaction.atomic():
+        slots = DinoSlot.objects.select_for_update().filter(player=player).only("id", "active_dino").in_bulk(
+            {op["slot"] for op in operations}
+        )
+        dino_ids = {op["dino"] for op in operations if op["op"] == "assign"}
+        owned = set(
+            OwnedDino.objects.filter(player=player, dino_id__in=dino_ids).values_list("dino_id", flat=True)
+        ) if dino_ids else set()
+
+        errors = []
+        for index, op in enumerate(operations):
+            if op["slot"] not in slots:
+                errors.append({"index": index, "error": "Slot not found."})
+            elif op["op"] == "assign" and op["dino"] not in owned:
+                errors.append({"index": index, "error": "You do not own this dino."})
+        if errors:
+            raise SlotOperationError(errors)
+
+        for op in operations:
+            slots[op["slot"]].active_dino_id = op["dino"] if op["op"] == "assign" else None
+        DinoSlot.objects.bulk_update(slots.values(), ["active_dino"])
+
+
+def slot_state(player):
+    """Every slot of player's, as returned by the batch endpoint."""
+    slots = DinoSlot.objects.filter(player=player).select_related("active_dino").order_by("id")
+    return [
+        {
+            "id": slot.id,
+            "server_name": slot.server_name,
+            "active_dino": {
+                "id": slot.active_dino.id,
+                "name": slot.active_dino.name,
+                "gender": slot.active_dino.gender,
+            } if slot.active_dino else None,
+            "growth": slot.growth,
+            "health": slot.health,
+            "stamina": slot.stamina,
+            "hunger": slot.hunger,
+            "thirst": slot.thirst,
+        }
+        for slot in slots
+    ]
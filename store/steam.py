@@ -0,0 +1,247 @@
+import logging
+import re
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.models import Q
+from django.dispatch import receiver
+
+from .clients import LoopClients
+from .models import PlayerProfile
+from .players import invalidate_player_on_commit
+
+
+logger = logging.getLogger(__name__)
+
+STEAM_ID_RE = re.compile(r"https://steamcommunity.com/openid/id/(\d+)")
+
+
+def extract_steam_id(claimed_id):
+    match = STEAM_ID_RE.search(claimed_id or "")
+    return match.group(1) if match else None
+
+
+# ------------------------------------------------------------
+# OPENID VERIFIER
+# ------------------------------------------------------------
+class SteamOpenIDVerifier:
+    """
+    Checks an OpenID assertion with Steam (check_authentication).
+
+    One instance is shared per process so connections to Steam are kept alive
+    and reused instead of a new TLS handshake per login. Every call has a hard
+    timeout; a slow or unreachable Steam counts as a failed verification.
+    """
+
+    def __init__(self, endpoint, connect_timeout=3.0, read_timeout=5.0, pool_size=10):
+        self.endpoint = endpoint
+        self.timeout = (connect_timeout, read_timeout)
+        self.pool_size = pool_size
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        # httpx clients are bound to the event loop they were first used on
+        # (see store.clients). They share one SSL context: loading the CA
+        # bundle costs ~40 ms of CPU, which WSGI would otherwise pay on every
+        # login's fresh loop.
+        self._ssl_context = httpx.create_ssl_context()
+        self._async_clients = LoopClients(self._new_async_client)
+
+    @staticmethod
+    def _check_authentication_params(params):
+        data = dict(params)
+        data["openid.mode"] = "check_authentication"
+        return data
+
+    def verify(self, params):
+        try:
+            response = self.session.post(
+                self.endpoint,
+                data=self._check_authentication_params(params),
+                timeout=self.timeout,
+            )
+        except requests.RequestException:
+            logger.warning("Steam OpenID verification request failed", exc_info=True)
+            return False
+        return "is_valid:true" in response.text
+
+    def _new_async_client(self):
+        return httpx.AsyncClient(
+            verify=self._ssl_context,
+            timeout=httpx.Timeout(self.timeout[1], connect=self.timeout[0]),
+            limits=httpx.Limits(
+                max_connections=self.pool_size,
+                max_keepalive_connections=self.pool_size,
+            ),
+        )
+
+    async def averify(self, params):
+        try:
+            response = await self._async_clients.get().post(
+                self.endpoint,
+                data=self._check_authentication_params(params),
+            )
+        except httpx.HTTPError:
+            logger.warning("Steam OpenID verification request failed", exc_info=True)
+            return False
+        return "is_valid:true" in response.text
+
+    def close(self):
+        self.session.close()
+
+
+_verifier = None
+
+
+def get_verifier():
+    global _verifier
+    if _verifier is None:
+        _verifier = SteamOpenIDVerifier(
+            settings.STEAM_OPENID_URL,
+            connect_timeout=settings.STEAM_OPENID_CONNECT_TIMEOUT,
+            read_timeout=settings.STEAM_OPENID_READ_TIMEOUT,
+            pool_size=settings.STEAM_OPENID_POOL_SIZE,
+        )
+    return _verifier
+
+
+@receiver(setting_changed)
+def _reset_verifier(setting, **kwargs):
+    global _verifier
+    if setting.startswith("STEAM_OPENID_") and _verifier is not None:
+        _verifier.close()
+        _verifier = None
+
+
+# ------------------------------------------------------------
+# PROFILE ENRICHMENT (Steam Web API)
+# ------------------------------------------------------------
+# steam_verify only learns a player's SteamID. Names and avatars come from
+# ISteamUser/GetPlayerSummaries, which takes up to 100 SteamIDs per call.
+# Each profile Steam returns is cached for STEAM_PROFILE_CACHE_TTL seconds in
+# the STEAM_PROFILE_CACHE_ALIAS cache; enrich_profiles() asks Steam only about
+# players missing from that cache and writes changed rows back with
+# bulk_update, so pages can render the stored steam_name and avatar_url
+# without any other lookup. steam_verify never calls Steam for a profile, so
+# a slow Steam Web API cannot hold up a login; a new player's name and avatar
+# appear once enrich_steam_profiles has run.
+STEAM_SUMMARIES_PER_CALL = 100
+PROFILE_CACHE_PREFIX = "steam:profile:"
+
+
+class SteamAPIError(Exception):
+    pass
+
+
+class SteamWebAPI:
+    def __init__(self, api_key, base_url, timeout=10.0):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def player_summaries(self, steam_ids):
+        """{steam_id: {"steam_name", "avatar_url"}} for up to 100 SteamIDs."""
+        if len(steam_ids) > STEAM_SUMMARIES_PER_CALL:
+            raise ValueError(f"At most {STEAM_SUMMARIES_PER_CALL} SteamIDs per call.")
+        try:
+            response = self.session.get(
+                f"{self.base_url}/ISteamUser/GetPlayerSummaries/v0002/",
+                params={"key": self.api_key, "steamids": ",".join(steam_ids)},
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+            players = response.json()["response"]["players"]
+        except (requests.RequestException, ValueError, KeyError) as exc:
+            raise SteamAPIError(f"GetPlayerSummaries failed: {exc}") from exc
+        return {
+            player["steamid"]: {
+                "steam_name": player.get("personaname", ""),
+                "avatar_url": player.get("avatarfull") or None,
+            }
+            for player in players
+        }
+
+    def close(self):
+        self.session.close()
+
+
+_web_api = None
+
+
+def get_web_api():
+    global _web_api
+    if _web_api is None:
+        _web_api = SteamWebAPI(settings.STEAM_API_KEY, settings.STEAM_API_URL, timeout=settings.STEAM_API_TIMEOUT)
+    return _web_api
+
+
+@receiver(setting_changed)
+def _reset_web_api(setting, **kwargs):
+    global _web_api
+    if setting.startswith("STEAM_API_") and _web_api is not None:
+        _web_api.close()
+        _web_api = None
+
+
+def _profile_cache():
+    return caches[getattr(settings, "STEAM_PROFILE_CACHE_ALIAS", "default")]
+
+
+def cached_profiles(steam_ids):
+    """Cached summaries for steam_ids; fetches the uncached ones in batches of 100."""
+    cache = _profile_cache()
+    cached = cache.get_many([PROFILE_CACHE_PREFIX + steam_id for steam_id in steam_ids])
+    profiles = {key[len(PROFILE_CACHE_PREFIX):]: profile for key, profile in cached.items()}
+    missing = [steam_id for steam_id in steam_ids if steam_id not in profiles]
+    api = get_web_api()
+    for start in range(0, len(missing), STEAM_SUMMARIES_PER_CALL):
+        fetched = api.player_summaries(missing[start:start + STEAM_SUMMARIES_PER_CALL])
+        cache.set_many(
+            {PROFILE_CACHE_PREFIX + steam_id: profile for steam_id, profile in fetched.items()},
+            timeout=settings.STEAM_PROFILE_CACHE_TTL,
+        )
+        profiles.update(fetched)
+    return profiles
+
+
+def enrich_profiles(only_missing=False, chunk_size=1000):
+    """
+    Fill steam_name and avatar_url for every player (or only those without a
+    name), chunk_size players at a time. Returns (players checked, rows updated).
+    """
+    players = PlayerProfile.objects.only("id", "steam_id", "steam_name", "avatar_url").order_by("pk")
+    if only_missing:
+        players = players.filter(Q(steam_name="") | Q(steam_name__isnull=True))
+
+    checked = updated = 0
+    last_pk = 0
+    while True:
+        chunk = list(players.filter(pk__gt=last_pk)[:chunk_size])
+        if not chunk:
+            return checked, updated
+        last_pk = chunk[-1].pk
+        profiles = cached_profiles([player.steam_id for player in chunk])
+
+        changed = []
+        for player in chunk:
+            profile = profiles.get(player.steam_id)
+            if profile and (player.steam_name, player.avatar_url) != (profile["steam_name"], profile["avatar_url"]):
+                player.steam_name = profile["steam_name"]
+                player.avatar_url = profile["avatar_url"]
+                changed.append(player)
+        with transaction.atomic():
+            PlayerProfile.objects.bulk_update(changed, ["steam_name", "avatar_url"])
+            for player in changed:
+                invalidate_player_on_commit(player.pk)
+        checked += len(chunk)
+        updated += len(changed)
@@ -0,0 +1,210 @@
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+# ------------------------------------------------------------
+# LOCAL STUB SERVERS
+# ------------------------------------------------------------
+# Tiny in-process HTTP servers that stand in for Steam and Stripe in the
+# benchmark commands. They bind to 127.0.0.1 on a free port and can add a
+# fixed delay per request to model network latency.
+class _StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 resets connections when a benchmark opens
+    # dozens at once.
+    request_queue_size = 256
+
+
+class StubServer:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    def handle(self, method, path, query, body, headers):
+        """Return (status, content_type, body_bytes). Override in subclasses."""
+        return 404, "text/plain", b"not found"
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; without TCP_NODELAY
+            # the body waits ~40 ms on the client's delayed ACK.
+            disable_nagle_algorithm = True
+
+            def _dispatch(self, method):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length).decode() if length else ""
+                parts = urlsplit(self.path)
+                with stub._lock:
+                    stub.requests += 1
+                if stub.delay:
+                    time.sleep(stub.delay)
+                status, content_type, payload = stub.handle(
+                    method, parts.path, parse_qs(parts.query), body, self.headers,
+                )
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                self._dispatch("GET")
+
+            def do_POST(self):
+                self._dispatch("POST")
+
+            def log_message(self, *args):
+                pass
+
+        self._server = _StubHTTPServer(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class StubOpenIDServer(StubServer):
+    """Answers Steam's check_authentication with is_valid:true (or false)."""
+
+    def __init__(self, delay=0.0, valid=True):
+        super().__init__(delay)
+        self.valid = valid
+
+    def handle(self, method, path, query, body, headers):
+        if method != "POST":
+            return 405, "text/plain", b""
+        answer = "true" if self.valid else "false"
+        return 200, "text/plain", f"ns:http://specs.openid.net/auth/2.0\nis_valid:{answer}\n".encode()
+
+    @property
+    def url(self):
+        return super().url + "/openid/login"
+
+
+class StubSteamWebAPI(StubServer):
+    """
+    Answers ISteamUser/GetPlayerSummaries for any SteamIDs with a made-up
+    name and avatar, rejecting more than 100 ids per call like Steam does.
+    """
+
+    def __init__(self, delay=0.0):
+        super().__init__(delay)
+        self.batches = []
+
+    def handle(self, method, path, query, body, headers):
+        if method != "GET" or path != "/ISteamUser/GetPlayerSummaries/v0002/":
+            return 404, "text/plain", b"not found"
+        steam_ids = [steam_id for steam_id in query.get("steamids", [""])[0].split(",") if steam_id]
+        if len(steam_ids) > 100:
+            return 400, "text/plain", b"too many steamids"
+        with self._lock:
+            self.batches.append(len(steam_ids))
+        players = [
+            {
+                "steamid": steam_id,
+                "personaname": f"Player {steam_id[-4:]}",
+                "avatarfull": f"https://avatars.steam.test/{steam_id}_full.jpg",
+            }
+            for steam_id in steam_ids
+        ]
+        return 200, "application/json", json.dumps({"response": {"players": players}}).encode()
+
+
+class StubStripeServer(StubServer):
+    """
+    Creates Checkout sessions (POST /v1/checkout/sessions) with sequential
+    ids and lists them (GET /v1/checkout/sessions, newest first, filtered by
+    status and created[gte]/[lte], paginated by limit and starting_after).
+    Like Stripe, a repeated Idempotency-Key returns the original session.
+    pay() marks a session completed the way a finished checkout would.
+    """
+
+    def __init__(self, delay=0.0):
+        super().__init__(delay)
+        self._ids = itertools.count(1)
+        self.sessions = {}
+        self._idempotent = {}
+
+    def create_session(self, expires_at=None, created=None):
+        with self._lock:
+            return self._new_session(expires_at, created)
+
+    def _new_session(self, expires_at=None, created=None):
+        session_id = f"cs_stub_{next(self._ids)}"
+        session = {
+            "id": session_id,
+            "object": "checkout.session",
+            "created": int(time.time() if created is None else created),
+            "status": "open",
+            "payment_status": "unpaid",
+            "expires_at": expires_at,
+            "url": f"https://checkout.stripe.test/c/pay/{session_id}",
+        }
+        self.sessions[session_id] = session
+        return session
+
+    def pay(self, session_id):
+        with self._lock:
+            self.sessions[session_id].update(status="complete", payment_status="paid")
+
+    def handle(self, method, path, query, body, headers):
+        if path != "/v1/checkout/sessions":
+            return 404, "application/json", b'{"error": {"message": "Unrecognized request URL"}}'
+        if method == "GET":
+            return 200, "application/json", json.dumps(self.list_sessions(query)).encode()
+        key = headers.get("Idempotency-Key")
+        with self._lock:
+            session = self._idempotent.get(key) if key else None
+            if session is None:
+                form = parse_qs(body)
+                session = self._new_session(int(form["expires_at"][0]) if "expires_at" in form else None)
+                if key:
+                    self._idempotent[key] = session
+        return 200, "application/json", json.dumps(session).encode()
+
+    def list_sessions(self, query):
+        def arg(name, cast=str):
+            return cast(query[name][0]) if name in query else None
+
+        status, gte, lte = arg("status"), arg("created[gte]", int), arg("created[lte]", int)
+        with self._lock:
+            matching = [
+                session for session in reversed(self.sessions.values())
+                if (status is None or session["status"] == status)
+                and (gte is None or session["created"] >= gte)
+                and (lte is None or session["created"] <= lte)
+            ]
+        after = arg("starting_after")
+        if after:
+            matching = matching[[session["id"] for session in matching].index(after) + 1:]
+        limit = arg("limit", int) or 10
+        return {
+            "object": "list",
+            "url": "/v1/checkout/sessions",
+            "data": matching[:limit],
+            "has_more": len(matching) > limit,
+        }
@@ -0,0 +1,160 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, Max, Sum, Value, When
+from django.dispatch import Signal
+
+from .models import PlayerProfile, PlayerSummary, Transaction, Purchase, OwnedDino
+
+
+# ------------------------------------------------------------
+# PLAYER SUMMARIES
+# ------------------------------------------------------------
+# PlayerSummary holds the dashboard's per-player totals so the page reads one
+# row instead of aggregating Transaction, Purchase and OwnedDino. dinos_owned
+# counts the player's inventory, however the dinos got there. The signal
+# receivers in store.signals keep it current with relative F() updates inside
+# the same database transaction as the change itself; rebuild() recomputes it
+# from scratch and reports any rows that had drifted.
+
+# Sent by ledger.complete_checkout_session once a Transaction is completed.
+transaction_completed = Signal()  # args: player_id, amount_usd, coins, created_at
+
+SUMMARY_FIELDS = [
+    "total_spent_usd",
+    "coins_purchased",
+    "completed_transactions",
+    "last_transaction_at",
+    "coins_spent",
+    "purchase_count",
+    "dinos_owned",
+    "last_purchase_at",
+]
+
+
+def _apply(player_id, **changes):
+    updated = PlayerSummary.objects.filter(player_id=player_id).update(**changes)
+    # A missing row is built from the player's whole history, which already
+    # includes the change being recorded; only if another transaction built
+    # it first does the change still need adding.
+    if not updated and not build(player_id):
+        PlayerSummary.objects.filter(player_id=player_id).update(**changes)
+
+
+def _latest(field, value):
+    """Keep the later of the stored timestamp and value (NULL counts as older)."""
+    return Case(When(**{f"{field}__gt": value}, then=F(field)), default=Value(value))
+
+
+def record_transaction(player_id, amount_usd, coins, created_at):
+    _apply(
+        player_id,
+        total_spent_usd=F("total_spent_usd") + amount_usd,
+        coins_purchased=F("coins_purchased") + coins,
+        completed_transactions=F("completed_transactions") + 1,
+        last_transaction_at=_latest("last_transaction_at", created_at),
+    )
+
+
+def record_purchase(purchase):
+    _apply(
+        purchase.player_id,
+        coins_spent=F("coins_spent") + purchase.used_coins,
+        purchase_count=F("purchase_count") + 1,
+        last_purchase_at=_latest("last_purchase_at", purchase.created_at),
+    )
+
+
+def record_dino_owned(player_id):
+    _apply(player_id, dinos_owned=F("dinos_owned") + 1)
+
+
+def record_dino_removed(player_id):
+    # No row is created here: the player's own summary may be going away in
+    # the same cascade, and a missing row is rebuilt from OwnedDino anyway.
+    PlayerSummary.objects.filter(player_id=player_id).update(dinos_owned=F("dinos_owned") - 1)
+
+
+def compute(player_ids):
+    """Fresh (unsaved) PlayerSummary objects for the given players."""
+    summaries = {pk: PlayerSummary(player_id=pk) for pk in player_ids}
+
+    transactions = (
+        Transaction.objects.filter(player_id__in=player_ids, status="completed")
+        .values("player_id")
+        .annotate(
+            total_spent_usd=Sum("amount_usd"),
+            coins_purchased=Sum("coins_purchased"),
+            completed_transactions=Count("id"),
+            last_transaction_at=Max("created_at"),
+        )
+    )
+    purchases = (
+        Purchase.objects.filter(player_id__in=player_ids)
+        .values("player_id")
+        .annotate(
+            coins_spent=Sum("used_coins"),
+            purchase_count=Count("id"),
+            last_purchase_at=Max("created_at"),
+        )
+    )
+    owned = (
+        OwnedDino.objects.filter(player_id__in=player_ids)
+        .values("player_id")
+        .annotate(dinos_owned=Count("id"))
+    )
+    for row in [*transactions, *purchases, *owned]:
+        summary = summaries[row.pop("player_id")]
+        for field, value in row.items():
+            setattr(summary, field, value)
+    return list(summaries.values())
+
+
+def _differs(stored, fresh):
+    return any(getattr(stored, field) != getattr(fresh, field) for field in SUMMARY_FIELDS)
+
+
+def build(player_id):
+    """
+    Create a missing summary row from the player's history. Returns False if
+    the player already had one.
+    """
+    try:
+        with transaction.atomic():
+            compute([player_id])[0].save(force_insert=True)
+    except IntegrityError:
+        return False
+    return True
+
+
+def rebuild(batch_size=500, player_ids=None, dry_run=False):
+    """
+    Recompute summaries in batches of players, upserting each batch with a
+    single statement. Returns (players checked, summaries that were missing
+    or differed from the recomputed values).
+    """
+    players = PlayerProfile.objects.order_by("pk").values_list("pk", flat=True)
+    if player_ids is not None:
+        players = players.filter(pk__in=player_ids)
+
+    checked, drifted = 0, []
+    last_pk = 0
+    while True:
+        batch = list(players.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            break
+        last_pk = batch[-1]
+
+        fresh = compute(batch)
+        stored = PlayerSummary.objects.in_bulk(batch)
+        # A player with no activity and no row yet is not drift: the row is
+        # created on first use with the same all-zero defaults.
+        drifted.extend(
+            summary.player_id for summary in fresh
+            if _differs(stored.get(summary.player_id) or PlayerSummary(), summary)
+        )
+        if not dry_run:
+            PlayerSummary.objects.bulk_create(
+                fresh, update_conflicts=True, unique_fields=["player"],
+                update_fields=[*SUMMARY_FIELDS, "updated_at"],
+            )
+        checked += len(batch)
+    return checked, drifted
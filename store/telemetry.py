@@ -0,0 +1,97 @@
+import json
+
+from django.db import transaction
+
+from .models import DinoSlot
+
+
+# ------------------------------------------------------------
+# SLOT STAT INGESTION
+# ------------------------------------------------------------
+# Game servers push stat ticks for many slots at once. Items are validated up
+# front, then applied chunk by chunk with one SELECT and a bulk_update per set
+# of fields sent, instead of a save() per slot.
+STAT_FIELDS = ("growth", "health", "stamina", "hunger", "thirst")
+STAT_MAX = 2147483647  # PositiveIntegerField's upper bound on every backend
+
+
+class PayloadError(ValueError):
+    pass
+
+
+def parse_updates(body, content_type):
+    """Decode a JSON array or NDJSON (one object per line) request body."""
+    try:
+        text = body.decode("utf-8")
+        if content_type == "application/x-ndjson":
+            return [json.loads(line) for line in text.splitlines() if line.strip()]
+        items = json.loads(text)
+    except (UnicodeDecodeError, ValueError) as exc:
+        raise PayloadError(f"Malformed body: {exc}")
+
+    if not isinstance(items, list):
+        raise PayloadError("Expected a JSON array of slot updates.")
+    return items
+
+
+def _validate(item):
+    if not isinstance(item, dict):
+        return None, "Update must be an object."
+    slot_id = item.get("id")
+    if not isinstance(slot_id, int) or isinstance(slot_id, bool):
+        return None, "Missing or invalid slot id."
+
+    stats = {}
+    for field in STAT_FIELDS:
+        if field not in item:
+            continue
+        value = item[field]
+        if not isinstance(value, int) or isinstance(value, bool) or not 0 <= value <= STAT_MAX:
+            return None, f"{field} must be an integer from 0 to {STAT_MAX}."
+        stats[field] = value
+    if not stats:
+        return None, "No stat fields given."
+    return (slot_id, stats), None
+
+
+def apply_slot_updates(items, chunk_size=500):
+    """
+    Apply stat updates and return one result dict per item, in input order.
+
+    Items for the same slot are applied in order, so the last one wins.
+    """
+    results = [None] * len(items)
+    valid = []
+    for index, item in enumerate(items):
+        update, error = _validate(item)
+        if error:
+            slot_id = item.get("id") if isinstance(item, dict) else None
+            results[index] = {"id": slot_id, "status": "error", "error": error}
+        else:
+            valid.append((index, update))
+
+    for start in range(0, len(valid), chunk_size):
+        chunk = valid[start:start + chunk_size]
+        with transaction.atomic():
+            slots = DinoSlot.objects.only("id", *STAT_FIELDS).in_bulk({slot_id for _, (slot_id, _) in chunk})
+            touched = {}  # slot id -> stat fields sent for it
+            for index, (slot_id, stats) in chunk:
+                slot = slots.get(slot_id)
+                if slot is None:
+                    results[index] = {"id": slot_id, "status": "error", "error": "Slot not found."}
+                    continue
+                for field, value in stats.items():
+                    setattr(slot, field, value)
+                touched.setdefault(slot_id, set()).update(stats)
+                results[index] = {"id": slot_id, "status": "ok"}
+
+            # Only write the columns each slot was sent: one bulk_update per
+            # distinct set of fields, usually just one.
+            groups = {}
+            for slot_id, fields in touched.items():
+                key = tuple(field for field in STAT_FIELDS if field in fields)
+                groups.setdefault(key, []).append(slots[slot_id])
+            for fields, group in groups.items():
+                DinoSlot.objects.bulk_update(group, fields)
+
+    return results
@@ -0,0 +1,33 @@
+from django import template
+from django.utils.html import format_html
+
+from store.images import derivative_urls
+
+
+register = template.Library()
+
+
+@register.simple_tag
+def picture(image, size, alt="", css_class="", width=None):
+    """
+    Render a pre-sized derivative of an ImageField as <picture>.
+
+    Browsers that accept WebP get the WebP copy, the rest the JPEG. Images
+    without derivatives (not yet backfilled) fall back to the original.
+    """
+    if not image:
+        return ""
+
+    urls = derivative_urls(image, size)
+    src = urls.get("jpg") or image.url
+    img = format_html(
+        '<img src="{}" alt="{}" class="{}"{}>',
+        src, alt, css_class,
+        format_html(' width="{}"', width) if width else "",
+    )
+    if "webp" not in urls:
+        return img
+    return format_html(
+        '<picture><source srcset="{}" type="image/webp">{}</picture>',
+        urls["webp"], img,
+    )
@@ -1,3 +1,1110 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from importlib import import_module
+from decimal import Decimal
+from io import BytesIO, StringIO
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
 
-# Create your tests here.
+from PIL import Image
+
+from asgiref.sync import async_to_sync
+
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.core.cache import cache, caches
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+from django.http import StreamingHttpResponse
+from django.db import connection, connections
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import (
+    PlayerProfile, PlayerGameData, PlayerSummary, Dino, DinoSlot, CoinPackage, Transaction, Purchase,
+    CoinLedgerEntry, OwnedDino, StripeEvent,
+)
+from . import checkout, ledger, steam, summaries, views, webhooks
+from .bench import baseline_path, find_regressions, Tolerance
+from .catalog import (
+    catalog_cache_stats, get_catalog_packages, get_catalog_version, reset_catalog_cache_stats,
+)
+from .images import derivative_urls
+from .management.commands.benchmark import SUITES
+from .metrics import Histogram, registry
+from .middleware import PerformanceMiddleware
+from .players import SESSION_KEY, create_player, get_player
+from .reports import headline_counts
+from .stubs import StubOpenIDServer, StubSteamWebAPI, StubStripeServer
+from .templatetags.store_images import picture
+
+
+# The players and steam_profiles caches are file based and shared with the
+# running site; tests get throwaway in-memory ones instead.
+LOCAL_CACHES = {
+    **settings.CACHES,
+    "players": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "test-players"},
+    "steam_profiles": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "test-steam-profiles"},
+}
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class QueryBudgetTestCase(TestCase):
+    """
+    Asserts that a page costs the same number of queries no matter how many
+    rows it shows. Each check renders the page once, adds rows, and renders
+    it again; any per-row query (an N+1) makes the two counts differ.
+    """
+
+    def setUp(self):
+        caches["players"].clear()  # profile rows outlive the rolled-back test data
+
+    def count_queries(self, url):
+        self.client.get(url)  # warm per-process caches (catalog, sessions)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def assertQueriesDoNotGrow(self, url, add_rows):
+        before = self.count_queries(url)
+        add_rows()
+        after = self.count_queries(url)
+        self.assertEqual(before, after, f"{url} went from {before} to {after} queries after adding rows")
+
+    def make_player(self, name, **kwargs):
+        user = User.objects.create(username=name)
+        return PlayerProfile.objects.create(user=user, steam_id=name, **kwargs)
+
+
+class StorePageQueryBudgetTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.player = self.make_player("budget")
+        session = self.client.session
+        session["steam_id"] = self.player.steam_id
+        session.save()
+
+    def add_slots(self, count=10):
+        dinos = [Dino.objects.create(name=f"Dino {i}", gender="Male") for i in range(count)]
+        DinoSlot.objects.bulk_create(
+            DinoSlot(player=self.player, server_name=f"Server {i}", active_dino=dino)
+            for i, dino in enumerate(dinos)
+        )
+
+    def test_main_page(self):
+        self.assertQueriesDoNotGrow(reverse("store:main_page"), self.add_slots)
+
+    def test_player_dashboard(self):
+        url = reverse("store:player_dashboard", args=[self.player.steam_id])
+        self.assertQueriesDoNotGrow(url, self.add_slots)
+
+    def test_catalog_fragments_follow_catalog_version(self):
+        raptor = Dino.objects.create(name="Raptor")
+        url = reverse("store:main_page")
+        self.assertContains(self.client.get(url), "Raptor")
+
+        reset_catalog_cache_stats()
+        self.client.get(url)
+        stats = catalog_cache_stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (0, 0))  # served from the fragments
+
+        raptor.name = "Utahraptor"
+        raptor.save()
+        self.assertContains(self.client.get(url), "Utahraptor")
+
+    def test_unbumped_catalog_changes_expire(self):
+        # What another worker sees: the version bump stayed in the per-process
+        # cache of the worker that made the change.
+        raptor = Dino.objects.create(name="Raptor")
+        url = reverse("store:main_page")
+        with self.settings(CATALOG_CACHE_TIMEOUT=1):
+            self.assertContains(self.client.get(url), "Raptor")
+            Dino.objects.filter(pk=raptor.pk).update(name="Utahraptor")
+            self.assertNotContains(self.client.get(url), "Utahraptor")
+            # Move the in-memory caches' clock past the timeout instead of sleeping.
+            with mock.patch("django.core.cache.backends.locmem.time") as clock:
+                clock.time.return_value = time.time() + 2
+                self.assertContains(self.client.get(url), "Utahraptor")
+
+
+class CatalogAdminTests(TestCase):
+    def call(self, view, *args, data=None):
+        # Called directly: Django admin's admin/ prefix shadows these routes.
+        request = RequestFactory().post("/", data or {})
+        request.user = User.objects.create_superuser(f"admin{User.objects.count()}", "admin@example.com", "pw")
+        request.session = {}
+        request._messages = FallbackStorage(request)
+        return view(request, *args)
+
+    def test_each_change_bumps_the_version_once(self):
+        package = CoinPackage.objects.create(name="Starter", coins_amount=100, price_usd=4.99)
+        version = get_catalog_version()
+        response = self.call(
+            views.edit_package_admin, package.pk, data={"name": "Starter+", "coins_amount": 120, "price_usd": "4.99"},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(get_catalog_version(), version + 1)
+        self.assertEqual(get_catalog_packages()[0].name, "Starter+")
+        self.call(views.delete_package_admin, package.pk)
+        self.assertEqual(get_catalog_version(), version + 2)
+        self.assertEqual(get_catalog_packages(), [])
+
+
+class AdminQueryBudgetTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        admin_user = User.objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.force_login(admin_user)
+
+    def add_transactions(self, count=10):
+        for i in range(count):
+            player = self.make_player(f"txn_{i}")
+            Transaction.objects.create(player=player, amount_usd=Decimal("2.00"), coins_purchased=1)
+            Purchase.objects.create(player=player, dino=Dino.objects.create(name=f"Dino {i}"))
+
+    def test_transaction_changelist(self):
+        self.assertQueriesDoNotGrow(reverse("admin:store_transaction_changelist"), self.add_transactions)
+
+    def test_purchase_changelist(self):
+        self.assertQueriesDoNotGrow(reverse("admin:store_purchase_changelist"), self.add_transactions)
+
+    def test_player_profile_changelist(self):
+        self.assertQueriesDoNotGrow(reverse("admin:store_playerprofile_changelist"), self.add_transactions)
+
+    def test_admin_dashboard(self):
+        self.assertQueriesDoNotGrow(reverse("store:admin-dashboard"), self.add_transactions)
+
+    def test_ledger_changelist(self):
+        def add_entries():
+            for i in range(10):
+                ledger.credit(self.make_player(f"ledger_{i}"), 5, "admin_adjustment")
+
+        self.assertQueriesDoNotGrow(reverse("admin:store_coinledgerentry_changelist"), add_entries)
+
+    def test_ledger_entries_are_read_only(self):
+        entry = ledger.credit(self.make_player("ledger"), 5, "admin_adjustment")
+        self.assertEqual(self.client.get(reverse("admin:store_coinledgerentry_add")).status_code, 403)
+        change_url = reverse("admin:store_coinledgerentry_change", args=[entry.pk])
+        self.assertNotContains(self.client.get(change_url), 'name="_save"')
+        self.client.post(change_url, {"player": entry.player_id, "delta": 500, "reason": "admin_adjustment"})
+        self.assertEqual(CoinLedgerEntry.objects.get(pk=entry.pk).delta, 5)
+        delete_url = reverse("admin:store_coinledgerentry_delete", args=[entry.pk])
+        self.assertEqual(self.client.post(delete_url, {"post": "yes"}).status_code, 403)
+
+
+class AdminDashboardTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()  # revenue totals are cached between requests
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "pw"))
+        self.players = [self.make_player(f"7656{i:04d}", steam_name=f"Raptor {i}") for i in range(5)]
+
+    def test_keyset_pagination(self):
+        url = reverse("store:admin-dashboard")
+        with self.settings(ADMIN_DASHBOARD_PAGE_SIZE=2):
+            first = self.client.get(url)
+            self.assertEqual([p.pk for p in first.context["players"]], [p.pk for p in self.players[:2]])
+            second = self.client.get(url, {"after": first.context["next_after"]})
+            self.assertEqual([p.pk for p in second.context["players"]], [p.pk for p in self.players[2:4]])
+            last = self.client.get(url, {"after": second.context["next_after"]})
+            self.assertEqual([p.pk for p in last.context["players"]], [self.players[4].pk])
+            self.assertIsNone(last.context["next_after"])
+
+    def test_headline_counts_cost_one_query(self):
+        Dino.objects.create(name="Raptor")
+        with self.assertNumQueries(1):
+            counts = headline_counts()
+        self.assertEqual(counts, {"player_count": 5, "dino_count": 1, "package_count": 0})
+
+    def test_search(self):
+        response = self.client.get(reverse("store:admin-dashboard"), {"q": "raptor 3"})
+        self.assertEqual([p.pk for p in response.context["players"]], [self.players[3].pk])
+
+    def test_headline_figures(self):
+        Transaction.objects.create(player=self.players[0], amount_usd=Decimal("4.00"), coins_purchased=2, status="completed")
+        Transaction.objects.create(player=self.players[1], amount_usd=Decimal("2.00"), coins_purchased=1)
+        response = self.client.get(reverse("store:admin-dashboard"))
+        self.assertEqual(response.context["player_count"], 5)
+        self.assertEqual((response.context["dino_count"], response.context["package_count"]), (0, 0))
+        self.assertEqual(response.context["revenue_usd"], Decimal("4.00"))
+        self.assertEqual(response.context["coins_sold"], 2)
+        self.assertEqual(response.context["pending_count"], 1)
+
+
+class PlayerSummaryTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.player = self.make_player("summary", coins=100)
+        self.raptor = Dino.objects.create(name="Raptor", gender="Male")
+
+    def buy(self, dino):
+        purchase = Purchase.objects.create(player=self.player, dino=dino, used_coins=dino.coin_cost)
+        OwnedDino.objects.get_or_create(player=self.player, dino=dino, defaults={"purchase": purchase})
+
+    def test_incremental_updates_match_rebuild(self):
+        for session_id in ("cs_1", "cs_2"):
+            Transaction.objects.create(
+                player=self.player, amount_usd=Decimal("4.50"), coins_purchased=3, stripe_session_id=session_id,
+            )
+            ledger.complete_checkout_session(session_id)
+        ledger.complete_checkout_session("cs_1")  # replayed webhook: counted once
+        self.buy(self.raptor)
+        self.buy(self.raptor)
+
+        summary = PlayerSummary.objects.get(player=self.player)
+        self.assertEqual(summary.total_spent_usd, Decimal("9.00"))
+        self.assertEqual(summary.coins_purchased, 6)
+        self.assertEqual(summary.completed_transactions, 2)
+        self.assertEqual(summary.purchase_count, 2)
+        self.assertEqual(summary.dinos_owned, 1)
+        self.assertEqual(summary.coins_spent, 2 * self.raptor.coin_cost)
+
+        checked, drifted = summaries.rebuild(dry_run=True)
+        self.assertEqual((checked, drifted), (1, []))
+
+    def test_dinos_owned_follows_the_inventory(self):
+        self.buy(self.raptor)
+        rex = Dino.objects.create(name="Rex")
+        OwnedDino.objects.create(player=self.player, dino=rex)  # granted, never bought
+        Purchase.objects.create(player=self.player, dino=Dino.objects.create(name="Refunded"), used_coins=1)
+        self.assertEqual(PlayerSummary.objects.get(player=self.player).dinos_owned, 2)
+
+        OwnedDino.objects.filter(dino=self.raptor).delete()
+        rex.delete()
+        summary = PlayerSummary.objects.get(player=self.player)
+        self.assertEqual((summary.dinos_owned, summary.purchase_count), (0, 2))
+        self.assertEqual(summaries.rebuild(dry_run=True)[1], [])
+
+    def test_deleting_a_player_with_dinos(self):
+        self.buy(self.raptor)
+        self.player.delete()
+        self.assertFalse(PlayerSummary.objects.exists())
+
+    def history_without_summary(self):
+        for i in range(3):
+            Transaction.objects.create(
+                player=self.player, amount_usd=Decimal("10.00"), coins_purchased=10,
+                stripe_session_id=f"cs_old_{i}", status="completed",
+            )
+        self.buy(self.raptor)
+        PlayerSummary.objects.all().delete()  # history from before the summary table
+
+    def test_first_change_after_history_builds_the_row(self):
+        self.history_without_summary()
+        Transaction.objects.create(
+            player=self.player, amount_usd=Decimal("5.00"), coins_purchased=5, stripe_session_id="cs_new",
+        )
+        ledger.complete_checkout_session("cs_new")
+        self.buy(Dino.objects.create(name="Rex"))
+
+        summary = PlayerSummary.objects.get(player=self.player)
+        self.assertEqual(summary.total_spent_usd, Decimal("35.00"))
+        self.assertEqual((summary.completed_transactions, summary.purchase_count, summary.dinos_owned), (4, 2, 2))
+        self.assertEqual(summaries.rebuild(dry_run=True)[1], [])
+
+    def test_backfill_migration(self):
+        self.history_without_summary()
+        PlayerSummary.objects.create(player=self.make_player("wrong"), purchase_count=9)
+        backfill = import_module("store.migrations.0014_backfill_player_summaries").backfill_player_summaries
+        backfill(django_apps, None)
+        self.assertEqual(PlayerSummary.objects.get(player=self.player).total_spent_usd, Decimal("30.00"))
+        self.assertEqual(summaries.rebuild(dry_run=True)[1], [])
+
+    def test_rebuild_repairs_drift(self):
+        self.buy(self.raptor)
+        PlayerSummary.objects.filter(player=self.player).update(dinos_owned=7)
+        self.assertEqual(summaries.rebuild()[1], [self.player.pk])
+        self.assertEqual(PlayerSummary.objects.get(player=self.player).dinos_owned, 1)
+        self.assertEqual(summaries.rebuild(dry_run=True)[1], [])
+
+    def test_dashboard_builds_missing_summary(self):
+        self.buy(self.raptor)
+        PlayerSummary.objects.all().delete()
+        response = self.client.get(reverse("store:player_dashboard", args=[self.player.steam_id]))
+        self.assertEqual(response.context["summary"].dinos_owned, 1)
+
+
+class SessionPlayerTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.player = self.make_player("76561190000000001", coins=50)
+        self.dino = Dino.objects.create(name="Raptor", gender="Male")
+        session = self.client.session
+        session["steam_id"] = self.player.steam_id  # session from before player_id was stored
+        session.save()
+
+    def profile_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(url)
+        table = PlayerProfile._meta.db_table
+        return [q["sql"] for q in ctx.captured_queries if q["sql"].startswith("SELECT") and f'FROM "{table}"' in q["sql"]]
+
+    def test_legacy_session_is_upgraded_and_cached(self):
+        url = reverse("store:main_page")
+        self.assertEqual(len(self.profile_queries(url)), 1)
+        self.assertEqual(self.client.session[SESSION_KEY], self.player.pk)
+        self.assertEqual(self.profile_queries(url), [])
+
+    def test_balance_change_invalidates_cached_profile(self):
+        url = reverse("store:main_page")
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            ledger.credit(self.player, 25, "admin_adjustment")
+        response = self.client.get(url)
+        self.assertEqual(response.context["coin_balance"], 75)
+
+    def test_cache_holds_only_what_the_pages_use(self):
+        self.player.user.email = "player@example.com"
+        self.player.user.set_password("secret")
+        self.player.user.save()
+        PlayerProfile.objects.filter(pk=self.player.pk).update(avatar_image_derivatives={"source": "a.png"})
+        get_player(self.player.pk)
+        row = caches["players"].get(f"player:{self.player.pk}")
+        self.assertIsInstance(row, tuple)
+        self.assertNotIn(self.player.user.password, row)
+
+        with self.assertNumQueries(0):
+            player = get_player(self.player.pk)
+            self.assertEqual((player.pk, player.steam_id, player.coins), (self.player.pk, self.player.steam_id, 50))
+            self.assertEqual((player.user.username, player.user.email), ("76561190000000001", "player@example.com"))
+            self.assertEqual(player.avatar_image_derivatives, {"source": "a.png"})
+            self.assertFalse(player.avatar_image)
+        with self.assertNumQueries(1):
+            self.assertTrue(player.user.check_password("secret"))  # deferred, loaded on demand
+
+    def test_requires_login(self):
+        self.client.cookies.clear()
+        response = self.client.get(reverse("store:buy_dino", args=[self.dino.pk]))
+        self.assertRedirects(response, reverse("store:login-page"), fetch_redirect_response=False)
+
+
+class AsyncViewTests(QueryBudgetTestCase):
+    """steam_verify and buy_coins against the local Steam and Stripe stubs."""
+
+    def test_steam_verify_logs_in(self):
+        claimed = "https://steamcommunity.com/openid/id/76561198000000042"
+        with StubOpenIDServer() as steam, self.settings(STEAM_OPENID_URL=steam.url):
+            response = self.client.get(reverse("store:steam-verify"), {
+                "openid.mode": "id_res", "openid.claimed_id": claimed, "openid.identity": claimed,
+            })
+        self.assertRedirects(response, reverse("store:main_page"), fetch_redirect_response=False)
+        player = PlayerProfile.objects.get(steam_id="76561198000000042")
+        self.assertEqual(self.client.session[SESSION_KEY], player.pk)
+
+    def verify(self, steam_id):
+        claimed = f"https://steamcommunity.com/openid/id/{steam_id}"
+        with StubOpenIDServer() as steam, self.settings(STEAM_OPENID_URL=steam.url):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(reverse("store:steam-verify"), {
+                    "openid.mode": "id_res", "openid.claimed_id": claimed, "openid.identity": claimed,
+                })
+        self.assertRedirects(response, reverse("store:main_page"), fetch_redirect_response=False)
+        inserts = [
+            q["sql"].split('"')[1] for q in ctx.captured_queries
+            if q["sql"].startswith("INSERT") and "django_session" not in q["sql"]
+        ]
+        return inserts
+
+    def test_first_login_creates_player_in_one_pass(self):
+        inserts = self.verify("76561198000000046")
+        self.assertEqual(inserts, ["auth_user", "store_playerprofile", "store_playergamedata"])
+        player = PlayerProfile.objects.select_related("user", "playergamedata").get(steam_id="76561198000000046")
+        self.assertEqual(player.user.username, "steam_76561198000000046")
+        self.assertFalse(player.user.has_usable_password())
+
+    def test_returning_login_creates_nothing(self):
+        player = self.make_player("76561198000000047")
+        password = player.user.password
+        self.assertEqual(self.verify("76561198000000047"), [])
+        player.user.refresh_from_db()
+        self.assertEqual(player.user.password, password)
+        self.assertEqual(self.client.session[SESSION_KEY], player.pk)
+
+    def test_create_player_fills_in_missing_rows(self):
+        user = User.objects.create(username="steam_76561198000000048")
+        player = create_player("76561198000000048")
+        self.assertEqual(player.user, user)
+        self.assertTrue(PlayerGameData.objects.filter(player=player).exists())
+        self.assertEqual(create_player("76561198000000048"), player)
+
+    def test_create_player_when_the_steam_username_is_taken(self):
+        # A player whose SteamID changed still owns the steam_<id> User.
+        taken = self.make_player("76561198000000052")
+        taken.user.username = "steam_76561198000000053"
+        taken.user.save()
+        player = create_player("76561198000000053")
+        self.assertNotEqual(player.user, taken.user)
+        self.assertTrue(player.user.username.startswith("steam_76561198000000053_"))
+        self.assertEqual(PlayerProfile.objects.get(pk=taken.pk).steam_id, "76561198000000052")
+
+    def test_buy_coins_creates_pending_transaction(self):
+        player = self.make_player("76561198000000043")
+        package = CoinPackage.objects.create(name="Starter", coins_amount=100, price_usd=4.99)
+        session = self.client.session
+        session["steam_id"] = player.steam_id
+        session.save()
+
+        with StubStripeServer() as stripe_stub, self.settings(STRIPE_API_BASE=stripe_stub.url):
+            response = self.client.get(reverse("store:buy_coins", args=[package.pk]))
+        txn = Transaction.objects.get(player=player)
+        self.assertEqual((txn.status, txn.coins_purchased, txn.package), ("pending", 100, package))
+        self.assertEqual(response.status_code, 303)
+        self.assertEqual(response["Location"], f"https://checkout.stripe.test/c/pay/{txn.stripe_session_id}")
+
+    def test_buy_coins_reuses_open_session(self):
+        player = self.make_player("76561198000000044")
+        starter = CoinPackage.objects.create(name="Starter", coins_amount=100, price_usd=4.99)
+        mega = CoinPackage.objects.create(name="Mega", coins_amount=1000, price_usd=39.99)
+        session = self.client.session
+        session["steam_id"] = player.steam_id
+        session.save()
+
+        with StubStripeServer() as stripe_stub, self.settings(STRIPE_API_BASE=stripe_stub.url):
+            first = self.client.get(reverse("store:buy_coins", args=[starter.pk]))
+            again = self.client.get(reverse("store:buy_coins", args=[starter.pk]))
+            self.client.get(reverse("store:buy_coins", args=[mega.pk]))
+            requests = stripe_stub.requests
+
+        self.assertEqual(first["Location"], again["Location"])
+        self.assertEqual(requests, 2)
+        self.assertEqual(Transaction.objects.filter(player=player, status="pending").count(), 2)
+
+    def test_buy_coins_again_after_paying(self):
+        player = self.make_player("76561198000000049")
+        starter = CoinPackage.objects.create(name="Starter", coins_amount=100, price_usd=4.99)
+        session = self.client.session
+        session["steam_id"] = player.steam_id
+        session.save()
+
+        with StubStripeServer() as stripe_stub, self.settings(STRIPE_API_BASE=stripe_stub.url):
+            first = self.client.get(reverse("store:buy_coins", args=[starter.pk]))
+            paid = Transaction.objects.get(player=player)
+            stripe_stub.pay(paid.stripe_session_id)
+            self.assertTrue(ledger.complete_checkout_session(paid.stripe_session_id))
+            again = self.client.get(reverse("store:buy_coins", args=[starter.pk]))
+
+        self.assertNotEqual(first["Location"], again["Location"])
+        fresh = Transaction.objects.get(player=player, status="pending")
+        self.assertEqual(again["Location"], fresh.checkout_url)
+        self.assertNotEqual(fresh.stripe_session_id, paid.stripe_session_id)
+
+    def test_wsgi_requests_close_their_http_clients(self):
+        player = self.make_player("76561198000000050")
+        package = CoinPackage.objects.create(name="Starter", coins_amount=100, price_usd=4.99)
+        session = self.client.session
+        session["steam_id"] = player.steam_id
+        session.save()
+
+        with StubStripeServer() as stripe_stub, self.settings(STRIPE_API_BASE=stripe_stub.url):
+            self.assertEqual(self.client.get(reverse("store:buy_coins", args=[package.pk])).status_code, 303)
+            self.assertEqual(len(checkout.get_checkout()._clients._clients), 0)
+        claimed = "https://steamcommunity.com/openid/id/76561198000000051"
+        with StubOpenIDServer() as steam_stub, self.settings(STEAM_OPENID_URL=steam_stub.url):
+            self.client.get(reverse("store:steam-verify"), {
+                "openid.mode": "id_res", "openid.claimed_id": claimed, "openid.identity": claimed,
+            })
+            self.assertEqual(len(steam.get_verifier()._async_clients._clients), 0)
+
+    def test_sweeper_expires_stale_sessions(self):
+        player = self.make_player("76561198000000045")
+        now = timezone.now()
+        for session_id, expires_at in [("cs_old", now - timedelta(minutes=1)), ("cs_open", now + timedelta(minutes=20))]:
+            Transaction.objects.create(
+                player=player, amount_usd=Decimal("4.99"), coins_purchased=100,
+                stripe_session_id=session_id, expires_at=expires_at,
+            )
+        self.assertEqual(checkout.expire_stale_sessions(), 1)
+        self.assertEqual(Transaction.objects.get(stripe_session_id="cs_old").status, "expired")
+
+        # A payment that lands after the sweep still completes and credits.
+        self.assertTrue(ledger.complete_checkout_session("cs_old"))
+        player.refresh_from_db()
+        self.assertEqual(player.coins, 100)
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class LedgerTests(TransactionTestCase):
+    """Balances and ledger entries, checked against committed data."""
+
+    def setUp(self):
+        caches["players"].clear()
+        user = User.objects.create(username="ledger")
+        self.player = PlayerProfile.objects.create(user=user, steam_id="76561198000000060", coins=100)
+
+    def assertLedgerMatchesBalance(self):
+        self.player.refresh_from_db()
+        entries = CoinLedgerEntry.objects.filter(player=self.player)
+        self.assertEqual(100 + sum(entries.values_list("delta", flat=True)), self.player.coins)
+
+    def test_credit_and_debit_write_one_entry_each(self):
+        entry = ledger.credit(self.player, 50, "admin_adjustment", reference="ticket:1")
+        self.assertEqual((entry.delta, entry.reason, entry.reference), (50, "admin_adjustment", "ticket:1"))
+        entry = ledger.debit(self.player.pk, 30, "dino_purchase")
+        self.assertEqual(entry.delta, -30)
+        self.assertEqual(CoinLedgerEntry.objects.filter(player=self.player).count(), 2)
+        self.assertLedgerMatchesBalance()
+        self.assertEqual(self.player.coins, 120)
+
+    def test_amounts_must_be_positive(self):
+        for change in (ledger.credit, ledger.debit):
+            with self.assertRaises(ValueError):
+                change(self.player, 0, "admin_adjustment")
+        self.assertFalse(CoinLedgerEntry.objects.exists())
+
+    def test_overdraft_raises_and_changes_nothing(self):
+        with self.assertRaises(ledger.InsufficientCoins):
+            ledger.debit(self.player, 101, "dino_purchase")
+        self.assertFalse(CoinLedgerEntry.objects.exists())
+        self.assertLedgerMatchesBalance()
+        self.assertEqual(self.player.coins, 100)
+
+    def test_credit_for_a_missing_player(self):
+        with self.assertRaises(PlayerProfile.DoesNotExist):
+            ledger.credit(self.player.pk + 1, 10, "admin_adjustment")
+        self.assertFalse(CoinLedgerEntry.objects.exists())
+
+    def test_concurrent_debits_never_overdraw(self):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest("the in-memory SQLite test database fails concurrent writers instead of waiting")
+        def spend(_):
+            try:
+                ledger.debit(self.player.pk, 30, "dino_purchase")
+                return True
+            except ledger.InsufficientCoins:
+                return False
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(4) as pool:
+            results = list(pool.map(spend, range(8)))
+        self.assertEqual(results.count(True), 3)
+        self.assertLedgerMatchesBalance()
+        self.assertEqual(self.player.coins, 10)
+
+    def test_cached_player_is_dropped_after_commit(self):
+        self.assertEqual(get_player(self.player.pk).coins, 100)
+        ledger.credit(self.player, 5, "admin_adjustment")
+        self.assertEqual(get_player(self.player.pk).coins, 105)
+
+
+class BenchmarkBaselineTests(TestCase):
+    def test_regressions_follow_each_metrics_tolerance(self):
+        tolerances = {
+            "p95_ms": Tolerance(0.25),
+            "queries": Tolerance(0.0),
+            "rps": Tolerance(0.25, higher_is_better=True),
+        }
+        baseline = {"main": {"p95_ms": 10.0, "queries": 4, "rps": 100.0, "p50_ms": 5.0}}
+        steady = {"main": {"p95_ms": 12.5, "queries": 4, "rps": 75.0, "p50_ms": 50.0}, "new row": {"queries": 9}}
+        self.assertEqual(find_regressions(tolerances, baseline, steady), [])
+        worse = {"main": {"p95_ms": 12.6, "queries": 5, "rps": 74.0}}
+        self.assertEqual(find_regressions(tolerances, baseline, worse), [
+            "main p95_ms: 10.0 -> 12.6", "main queries: 4 -> 5", "main rps: 100.0 -> 74.0",
+        ])
+
+    def test_committed_baselines_cover_every_suite(self):
+        for name, suite in SUITES.items():
+            with open(baseline_path(name)) as handle:
+                baseline = json.load(handle)
+            self.assertEqual(baseline["meta"]["suite"], name)
+            compared = {metric for values in baseline["results"].values() for metric in values}
+            self.assertLessEqual(set(suite.tolerances), compared, name)
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class WebhookInboxTests(TestCase):
+    def event(self, event_id, event_type="checkout.session.completed", session_id="cs_none"):
+        return {"id": event_id, "type": event_type, "data": {"object": {"id": session_id}}}
+
+    def test_enqueue_ignores_redelivered_events(self):
+        webhooks.enqueue_event(self.event("evt_1"))
+        webhooks.enqueue_event(self.event("evt_1"))
+        self.assertEqual(StripeEvent.objects.count(), 1)
+
+    def test_claims_do_not_overlap(self):
+        for i in range(5):
+            webhooks.enqueue_event(self.event(f"evt_{i}"))
+        first = webhooks.claim_batch(3, "worker-a")
+        second = webhooks.claim_batch(3, "worker-b")
+        self.assertEqual([e.event_id for e in first], ["evt_0", "evt_1", "evt_2"])
+        self.assertEqual([e.event_id for e in second], ["evt_3", "evt_4"])
+        self.assertEqual(webhooks.claim_batch(3, "worker-c"), [])
+        self.assertTrue(all(e.status == "processing" and e.attempts == 1 for e in first + second))
+
+    def test_failures_retry_until_max_attempts(self):
+        def fail(payload):
+            raise RuntimeError("boom")
+
+        webhooks.enqueue_event(self.event("evt_fail", "test.fail"))
+        with mock.patch.dict(webhooks.HANDLERS, {"test.fail": fail}):
+            for attempt in range(1, 4):
+                [event] = webhooks.claim_batch(10)
+                with self.assertLogs("store.webhooks", "ERROR"):
+                    self.assertFalse(webhooks.process_event(event, max_attempts=3))
+                event.refresh_from_db()
+                self.assertEqual(event.attempts, attempt)
+                self.assertEqual(event.status, "failed" if attempt == 3 else "pending")
+        self.assertIn("boom", event.last_error)
+        self.assertEqual(webhooks.claim_batch(10), [])
+
+    def test_processing_completes_the_transaction(self):
+        player = PlayerProfile.objects.create(user=User.objects.create(username="payer"), steam_id="payer")
+        Transaction.objects.create(
+            player=player, amount_usd=Decimal("4.99"), coins_purchased=100, stripe_session_id="cs_paid",
+        )
+        webhooks.enqueue_event(self.event("evt_paid", session_id="cs_paid"))
+        [event] = webhooks.claim_batch(10)
+        self.assertTrue(webhooks.process_event(event))
+        event.refresh_from_db()
+        player.refresh_from_db()
+        self.assertEqual((event.status, player.coins), ("processed", 100))
+
+    def test_stale_claims_are_released(self):
+        webhooks.enqueue_event(self.event("evt_1"))
+        webhooks.enqueue_event(self.event("evt_2"))
+        webhooks.claim_batch(1, "crashed")
+        StripeEvent.objects.filter(event_id="evt_1").update(claimed_at=timezone.now() - timedelta(minutes=10))
+        webhooks.claim_batch(1, "alive")
+        self.assertEqual(webhooks.release_stale_claims(300), 1)
+        self.assertEqual(
+            dict(StripeEvent.objects.values_list("event_id", "status")),
+            {"evt_1": "pending", "evt_2": "processing"},
+        )
+
+
+class ReconcileStripeTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.player = self.make_player("76561198000000050")
+        self.stripe = StubStripeServer().start()
+        self.addCleanup(self.stripe.stop)
+        self.checkpoint = os.path.join(tempfile.mkdtemp(), "reconcile.json")
+
+    def add_transaction(self, paid, status="pending", created=None):
+        session = self.stripe.create_session(created=created)
+        if paid:
+            self.stripe.pay(session["id"])
+        return Transaction.objects.create(
+            player=self.player, amount_usd=Decimal("4.99"), coins_purchased=100,
+            stripe_session_id=session["id"], status=status,
+        )
+
+    def reconcile(self):
+        with self.settings(STRIPE_API_BASE=self.stripe.url):
+            call_command(
+                "reconcile_stripe", "--min-age=0", "--chunk-size=2", f"--checkpoint={self.checkpoint}",
+                stdout=StringIO(),
+            )
+
+    def test_completes_paid_sessions_in_chunks(self):
+        paid = [self.add_transaction(paid=True) for _ in range(2)]
+        expired = self.add_transaction(paid=True, status="expired")
+        unpaid = self.add_transaction(paid=False)
+        done = self.add_transaction(paid=True, status="completed")
+
+        self.reconcile()
+
+        statuses = dict(Transaction.objects.values_list("pk", "status"))
+        self.assertEqual([statuses[t.pk] for t in paid + [expired]], ["completed"] * 3)
+        self.assertEqual((statuses[unpaid.pk], statuses[done.pk]), ("pending", "completed"))
+        self.player.refresh_from_db()
+        self.assertEqual(self.player.coins, 300)
+        self.assertEqual(CoinLedgerEntry.objects.filter(player=self.player).count(), 3)
+        self.assertEqual(self.stripe.requests, 2)  # one list call per chunk of two
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_sessions_a_little_off_their_rows_clock(self):
+        later = self.add_transaction(paid=True, created=time.time() + 120)
+        earlier = self.add_transaction(paid=True, created=time.time() - 120)
+
+        self.reconcile()
+
+        statuses = dict(Transaction.objects.values_list("pk", "status"))
+        self.assertEqual((statuses[later.pk], statuses[earlier.pk]), ("completed", "completed"))
+
+    def test_resumes_after_checkpoint(self):
+        first, second = self.add_transaction(paid=True), self.add_transaction(paid=True)
+        with open(self.checkpoint, "w") as f:
+            f.write(f'{{"after_pk": {first.pk}}}')
+
+        self.reconcile()
+
+        statuses = dict(Transaction.objects.values_list("pk", "status"))
+        self.assertEqual((statuses[first.pk], statuses[second.pk]), ("pending", "completed"))
+
+
+class ExportTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(User.objects.create_superuser("finance", "finance@example.com", "pw"))
+        self.player = self.make_player("76561198000000060")
+        for status in ["completed", "pending", "completed"]:
+            Transaction.objects.create(player=self.player, amount_usd=Decimal("4.99"), coins_purchased=100, status=status)
+        Transaction.objects.filter(pk=Transaction.objects.order_by("pk")[0].pk).update(
+            created_at=timezone.now() - timedelta(days=10)
+        )
+        Purchase.objects.create(player=self.player, dino=Dino.objects.create(name="Raptor"), used_coins=1)
+
+    def export(self, kind, **params):
+        response = self.client.get(reverse("store:export_records", args=[kind]), params)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content).decode()
+
+    def test_csv_with_filters(self):
+        since = (timezone.localdate() - timedelta(days=1)).isoformat()
+        response, body = self.export("transactions", status="completed", since=since)
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        lines = body.splitlines()
+        self.assertEqual(lines[0], "id,created_at,steam_id,username,package,amount_usd,coins,status,stripe_session_id")
+        self.assertEqual(len(lines), 2)  # the other completed row is older than since
+        self.assertIn(",76561198000000060,76561198000000060,,4.99,100,completed,", lines[1])
+
+    def test_ndjson_purchases(self):
+        _, body = self.export("purchases", format="ndjson")
+        record = json.loads(body)
+        self.assertEqual((record["dino"], record["coins"], record["steam_id"]), ("Raptor", 1, "76561198000000060"))
+
+    def test_rejects_bad_filters_and_non_staff(self):
+        url = reverse("store:export_records", args=["purchases"])
+        self.assertEqual(self.client.get(url, {"status": "completed"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"since": "yesterday"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"until": "2024-02-30"}).status_code, 400)
+        self.client.force_login(User.objects.create(username="player"))
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+    def test_command_matches_endpoint(self):
+        out = StringIO()
+        call_command("export_records", "transactions", stdout=out)
+        _, body = self.export("transactions")
+        self.assertEqual(out.getvalue(), body)
+
+
+class PerformanceMetricsTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        registry.reset()
+        self.addCleanup(registry.reset)
+        self.admin = User.objects.create_superuser("ops", "ops@example.com", "pw")
+
+    def observed(self, route, key="queries"):
+        histograms = registry._routes.get(route)
+        return histograms and histograms[key]
+
+    def test_histogram_buckets_include_their_upper_bound(self):
+        histogram = Histogram((1, 5))
+        for value in (0, 1, 3, 5, 9):
+            histogram.observe(value)
+        self.assertEqual(histogram.counts, [2, 2, 1])
+        self.assertEqual((histogram.count, histogram.sum), (5, 18))
+
+    def test_exposition_format(self):
+        registry.observe('say "hi"', duration=0.02, db_time=0.001, queries=3)
+        registry.observe('say "hi"', duration=3.0, db_time=0.5, queries=300)
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse("store:metrics"))
+        self.assertEqual(response["Content-Type"], "text/plain; version=0.0.4; charset=utf-8")
+        lines = response.content.decode().splitlines()
+        self.assertIn("# TYPE isle_request_duration_seconds histogram", lines)
+        self.assertIn('isle_request_duration_seconds_bucket{view="say \\"hi\\"",le="0.01"} 0', lines)
+        self.assertIn('isle_request_duration_seconds_bucket{view="say \\"hi\\"",le="0.025"} 1', lines)
+        self.assertIn('isle_request_duration_seconds_bucket{view="say \\"hi\\"",le="10.0"} 2', lines)
+        self.assertIn('isle_request_queries_bucket{view="say \\"hi\\"",le="200"} 1', lines)
+        self.assertIn('isle_request_queries_bucket{view="say \\"hi\\"",le="+Inf"} 2', lines)
+        self.assertIn('isle_request_queries_sum{view="say \\"hi\\""} 303.000000', lines)
+        self.assertIn('isle_request_queries_count{view="say \\"hi\\""} 2', lines)
+
+    def test_metrics_are_admin_only(self):
+        self.client.force_login(User.objects.create(username="player"))
+        self.assertEqual(self.client.get(reverse("store:metrics")).status_code, 302)
+
+    def test_requests_are_recorded_under_their_url_name(self):
+        player = self.make_player("76561198000000070")
+        session = self.client.session
+        session[SESSION_KEY] = player.pk
+        session.save()
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse("store:main_page"))
+        queries = self.observed("store:main_page")
+        self.assertEqual(queries.count, 1)
+        self.assertEqual(queries.sum, len(ctx.captured_queries))
+        self.client.get("/no-such-page/")
+        self.assertEqual(self.observed("unresolved", "duration").count, 1)
+
+    def test_slow_queries_are_logged_with_their_call_site(self):
+        self.client.force_login(self.admin)
+        with self.settings(SLOW_QUERY_THRESHOLD_MS=0), self.assertLogs("store.performance", "WARNING") as logs:
+            self.client.get(reverse("store:admin-dashboard"))
+        self.assertTrue(any("Slow query" in line and "store/views.py:" in line for line in logs.output))
+
+    def test_streaming_responses_are_recorded_after_the_body(self):
+        self.client.force_login(self.admin)
+        Transaction.objects.create(
+            player=self.make_player("76561198000000071"), amount_usd=Decimal("4.99"), coins_purchased=100,
+        )
+        response = self.client.get(reverse("store:export_records", args=["transactions"]))
+        self.assertIsNone(self.observed("store:export_records"))
+        self.assertIn(b"4.99", b"".join(response.streaming_content))
+        self.assertGreaterEqual(self.observed("store:export_records").sum, 1)  # the export's own query
+
+    def test_async_streaming_responses_are_recorded_after_the_body(self):
+        async def body():
+            time.sleep(0.05)
+            yield b"done"
+
+        async def get_response(request):
+            return StreamingHttpResponse(body())
+
+        request = RequestFactory().get("/")
+        request.resolver_match = mock.Mock(view_name="stream")
+        middleware = PerformanceMiddleware(get_response)
+        response = async_to_sync(middleware)(request)
+        self.assertIsNone(self.observed("stream"))
+
+        async def consume():
+            return b"".join([chunk async for chunk in response.streaming_content])
+
+        self.assertEqual(async_to_sync(consume)(), b"done")
+        self.assertGreaterEqual(self.observed("stream", "duration").sum, 0.05)
+
+
+class InventoryTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.player = self.make_player("76561198000000070", coins=10)
+        self.raptor = Dino.objects.create(name="Raptor")
+        session = self.client.session
+        session["steam_id"] = self.player.steam_id
+        session.save()
+
+    def test_buy_dino_records_ownership_once(self):
+        url = reverse("store:buy_dino", args=[self.raptor.pk])
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(url)
+
+        self.assertEqual(OwnedDino.objects.filter(player=self.player, dino=self.raptor).count(), 1)
+        self.assertEqual(Purchase.objects.filter(player=self.player).count(), 1)
+        self.player.refresh_from_db()
+        self.assertEqual(self.player.coins, 10 - self.raptor.coin_cost)
+        self.assertFalse([q for q in ctx.captured_queries if q["sql"].startswith("INSERT")])
+
+    def test_main_page_flags_owned_dinos_in_one_query(self):
+        OwnedDino.objects.create(player=self.player, dino=self.raptor)
+        url = reverse("store:main_page")
+        self.assertQueriesDoNotGrow(url, lambda: OwnedDino.objects.bulk_create(
+            OwnedDino(player=self.player, dino=Dino.objects.create(name=f"Dino {i}")) for i in range(10)
+        ))
+        self.assertContains(self.client.get(url), f'<script id="owned-dino-ids" type="application/json">[{self.raptor.pk}, ')
+
+
+class SlotOperationTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.player = self.make_player("76561198000000080")
+        self.raptor, self.rex, self.stego = (Dino.objects.create(name=name) for name in ["Raptor", "Rex", "Stego"])
+        for dino in (self.raptor, self.rex):
+            OwnedDino.objects.create(player=self.player, dino=dino)
+        self.slots = DinoSlot.objects.bulk_create(
+            DinoSlot(player=self.player, server_name=f"Server {i}", active_dino=self.stego) for i in range(3)
+        )
+        self.stranger_slot = DinoSlot.objects.create(player=self.make_player("stranger"), server_name="Other")
+        session = self.client.session
+        session["steam_id"] = self.player.steam_id
+        session.save()
+
+    def post(self, *operations):
+        return self.client.post(
+            reverse("store:slot_operations"), json.dumps({"operations": list(operations)}),
+            content_type="application/json",
+        )
+
+    def test_applies_batch_and_returns_state(self):
+        a, b, c = self.slots
+        self.post({"op": "release", "slot": a.pk})  # warm session and player caches
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.post(
+                {"op": "assign", "slot": a.pk, "dino": self.raptor.pk},
+                {"op": "assign", "slot": b.pk, "dino": self.rex.pk},
+                {"op": "release", "slot": c.pk},
+            )
+        self.assertEqual(response.status_code, 200)
+        state = {slot["id"]: slot["active_dino"] and slot["active_dino"]["name"] for slot in response.json()["slots"]}
+        self.assertEqual(state, {a.pk: "Raptor", b.pk: "Rex", c.pk: None})
+        slot_queries = [q for q in ctx.captured_queries if "store_dinoslot" in q["sql"] or "store_owneddino" in q["sql"]]
+        self.assertEqual(len(slot_queries), 4)  # load, ownership check, bulk update, state
+
+    def test_rejects_whole_batch_on_any_error(self):
+        a, b, _ = self.slots
+        response = self.post(
+            {"op": "assign", "slot": a.pk, "dino": self.raptor.pk},
+            {"op": "assign", "slot": b.pk, "dino": self.stego.pk},
+            {"op": "release", "slot": self.stranger_slot.pk},
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([e["index"] for e in response.json()["errors"]], [1, 2])
+        self.assertEqual(set(DinoSlot.objects.filter(player=self.player).values_list("active_dino", flat=True)), {self.stego.pk})
+
+
+class SlotStatsIngestTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        player = self.make_player("76561198000000085")
+        self.slots = DinoSlot.objects.bulk_create(
+            DinoSlot(player=player, server_name=f"Server {i}") for i in range(2)
+        )
+
+    def post(self, items, key="server-key"):
+        with self.settings(GAME_SERVER_API_KEYS=["server-key"]):
+            return self.client.post(
+                reverse("store:slot_stats_ingest"), json.dumps(items), content_type="application/json",
+                HTTP_AUTHORIZATION=f"Bearer {key}",
+            )
+
+    def test_rejects_bad_keys(self):
+        for key in ["wrong", "clé-non-ascii", ""]:
+            self.assertEqual(self.post([{"id": self.slots[0].pk, "growth": 1}], key=key).status_code, 401)
+
+    def test_applies_valid_items_and_reports_the_rest(self):
+        a, b = self.slots
+        response = self.post([
+            {"id": a.pk, "growth": 40, "health": 90},
+            {"id": b.pk, "growth": 2 ** 31},
+            {"id": b.pk, "hunger": -1},
+            {"id": 999999, "thirst": 5},
+            {"id": b.pk, "stamina": 70},
+        ])
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body["updated"], body["failed"]), (2, 3))
+        self.assertEqual([r["status"] for r in body["results"]], ["ok", "error", "error", "error", "ok"])
+        self.assertEqual(
+            list(DinoSlot.objects.order_by("pk").values_list("growth", "health", "stamina")),
+            [(40, 90, 100), (0, 100, 70)],
+        )
+
+    def test_writes_only_the_fields_each_slot_sent(self):
+        a, b = self.slots
+        with CaptureQueriesContext(connection) as ctx:
+            self.post([{"id": a.pk, "growth": 5}, {"id": b.pk, "health": 50}])
+        updates = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 2)
+        for sql in updates:
+            self.assertNotEqual('"growth"' in sql, '"health"' in sql)
+
+
+class ImageDerivativeTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp(prefix="isle-media-")
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = self.settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def upload(self, name, fmt):
+        buffer = BytesIO()
+        Image.new("RGB", (900, 600), (200, 40, 40)).save(buffer, fmt)
+        return ContentFile(buffer.getvalue(), name=name)
+
+    def test_derivatives_recorded_per_source_image(self):
+        png = Dino.objects.create(name="Rex", image=self.upload("rex.png", "PNG"))
+        jpg = Dino.objects.create(name="Rex", image=self.upload("rex.jpg", "JPEG"))
+        png_urls, jpg_urls = derivative_urls(png.image, "card"), derivative_urls(jpg.image, "card")
+        self.assertEqual(set(png_urls), {"webp", "jpg"})
+        self.assertNotEqual(png_urls, jpg_urls)
+        self.assertIn(".png__card", png_urls["webp"])
+        stored = Dino.objects.get(pk=png.pk).image_derivatives
+        self.assertEqual(stored["source"], png.image.name)
+        with Image.open(png.image.storage.path(stored["card"]["jpg"])) as card:
+            self.assertEqual(card.size, (480, 320))
+
+    def test_rendering_and_plain_saves_skip_storage(self):
+        dino = Dino.objects.create(name="Rex", image=self.upload("rex.png", "PNG"))
+        storage = FileSystemStorage
+        with mock.patch.object(storage, "exists", side_effect=AssertionError("storage.exists called")), \
+                mock.patch.object(storage, "save", side_effect=AssertionError("storage.save called")):
+            dino.name = "T. rex"
+            dino.save()
+            html = picture(Dino.objects.get(pk=dino.pk).image, "card")
+        self.assertIn('type="image/webp"', html)
+
+    def test_replaced_and_deleted_images_are_cleaned_up(self):
+        dino = Dino.objects.create(name="Rex", image=self.upload("rex.png", "PNG"))
+        storage = dino.image.storage
+        first = list(dino.image_derivatives["card"].values())
+        with self.captureOnCommitCallbacks(execute=True):
+            dino.image = self.upload("rex2.png", "PNG")
+            dino.save()
+        self.assertFalse(any(storage.exists(name) for name in first))
+        second = list(dino.image_derivatives["card"].values())
+        self.assertTrue(all(storage.exists(name) for name in second))
+        with self.captureOnCommitCallbacks(execute=True):
+            dino.delete()
+        self.assertFalse(any(storage.exists(name) for name in second))
+
+
+class SteamProfileEnrichmentTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        caches["steam_profiles"].clear()
+        users = User.objects.bulk_create(User(username=f"steam_{i}") for i in range(250))
+        PlayerProfile.objects.bulk_create(
+            PlayerProfile(user=user, steam_id=f"7656119800{i:07d}") for i, user in enumerate(users)
+        )
+        self.steam_api = StubSteamWebAPI().start()
+        self.addCleanup(self.steam_api.stop)
+
+    def enrich(self, **kwargs):
+        with self.settings(STEAM_API_URL=self.steam_api.url, STEAM_API_KEY="key"):
+            return steam.enrich_profiles(**kwargs)
+
+    def test_fetches_in_batches_of_100_and_caches(self):
+        self.assertEqual(self.enrich(chunk_size=1000), (250, 250))
+        self.assertEqual(self.steam_api.batches, [100, 100, 50])
+        player = PlayerProfile.objects.get(steam_id="76561198000000042")
+        self.assertEqual(player.steam_name, "Player 0042")
+        self.assertEqual(player.avatar_url, "https://avatars.steam.test/76561198000000042_full.jpg")
+
+        # Within the TTL nothing is fetched again and nothing has changed.
+        self.assertEqual(self.enrich(), (250, 0))
+        self.assertEqual(self.steam_api.requests, 3)
+
+    def test_main_page_renders_stored_profile(self):
+        self.enrich(only_missing=True)
+        player = PlayerProfile.objects.get(steam_id="76561198000000007")
+        session = self.client.session
+        session["steam_id"] = player.steam_id
+        session.save()
+        url = reverse("store:main_page")
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertContains(response, "Player 0007")
+        self.assertContains(response, player.avatar_url)
+        self.assertFalse([q for q in ctx.captured_queries if "socialaccount" in q["sql"]])
+
+    def test_first_login_leaves_the_profile_to_the_job(self):
+        steam_id = "76561198000000300"
+        self.enrich()
+        claimed = f"https://steamcommunity.com/openid/id/{steam_id}"
+        with StubOpenIDServer() as openid, self.settings(
+            STEAM_OPENID_URL=openid.url, STEAM_API_URL=self.steam_api.url, STEAM_API_KEY="key",
+        ):
+            response = self.client.get(reverse("store:steam-verify"), {
+                "openid.mode": "id_res", "openid.claimed_id": claimed, "openid.identity": claimed,
+            })
+        self.assertRedirects(response, reverse("store:main_page"), fetch_redirect_response=False)
+        self.assertEqual(self.steam_api.requests, 3)
+
+        self.assertEqual(self.enrich(only_missing=True), (1, 1))
+        self.assertEqual(self.steam_api.batches, [100, 100, 50, 1])
+        self.assertEqual(PlayerProfile.objects.get(steam_id=steam_id).steam_name, "Player 0300")
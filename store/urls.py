@@ -25,6 +25,7 @@ urlpatterns = [
     path('dino/release/<int:slot_id>/', views.release_dino, name='release_dino'),
     path('dino/add/<int:slot_id>/', views.add_dino, name='add_dino'),
     path('buy-dino/<int:dino_id>/', views.buy_dino, name='buy_dino'),
+    path('api/slots/batch/', views.slot_operations, name='slot_operations'),
     # path("dino/release/<int:slot_id>/", views.release_dino, name="release_dino"),
     # path("dino/switch/<int:slot_id>/", views.switch_dino, name="switch_dino"),
 
@@ -36,10 +37,17 @@ urlpatterns = [
     path('coins/cancel/', views.coin_cancel, name='coin_cancel'),
     path('stripe/webhook/', views.stripe_webhook, name='stripe_webhook'),
 
+    # ------------------------------
+    # Game Server API
+    # ------------------------------
+    path('api/slots/stats/', views.slot_stats_ingest, name='slot_stats_ingest'),
+
     # ------------------------------
     # Admin Panel
     # ------------------------------
     path('admin-panel/', views.admin_dashboard, name='admin-dashboard'),
+    path('metrics/', views.metrics, name='metrics'),
+    path('admin-panel/export/<str:kind>/', views.export_records, name='export_records'),
 
     # ------------------------------
     # Admin CRUD — Dinosaurs
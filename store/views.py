@@ -1,23 +1,35 @@
-import re
+import hmac
 import json
 import stripe
-import random
-import string
-import requests
 from urllib.parse import urlencode
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.shortcuts import render, redirect, get_object_or_404
+from django.db.models import Q
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
 from django.urls import reverse
-from django.http import HttpResponse
+from django.utils.dateparse import parse_date
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseRedirect, JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 from django.contrib import messages
-from django.contrib.auth.hashers import make_password
-from django.contrib.auth.models import User
 from django.contrib.auth.decorators import user_passes_test
 
-from .models import PlayerProfile, PlayerGameData, Dino, DinoSlot, CoinPackage, Transaction
+from .models import (
+    PlayerProfile, PlayerGameData, PlayerSummary, Dino, DinoSlot, CoinPackage,
+)
 from .forms import DinosaurForm, CoinPackageForm
+from .catalog import get_catalog_dinos, get_catalog_packages, get_catalog_version
+from . import exports, inventory, ledger, summaries
+from .webhooks import enqueue_event
+from .steam import get_verifier, extract_steam_id
+from .players import player_required, alogin_player, afind_player, create_player
+from .checkout import open_checkout
+from .clients import closes_loop_clients
+from . import slots as slot_ops
+from .telemetry import parse_updates, apply_slot_updates, PayloadError
+from .metrics import registry
+from .reports import headline_counts, revenue_totals
 
 
 # ------------------------------------------------------------
@@ -27,14 +39,6 @@ stripe.api_key = settings.STRIPE_SECRET_KEY
 STEAM_OPENID_URL = "https://steamcommunity.com/openid/login"
 
 
-# ------------------------------------------------------------
-# UTILITIES
-# ------------------------------------------------------------
-def random_password(length=12):
-    chars = string.ascii_letters + string.digits + string.punctuation
-    return ''.join(random.choice(chars) for _ in range(length))
-
-
 # ------------------------------------------------------------
 # STEAM LOGIN / AUTH
 # ------------------------------------------------------------
@@ -60,32 +64,23 @@ def steam_login(request):
     return redirect(f"{STEAM_OPENID_URL}?{urlencode(params)}")
 
 
-def steam_verify(request):
+@closes_loop_clients
+async def steam_verify(request):
     data = request.GET.dict()
     if "openid.claimed_id" not in data:
         return HttpResponse("❌ Invalid Steam response")
 
-    data["openid.mode"] = "check_authentication"
-    response = requests.post(STEAM_OPENID_URL, data=data)
-
-    if "is_valid:true" in response.text:
-        match = re.search(r"https://steamcommunity.com/openid/id/(\d+)", data["openid.claimed_id"])
-        if not match:
+    if await get_verifier().averify(data):
+        steam_id = extract_steam_id(data["openid.claimed_id"])
+        if not steam_id:
             return HttpResponse("❌ Steam ID not found")
 
-        steam_id = match.group(1)
-        request.session["steam_id"] = steam_id
-
-        user, _ = User.objects.get_or_create(
-            username=f"steam_{steam_id}",
-            defaults={"password": make_password(random_password())}
-        )
-
-        player_profile, _ = PlayerProfile.objects.get_or_create(
-            user=user,
-            defaults={"steam_id": steam_id}
-        )
-        PlayerGameData.objects.get_or_create(player=player_profile)
+        # Returning players cost one query; a first login creates the player.
+        # Their Steam name and avatar are left to enrich_steam_profiles.
+        player_profile = await afind_player(steam_id)
+        if player_profile is None:
+            player_profile = await sync_to_async(create_player)(steam_id)
+        await alogin_player(request, player_profile)
 
         return redirect("store:main_page")
 
@@ -100,20 +95,20 @@ def logout_view(request):
 # ------------------------------------------------------------
 # MAIN STORE / PLAYER DASHBOARD
 # ------------------------------------------------------------
+@player_required
 def main_page(request):
-    steam_id = request.session.get("steam_id")
-    if not steam_id:
-        return redirect("store:login-page")
-
-    player_profile = get_object_or_404(PlayerProfile, steam_id=steam_id)
-    dinos = Dino.objects.all()
-    packages = CoinPackage.objects.all()
-    slots = DinoSlot.objects.filter(player=player_profile)
+    player_profile = request.player
+    slots = DinoSlot.objects.filter(player=player_profile).select_related("active_dino")
 
+    # The catalog sections are fragment-cached per catalog version; the lists
+    # are passed as callables so they are only loaded when a fragment misses.
     context = {
         "player_profile": player_profile,
-        "dinos": dinos,
-        "packages": packages,
+        "catalog_version": get_catalog_version(),
+        "catalog_cache_timeout": settings.CATALOG_CACHE_TIMEOUT,
+        "dinos": get_catalog_dinos,
+        "packages": get_catalog_packages,
+        "owned_dino_ids": sorted(inventory.owned_dino_ids(player_profile)),
         "coin_balance": player_profile.coins,
         "slots": slots,
     }
@@ -122,14 +117,27 @@ def main_page(request):
 
 
 def player_dashboard(request, steam_id):
-    player_profile = get_object_or_404(PlayerProfile, steam_id=steam_id)
-    player_game_data, _ = PlayerGameData.objects.get_or_create(player=player_profile)
+    # Everything the page shows comes from the player's summary row and the
+    # two one-to-one rows joined onto it.
+    summaries_qs = PlayerSummary.objects.select_related("player__user", "player__playergamedata")
+    try:
+        summary = summaries_qs.get(player__steam_id=steam_id)
+    except PlayerSummary.DoesNotExist:
+        player_profile = get_object_or_404(PlayerProfile, steam_id=steam_id)
+        summaries.build(player_profile.pk)
+        summary = summaries_qs.get(player=player_profile)
+
+    player_profile = summary.player
+    try:
+        player_game_data = player_profile.playergamedata
+    except PlayerGameData.DoesNotExist:
+        player_game_data, _ = PlayerGameData.objects.get_or_create(player=player_profile)
 
     context = {
         "steam_id": steam_id,
         "player_profile": player_profile,
         "player_game_data": player_game_data,
-        "dinos": Dino.objects.all(),
+        "summary": summary,
         "coin_balance": player_profile.coins,
     }
     return render(request, "player_dashboard.html", context)
@@ -165,22 +173,17 @@ def add_dino(request, slot_id):
     }
     return render(request, "store/add_dino.html", context)
 
+@player_required
 def buy_dino(request, dino_id):
-    steam_id = request.session.get("steam_id")
-    if not steam_id:
-        return redirect("store:login-page")
-
-    player = get_object_or_404(PlayerProfile, steam_id=steam_id)
+    player = request.player
     dino = get_object_or_404(Dino, id=dino_id)
-    player_game_data, _ = PlayerGameData.objects.get_or_create(player=player)
 
-    if player.coins >= dino.coin_cost:
-        player.coins -= dino.coin_cost
-        player.save()
-        player_game_data.unlocked_dinos.add(dino)
-        player_game_data.save()
+    try:
+        inventory.buy(player, dino)
         messages.success(request, f"You bought {dino.name} successfully!")
-    else:
+    except inventory.AlreadyOwned:
+        messages.info(request, f"You already own {dino.name}.")
+    except ledger.InsufficientCoins:
         messages.error(request, "❌ Not enough coins to buy this dinosaur!")
 
     return redirect("store:main_page")
@@ -207,41 +210,35 @@ def switch_dino(request, slot_id):
 
     return render(request, "store/switch_dino.html", {"slot": slot, "dinos": dinos})
 
+
+@require_POST
+@player_required
+def slot_operations(request):
+    """
+    Apply several slot changes in one request and return the player's slots.
+    Body: {"operations": [{"op": "assign", "slot": 1, "dino": 7}, {"op": "release", "slot": 2}]}
+    """
+    try:
+        slot_ops.apply_operations(request.player, slot_ops.parse_operations(request.body))
+    except slot_ops.SlotOperationError as exc:
+        return JsonResponse({"error": str(exc), "errors": exc.errors}, status=400)
+    return JsonResponse({"slots": slot_ops.slot_state(request.player)})
+
 # ------------------------------------------------------------
 # STRIPE PAYMENT (COINS)
 # ------------------------------------------------------------
-def buy_coins(request, package_id):
-    package = get_object_or_404(CoinPackage, id=package_id)
-    steam_id = request.session.get("steam_id")
-    if not steam_id:
-        return redirect("store:login-page")
-
-    player = get_object_or_404(PlayerProfile, steam_id=steam_id)
-
-    session = stripe.checkout.Session.create(
-        payment_method_types=['card'],
-        line_items=[{
-            'price_data': {
-                'currency': 'usd',
-                'product_data': {'name': f"{package.name} — {package.coins_amount} Coins"},
-                'unit_amount': int(package.price_usd * 100),
-            },
-            'quantity': 1,
-        }],
-        mode='payment',
+@player_required
+@closes_loop_clients
+async def buy_coins(request, package_id):
+    package = await aget_object_or_404(CoinPackage, id=package_id)
+    txn = await open_checkout(
+        request.player,
+        package,
         success_url=request.build_absolute_uri(reverse('store:coin_success')) + '?session_id={CHECKOUT_SESSION_ID}',
         cancel_url=request.build_absolute_uri(reverse('store:coin_cancel')),
-        customer_email=player.user.email or None,
     )
-
-    Transaction.objects.create(
-        player=player,
-        amount_usd=package.price_usd,
-        coins_purchased=package.coins_amount,
-        status="pending",
-    )
-
-    return redirect(session.url, code=303)
+    # 303 See Other, as Stripe documents for Checkout; redirect() has no way to choose the code.
+    return HttpResponseRedirect(txn.checkout_url, status=303)
 
 
 def coin_success(request):
@@ -261,25 +258,48 @@ def stripe_webhook(request):
     endpoint_secret = settings.STRIPE_WEBHOOK_SECRET
 
     try:
-        event = stripe.Webhook.construct_event(payload, sig_header, endpoint_secret)
+        stripe.WebhookSignature.verify_header(payload.decode('utf-8'), sig_header, endpoint_secret)
+        event = json.loads(payload)
     except (ValueError, stripe.error.SignatureVerificationError):
         return HttpResponse(status=400)
+    if not isinstance(event, dict) or 'id' not in event or 'type' not in event:
+        return HttpResponse(status=400)
 
-    if event['type'] == 'checkout.session.completed':
-        session = event['data']['object']
-        txn = Transaction.objects.filter(
-            amount_usd=session['amount_total'] / 100,
-            status='pending'
-        ).first()
+    # Processing happens in the process_stripe_events worker.
+    enqueue_event(event)
+    return HttpResponse(status=200)
 
-        if txn:
-            player = txn.player
-            player.coins += txn.coins_purchased
-            player.save()
-            txn.status = 'completed'
-            txn.save()
 
-    return HttpResponse(status=200)
+# ------------------------------------------------------------
+# GAME SERVER API
+# ------------------------------------------------------------
+def is_game_server(request):
+    header = request.META.get("HTTP_AUTHORIZATION", "")
+    scheme, _, key = header.partition(" ")
+    if scheme.lower() != "bearer" or not key:
+        return False
+    # Compare bytes: compare_digest rejects str with non-ASCII characters.
+    return any(hmac.compare_digest(key.encode(), allowed.encode()) for allowed in settings.GAME_SERVER_API_KEYS)
+
+
+@csrf_exempt
+@require_POST
+def slot_stats_ingest(request):
+    if not is_game_server(request):
+        return JsonResponse({"error": "Invalid API key."}, status=401)
+
+    try:
+        items = parse_updates(request.body, request.content_type)
+    except PayloadError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+
+    results = apply_slot_updates(items, chunk_size=settings.SLOT_STATS_CHUNK_SIZE)
+    updated = sum(1 for result in results if result["status"] == "ok")
+    return JsonResponse({
+        "updated": updated,
+        "failed": len(results) - updated,
+        "results": results,
+    })
 
 
 # ------------------------------------------------------------
@@ -291,17 +311,65 @@ def is_admin(user):
 
 @user_passes_test(is_admin)
 def admin_dashboard(request):
+    query = request.GET.get('q', '').strip()
+    after = request.GET.get('after', '')
+
+    # Keyset pagination: ?after=<last player id on the previous page>.
+    players = PlayerProfile.objects.select_related('user').order_by('id')
+    if query:
+        players = players.filter(Q(steam_id__startswith=query) | Q(steam_name__icontains=query))
+    if after.isdigit():
+        players = players.filter(id__gt=int(after))
+
+    page_size = settings.ADMIN_DASHBOARD_PAGE_SIZE
+    page = list(players[:page_size + 1])
+    has_next = len(page) > page_size
+    page = page[:page_size]
+
     context = {
-        'dino_count': Dino.objects.count(),
-        'package_count': CoinPackage.objects.count(),
-        'player_count': PlayerProfile.objects.count(),
-        'dinos': Dino.objects.all(),
-        'packages': CoinPackage.objects.all(),
-        'players': PlayerProfile.objects.all(),
+        **headline_counts(),
+        **revenue_totals(),
+        'dinos': get_catalog_dinos(),
+        'packages': get_catalog_packages(),
+        'players': page,
+        'next_after': page[-1].id if has_next else None,
+        'q': query,
     }
     return render(request, 'store/admin_dashboard.html', context)
 
 
+@user_passes_test(is_admin)
+def metrics(request):
+    return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@user_passes_test(is_admin)
+def export_records(request, kind):
+    """
+    Stream transactions or purchases for finance.
+    ?format=csv|ndjson, ?since=&until= (YYYY-MM-DD, inclusive), ?status=
+    """
+    fmt = request.GET.get('format', 'csv')
+    dates = {}
+    for name in ('since', 'until'):
+        value = request.GET.get(name, '')
+        try:
+            dates[name] = parse_date(value) if value else None
+        except ValueError:  # well formed but not a real day, e.g. 2024-02-30
+            dates[name] = None
+        if value and dates[name] is None:
+            return HttpResponseBadRequest(f"{name} must be a YYYY-MM-DD date.")
+    try:
+        columns, rows = exports.export_rows(kind, status=request.GET.get('status') or None, **dates)
+        content = exports.render(fmt, columns, rows)
+    except exports.ExportError as exc:
+        return HttpResponseBadRequest(str(exc))
+
+    response = StreamingHttpResponse(content, content_type=exports.FORMATS[fmt])
+    response['Content-Disposition'] = f'attachment; filename="{kind}.{fmt}"'
+    return response
+
+
 # ------------------------------------------------------------
 # ADMIN CRUD (Dinos & Packages)
 # ------------------------------------------------------------
@@ -0,0 +1,108 @@
+import logging
+import uuid
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import ledger
+from .checkout import expire_session
+from .models import StripeEvent
+
+
+logger = logging.getLogger(__name__)
+
+
+# ------------------------------------------------------------
+# INBOX
+# ------------------------------------------------------------
+# stripe_webhook only verifies and stores events; process_stripe_events drains
+# them. Stripe retries deliver the same event id again, so inserts ignore
+# conflicts on event_id and handlers must be safe to run more than once.
+def enqueue_event(event):
+    StripeEvent.objects.bulk_create(
+        [StripeEvent(event_id=event["id"], event_type=event["type"], payload=event)],
+        ignore_conflicts=True,
+    )
+
+
+def claim_batch(batch_size, worker_id=None):
+    """
+    Move up to batch_size pending events to 'processing' for one worker.
+
+    Rows are tagged with a claim token so concurrent workers never pick up
+    the same event. Where the database supports SKIP LOCKED the candidates
+    are locked first; elsewhere (SQLite) the claim is a single UPDATE with a
+    subquery, which the database serializes on its own.
+    """
+    token = worker_id or uuid.uuid4().hex
+    with transaction.atomic():
+        pending = StripeEvent.objects.filter(status="pending").order_by("id")
+        if connection.features.has_select_for_update_skip_locked:
+            candidates = list(
+                pending.select_for_update(skip_locked=True).values_list("pk", flat=True)[:batch_size]
+            )
+        else:
+            candidates = pending.values("pk")[:batch_size]
+
+        claimed = StripeEvent.objects.filter(pk__in=candidates, status="pending").update(
+            status="processing",
+            claimed_by=token,
+            claimed_at=timezone.now(),
+            attempts=F("attempts") + 1,
+        )
+    if not claimed:
+        return []
+    return list(StripeEvent.objects.filter(status="processing", claimed_by=token).order_by("id"))
+
+
+def release_stale_claims(older_than):
+    """Put events claimed by a worker that died mid-batch back in the queue."""
+    cutoff = timezone.now() - timedelta(seconds=older_than)
+    return StripeEvent.objects.filter(status="processing", claimed_at__lt=cutoff).update(
+        status="pending", claimed_by=""
+    )
+
+
+def process_event(event, max_attempts=5):
+    handler = HANDLERS.get(event.event_type)
+    try:
+        with transaction.atomic():
+            if handler:
+                handler(event.payload)
+            StripeEvent.objects.filter(pk=event.pk).update(
+                status="processed", processed_at=timezone.now(), last_error=""
+            )
+        return True
+    except Exception as exc:
+        logger.exception("Stripe event %s failed (attempt %s)", event.event_id, event.attempts)
+        StripeEvent.objects.filter(pk=event.pk).update(
+            status="failed" if event.attempts >= max_attempts else "pending",
+            claimed_by="",
+            last_error=repr(exc),
+        )
+        return False
+
+
+# ------------------------------------------------------------
+# HANDLERS
+# ------------------------------------------------------------
+HANDLERS = {}
+
+
+def handles(event_type):
+    def register(func):
+        HANDLERS[event_type] = func
+        return func
+    return register
+
+
+@handles("checkout.session.completed")
+def checkout_session_completed(event):
+    ledger.complete_checkout_session(event["data"]["object"]["id"])
+
+
+@handles("checkout.session.expired")
+def checkout_session_expired(event):
+    expire_session(event["data"]["object"]["id"])